@@ -1,4 +1,5 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from rest_framework.exceptions import ValidationError
 
 from airport.models import (
     Crew,
@@ -7,15 +8,145 @@ from airport.models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightSchedule,
     Order,
     Ticket
 )
+from airport.pagination import EstimatedCountPaginator
+from airport.schedules import generate_flights
 
-admin.site.register(Crew)
-admin.site.register(Airport)
-admin.site.register(Route)
-admin.site.register(AirplaneType)
-admin.site.register(Airplane)
-admin.site.register(Flight)
-admin.site.register(Order)
-admin.site.register(Ticket)
+FLIGHT_RELATED = ("route__source", "route__destination", "airplane__airplane_type")
+TICKET_RELATED = tuple(f"flight__{name}" for name in FLIGHT_RELATED)
+
+
+class TicketFlightMixin:
+    """Tickets show their flight, which shows its route and airplane."""
+
+    autocomplete_fields = ("flight",)
+
+    def get_queryset(self, request):
+        # Covers the changelist too, list_select_related would be ignored.
+        return super().get_queryset(request).select_related(
+            *TICKET_RELATED, "order"
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "flight":
+            kwargs["queryset"] = Flight.objects.select_related(*FLIGHT_RELATED)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+@admin.register(Crew)
+class CrewAdmin(admin.ModelAdmin):
+    list_display = ("last_name", "first_name")
+    search_fields = ("last_name", "first_name")
+
+
+@admin.register(Airport)
+class AirportAdmin(admin.ModelAdmin):
+    list_display = ("name", "closet_big_city")
+    search_fields = ("name", "closet_big_city")
+
+
+@admin.register(Route)
+class RouteAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "destination", "distance")
+    ordering = ("id",)
+    # Prefix searches, served by the UPPER() pattern indexes on airport
+    # cities and user emails (PostgreSQL).
+    search_fields = (
+        "^source__closet_big_city",
+        "^destination__closet_big_city",
+    )
+    autocomplete_fields = ("source", "destination")
+
+    def get_queryset(self, request):
+        # Route.__str__ shows both airports, also in autocomplete results.
+        return super().get_queryset(request).select_related(
+            "source", "destination"
+        )
+
+
+@admin.register(AirplaneType)
+class AirplaneTypeAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
+
+
+@admin.register(Airplane)
+class AirplaneAdmin(admin.ModelAdmin):
+    list_display = ("name", "airplane_type", "rows", "seats_in_row")
+    ordering = ("id",)
+    list_filter = ("airplane_type",)
+    search_fields = ("name",)
+    autocomplete_fields = ("airplane_type",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("airplane_type")
+
+
+@admin.register(Flight)
+class FlightAdmin(admin.ModelAdmin):
+    list_display = ("id", "route", "airplane", "departure_time", "arrival_time")
+    ordering = ("id",)
+    search_fields = (
+        "^route__source__closet_big_city",
+        "^route__destination__closet_big_city",
+    )
+    autocomplete_fields = ("route", "airplane", "crews")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*FLIGHT_RELATED)
+
+
+@admin.register(FlightSchedule)
+class FlightScheduleAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "route", "airplane", "weekdays", "departure_time", "valid_from",
+        "valid_until",
+    )
+    list_select_related = FLIGHT_RELATED
+    autocomplete_fields = ("route", "airplane", "crews")
+    actions = ("generate",)
+
+    @admin.action(description="Generate the flights of selected schedules")
+    def generate(self, request, queryset):
+        for schedule in queryset:
+            try:
+                result = generate_flights(schedule)
+            except ValidationError as error:
+                self.message_user(
+                    request,
+                    f"{schedule}: {'; '.join(error.detail['conflicts'])}",
+                    messages.ERROR,
+                )
+            else:
+                self.message_user(
+                    request,
+                    f"{schedule}: {result['created']} flights created, "
+                    f"{result['skipped']} already generated.",
+                )
+
+
+class TicketInline(TicketFlightMixin, admin.TabularInline):
+    model = Ticket
+    extra = 0
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "created_at")
+    list_select_related = ("user",)
+    search_fields = ("^user__email",)
+    raw_id_fields = ("user",)
+    inlines = (TicketInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Ticket)
+class TicketAdmin(TicketFlightMixin, admin.ModelAdmin):
+    list_display = ("id", "flight", "row", "seat", "order")
+    search_fields = ("^order__user__email",)
+    raw_id_fields = ("order",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
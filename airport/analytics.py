@@ -0,0 +1,368 @@
+"""
+Load factors per route, day of departure and airplane type.
+
+``RouteDailyLoad`` holds the number of flights, seats and sold tickets of
+every ``(route, day, airplane type)``, so load factor time series are read
+from a small table instead of aggregating all tickets against airplane
+capacities. Creating a ticket or a flight adjusts its row by an increment.
+A deletion (of a ticket, a flight, an order, an airplane...) takes all the
+tickets and flights it removes off their rows at once, with one update per
+row rather than per object. Changes that move flights between rows
+(a new departure, route or airplane, an airplane changing capacity or type)
+recompute the rows involved. Bulk writes, which send no signals, call
+``refresh`` or ``rebuild`` themselves.
+
+Rows of archived flight partitions are kept, so the history outlives the
+flights and tickets.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.utils import timezone
+
+from airport.models import Airplane, Flight, RouteDailyLoad, Ticket
+
+COUNTERS = ("flights", "seats", "sold")
+REFRESH_CHUNK_SIZE = 500
+
+
+def load_key(route_id, departure_time, airplane_type_id) -> tuple:
+    # Naive values are saved as times of the default time zone.
+    day = (
+        departure_time.date()
+        if timezone.is_naive(departure_time)
+        else timezone.localdate(departure_time)
+    )
+    return route_id, day, airplane_type_id
+
+
+def flight_key(flight) -> tuple:
+    return load_key(
+        flight.route_id, flight.departure_time, flight.airplane.airplane_type_id
+    )
+
+
+def aggregate(flights, tickets) -> dict:
+    """
+    Return ``{key: {"flights", "seats", "sold"}}`` of ``flights``, counting
+    the ``tickets`` of those flights as sold.
+    """
+    totals = {}
+    for route_id, day, airplane_type_id, count, seats in (
+        flights.annotate(day=TruncDate("departure_time"))
+        .values_list("route_id", "day", "airplane__airplane_type_id")
+        .annotate(
+            count=Count("id"),
+            seats=Sum(F("airplane__rows") * F("airplane__seats_in_row")),
+        )
+        .order_by()
+    ):
+        totals[route_id, day, airplane_type_id] = {
+            "flights": count, "seats": seats, "sold": 0
+        }
+    for route_id, day, airplane_type_id, sold in (
+        tickets.filter(flight__in=flights.values("pk"))
+        .annotate(day=TruncDate("flight__departure_time"))
+        .values_list(
+            "flight__route_id", "day", "flight__airplane__airplane_type_id"
+        )
+        .annotate(sold=Count("id"))
+        .order_by()
+    ):
+        totals[route_id, day, airplane_type_id]["sold"] = sold
+    return totals
+
+
+def load_rows(model, totals) -> list:
+    return [
+        model(
+            route_id=route_id,
+            day=day,
+            airplane_type_id=airplane_type_id,
+            **counts,
+        )
+        for (route_id, day, airplane_type_id), counts in totals.items()
+    ]
+
+
+def adjust(key, **deltas) -> None:
+    """Add ``deltas`` to the counters of the row of ``key``."""
+    route_id, day, airplane_type_id = key
+    if min(deltas.values()) < 0:
+        # There is nothing to take from a row that doesn't exist.
+        RouteDailyLoad.objects.filter(
+            route_id=route_id, day=day, airplane_type_id=airplane_type_id
+        ).update(**{field: F(field) + delta for field, delta in deltas.items()})
+        return
+    _add({key: deltas})
+
+
+def count_sold(tickets) -> None:
+    """Add bulk created ``tickets`` to the sold counters of their rows."""
+    _add(
+        {
+            key: {"sold": sold}
+            for key, sold in Counter(
+                flight_key(ticket.flight) for ticket in tickets
+            ).items()
+        }
+    )
+
+
+def _add(deltas) -> None:
+    quote = connection.ops.quote_name
+    table = quote(RouteDailyLoad._meta.db_table)
+    columns = [quote(field) for field in COUNTERS]
+    rows = [
+        [*key, *(counts.get(field, 0) for field in COUNTERS)]
+        for key, counts in deltas.items()
+    ]
+    with connection.cursor() as cursor:
+        # Creates the rows or adds to them in one statement, even under
+        # concurrent writers.
+        cursor.execute(
+            f"INSERT INTO {table} (route_id, day, airplane_type_id, "
+            f"{', '.join(columns)}) VALUES "
+            + ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))
+            + " ON CONFLICT (route_id, day, airplane_type_id) DO UPDATE SET "
+            + ", ".join(
+                f"{column} = {table}.{column} + EXCLUDED.{column}"
+                for column in columns
+            ),
+            [value for row in rows for value in row],
+        )
+
+
+def upsert(rows, batch_size=None) -> None:
+    # A concurrent _add() may recreate a row between the delete and the
+    # insert; overwrite it rather than fail on the unique key.
+    RouteDailyLoad.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=("route", "day", "airplane_type"),
+        update_fields=COUNTERS,
+    )
+
+
+def refresh(keys) -> None:
+    """Recompute the rows of ``keys`` from flights and tickets."""
+    keys = list(set(keys))
+    for start in range(0, len(keys), REFRESH_CHUNK_SIZE):
+        chunk = keys[start:start + REFRESH_CHUNK_SIZE]
+        rows = Q()
+        for route_id, day, airplane_type_id in chunk:
+            rows |= Q(
+                route_id=route_id, day=day, airplane_type_id=airplane_type_id
+            )
+        totals = aggregate(
+            Flight.objects.filter(
+                route_id__in={key[0] for key in chunk},
+                departure_time__date__in={key[1] for key in chunk},
+                airplane__airplane_type_id__in={key[2] for key in chunk},
+            ),
+            Ticket.objects.all(),
+        )
+        with transaction.atomic(savepoint=False):
+            RouteDailyLoad.objects.filter(rows).delete()
+            upsert(
+                load_rows(
+                    RouteDailyLoad,
+                    {key: totals[key] for key in chunk if key in totals},
+                )
+            )
+
+
+def rebuild() -> int:
+    """Recompute the whole table. Return the number of rows."""
+    totals = aggregate(Flight.objects.all(), Ticket.objects.all())
+    with transaction.atomic(savepoint=False):
+        RouteDailyLoad.objects.all().delete()
+        upsert(load_rows(RouteDailyLoad, totals), batch_size=1000)
+    return len(totals)
+
+
+def _loaded_values(model, pk, *fields):
+    return model.objects.filter(pk=pk).values_list(*fields).first()
+
+
+def _on_ticket_init(sender, instance, **kwargs):
+    # Remembered without a query, unless the field was deferred.
+    instance._loaded_flight_id = instance.__dict__.get("flight_id")
+
+
+def _on_ticket_pre_save(sender, instance, raw, **kwargs):
+    if instance.pk and not raw and instance._loaded_flight_id is None:
+        loaded = _loaded_values(Ticket, instance.pk, "flight_id")
+        instance._loaded_flight_id = loaded and loaded[0]
+
+
+def _on_ticket_saved(sender, instance, created, raw, **kwargs):
+    loaded, instance._loaded_flight_id = (
+        instance._loaded_flight_id, instance.flight_id
+    )
+    if raw:
+        return
+    if created:
+        adjust(flight_key(instance.flight), sold=1)
+        return
+    if loaded and loaded != instance.flight_id:
+        refresh(
+            load_key(*values)
+            for values in Flight.objects.filter(
+                pk__in=(loaded, instance.flight_id)
+            ).values_list(
+                "route_id", "departure_time", "airplane__airplane_type_id"
+            )
+        )
+
+
+def _deletion(origin, instance) -> dict:
+    # Everything a deletion removes gets pre_delete before any row goes.
+    target = instance if origin is None else origin
+    if not hasattr(target, "_load_deletion"):
+        target._load_deletion = {"sold": Counter(), "flights": {}}
+    return target._load_deletion
+
+
+def _on_ticket_pre_delete(sender, instance, origin=None, **kwargs):
+    _deletion(origin, instance)["sold"][instance.flight_id] += 1
+
+
+def _on_deleted(sender, instance, origin=None, **kwargs):
+    # Tickets are deleted before their flights, flights before their
+    # airplanes; the first post_delete takes everything off at once.
+    target = instance if origin is None else origin
+    deletion = target.__dict__.pop("_load_deletion", None)
+    if deletion is not None:
+        take_off(deletion["sold"], deletion["flights"])
+
+
+def take_off(sold, flights) -> None:
+    """
+    Take ``sold`` tickets (a count per flight id) and deleted ``flights``
+    (``{id: (route_id, departure_time, airplane_id)}``) off their rows, with
+    one query for the flights of the tickets, one for the airplanes of the
+    flights and one update per row.
+    """
+    keys = {}
+    if sold.keys() - flights.keys():
+        for flight_id, *values in Flight.objects.filter(
+            pk__in=sold.keys() - flights.keys()
+        ).values_list(
+            "pk", "route_id", "departure_time", "airplane__airplane_type_id"
+        ):
+            keys[flight_id] = load_key(*values)
+    deltas = {}
+    if flights:
+        airplanes = {
+            airplane_id: (airplane_type_id, rows * seats_in_row)
+            for airplane_id, airplane_type_id, rows, seats_in_row in (
+                Airplane.objects.filter(
+                    pk__in={values[2] for values in flights.values()}
+                ).values_list("pk", "airplane_type_id", "rows", "seats_in_row")
+            )
+        }
+        for flight_id, (route_id, departure_time, airplane_id) in (
+            flights.items()
+        ):
+            airplane_type_id, seats = airplanes[airplane_id]
+            keys[flight_id] = load_key(
+                route_id, departure_time, airplane_type_id
+            )
+            counts = deltas.setdefault(keys[flight_id], Counter())
+            counts["flights"] -= 1
+            counts["seats"] -= seats
+    for flight_id, count in sold.items():
+        deltas.setdefault(keys[flight_id], Counter())["sold"] -= count
+    for key, counts in deltas.items():
+        adjust(key, **counts)
+
+
+def _on_flight_pre_save(sender, instance, raw, **kwargs):
+    if instance.pk and not raw:
+        instance._loaded_load = _loaded_values(
+            Flight,
+            instance.pk,
+            "route_id",
+            "departure_time",
+            "airplane__airplane_type_id",
+            "airplane_id",
+        )
+
+
+def _on_flight_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        airplane = instance.airplane
+        adjust(
+            flight_key(instance),
+            flights=1,
+            seats=airplane.rows * airplane.seats_in_row,
+        )
+        return
+    loaded = getattr(instance, "_loaded_load", None)
+    if loaded and (
+        load_key(*loaded[:3]) != flight_key(instance)
+        or loaded[3] != instance.airplane_id
+    ):
+        refresh([load_key(*loaded[:3]), flight_key(instance)])
+
+
+def _on_flight_pre_delete(sender, instance, origin=None, **kwargs):
+    _deletion(origin, instance)["flights"][instance.pk] = (
+        instance.route_id, instance.departure_time, instance.airplane_id
+    )
+
+
+def _on_airplane_pre_save(sender, instance, raw, **kwargs):
+    if instance.pk and not raw:
+        instance._loaded_capacity = _loaded_values(
+            Airplane, instance.pk, "rows", "seats_in_row", "airplane_type_id"
+        )
+
+
+def _on_airplane_saved(sender, instance, created, raw, **kwargs):
+    loaded = getattr(instance, "_loaded_capacity", None)
+    if raw or created or not loaded or loaded == (
+        instance.rows, instance.seats_in_row, instance.airplane_type_id
+    ):
+        return
+    refresh(
+        load_key(route_id, departure_time, airplane_type_id)
+        for route_id, departure_time in instance.flights.values_list(
+            "route_id", "departure_time"
+        )
+        for airplane_type_id in (loaded[2], instance.airplane_type_id)
+    )
+
+
+def track_loads() -> None:
+    """Keep ``RouteDailyLoad`` up to date with ticket and flight changes."""
+    for signal, model, handler in (
+        (post_init, Ticket, _on_ticket_init),
+        (pre_save, Ticket, _on_ticket_pre_save),
+        (post_save, Ticket, _on_ticket_saved),
+        (pre_delete, Ticket, _on_ticket_pre_delete),
+        (post_delete, Ticket, _on_deleted),
+        (pre_save, Flight, _on_flight_pre_save),
+        (post_save, Flight, _on_flight_saved),
+        (pre_delete, Flight, _on_flight_pre_delete),
+        (post_delete, Flight, _on_deleted),
+        (pre_save, Airplane, _on_airplane_pre_save),
+        (post_save, Airplane, _on_airplane_saved),
+    ):
+        signal.connect(
+            handler, sender=model, weak=False,
+            dispatch_uid=f"analytics-{handler.__name__}",
+        )
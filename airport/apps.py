@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class AirportConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "airport"
+
+    def ready(self):
+        from airport import analytics, invalidation
+
+        analytics.track_loads()
+        # Caches subscribe to, and so watch, the models they are built from.
+        # Their modules are loaded in every process, so that changes made
+        # where they aren't used (e.g. by commands) are published too.
+        from airport import autocomplete, boards, geo  # noqa: F401
+
+        if settings.AIRPORT_INVALIDATION_LISTENER:
+            request_started.connect(
+                invalidation.start_listener,
+                dispatch_uid="airport-invalidation-listener",
+            )
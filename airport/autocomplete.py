@@ -0,0 +1,138 @@
+"""
+Airport and city autocomplete from an in-memory prefix index.
+
+Every word of an airport's name and city is a key of a sorted array, so
+the airports matching a prefix are a ``bisect`` away. Matches are ranked
+by the number of routes from and to the airport. A prefix matching few
+words has its matches sorted by rank; one matching many (a single letter)
+is first looked up among the best ranked airports, where its matches are
+dense, so a search rarely looks at more than a few hundred entries. The
+index is built on first use in each process and dropped whenever an
+airport or a route changes, or after ``AIRPORT_AUTOCOMPLETE_CACHE_TTL``
+seconds should an invalidation be missed.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models import Count
+
+from airport.invalidation import LocalCache
+from airport.models import Airport, Route
+
+MAX_RESULTS = 20
+LAST_CHARACTER = chr(0x10FFFF)
+WORD = re.compile(r"\w+")
+
+
+def normalize(text) -> str:
+    """Casefold ``text`` and strip its accents: "Kraków" -> "krakow"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def words(text) -> list:
+    return WORD.findall(normalize(text))
+
+
+class PrefixIndex:
+    def __init__(self, airports):
+        """``airports`` are suggestions (dicts) ordered by rank."""
+        self.suggestions = airports
+        airport_words = [
+            set(words(f"{airport['name']} {airport['closet_big_city']}"))
+            for airport in airports
+        ]
+        # " word word": a word starts with prefix if " prefix" is in there.
+        self._texts = ["".join(f" {word}" for word in each) for each in airport_words]
+        # (word, rank) pairs; a rank is an index into suggestions.
+        entries = sorted(
+            (word, rank)
+            for rank, each in enumerate(airport_words)
+            for word in each
+        )
+        self._keys = [word for word, _ in entries]
+        self._ranks = [rank for _, rank in entries]
+
+    def _range(self, prefix) -> tuple:
+        """The slice of the index holding the words starting with ``prefix``."""
+        return (
+            bisect_left(self._keys, prefix),
+            bisect_left(self._keys, prefix + LAST_CHARACTER),
+        )
+
+    def _matches(self, rank, prefixes) -> bool:
+        """Whether the airport has words starting with all (spaced) prefixes."""
+        text = self._texts[rank]
+        for prefix in prefixes:
+            if prefix not in text:
+                return False
+        return True
+
+    def search(self, query, limit=MAX_RESULTS) -> list:
+        """Return the best airports with words starting like those of ``query``."""
+        prefixes = words(query)
+        if not prefixes:
+            return []
+        ranges = sorted(
+            (self._range(prefix) for prefix in prefixes),
+            key=lambda bounds: bounds[1] - bounds[0],
+        )
+        start, end = ranges[0]
+        size = end - start
+        prefixes = [f" {prefix}" for prefix in prefixes]
+
+        results = []
+        walked = 0
+        if size ** 2 > limit * len(self.suggestions):
+            # Many matches: the best airports likely have enough of them.
+            walked = min(
+                len(self.suggestions), 2 * limit * len(self.suggestions) // size
+            )
+            for rank in range(walked):
+                if self._matches(rank, prefixes):
+                    results.append(self.suggestions[rank])
+                    if len(results) == limit:
+                        return results
+
+        candidates = set(self._ranks[start:end])
+        # Narrow down by the other prefixes unless checking words is cheaper.
+        for other_start, other_end in ranges[1:]:
+            if other_end - other_start > 8 * size:
+                break
+            candidates &= set(self._ranks[other_start:other_end])
+        for rank in sorted(candidates):
+            if rank >= walked and self._matches(rank, prefixes):
+                results.append(self.suggestions[rank])
+                if len(results) == limit:
+                    break
+        return results
+
+
+def build_index() -> PrefixIndex:
+    routes = {}
+    for field in ("source", "destination"):
+        for airport_id, count in (
+            Route.objects.values_list(field)
+            .annotate(count=Count("id"))
+            .order_by()
+        ):
+            routes[airport_id] = routes.get(airport_id, 0) + count
+    airports = [
+        {**airport, "routes": routes.get(airport["id"], 0)}
+        for airport in Airport.objects.values("id", "name", "closet_big_city")
+    ]
+    airports.sort(key=lambda airport: (-airport["routes"], airport["name"]))
+    return PrefixIndex(airports)
+
+
+index_cache = LocalCache(
+    "autocomplete",
+    [Airport, Route],
+    ttl=settings.AIRPORT_AUTOCOMPLETE_CACHE_TTL,
+)
+
+
+def suggest(query, limit=MAX_RESULTS) -> list:
+    return index_cache.get_or_set("index", build_index).search(query, limit)
@@ -0,0 +1,111 @@
+"""
+Departure and arrival boards of airports.
+
+A board lists the flights leaving (or reaching) an airport in the next few
+hours. The routes of every airport and the airports they lead to are
+reference data, loaded once per process and kept until a route or an
+airport changes, or for ``AIRPORT_BOARD_ROUTES_CACHE_TTL`` seconds should
+an invalidation be missed. The flights of a board are then one range scan
+per route of the ``(route, departure_time)`` or ``(route, arrival_time)``
+index, and the serialized board itself is cached for a few seconds, so the
+many screens polling the same airport share one query. Expired boards are
+dropped as new ones come in, so boards of every airport and every ``hours``
+(1 to 48) don't pile up.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from airport.invalidation import LocalCache
+from airport.models import Airport, Flight, Route
+
+DEPARTURES = "departures"
+ARRIVALS = "arrivals"
+# Flights last less than this, so arrivals only come from partitions of
+# departures this recent.
+MAX_FLIGHT_DURATION = timedelta(days=1)
+
+routes_cache = LocalCache(
+    "board_routes",
+    [Airport, Route],
+    ttl=settings.AIRPORT_BOARD_ROUTES_CACHE_TTL,
+)
+boards_cache = LocalCache(
+    "boards", [Airport, Route, Flight], ttl=settings.AIRPORT_BOARD_CACHE_TTL
+)
+
+
+def load_routes() -> dict:
+    """
+    Return ``{kind: {airport_id: {route_id: other_airport}}}`` where the
+    other airport is the destination of departures and the source of
+    arrivals.
+    """
+    airports = {
+        airport["id"]: airport
+        for airport in Airport.objects.values(
+            "id", "code", "name", "closet_big_city", "latitude", "longitude"
+        )
+    }
+    routes = {kind: {pk: {} for pk in airports} for kind in (DEPARTURES, ARRIVALS)}
+    for route_id, source_id, destination_id in Route.objects.values_list(
+        "id", "source_id", "destination_id"
+    ):
+        routes[DEPARTURES][source_id][route_id] = airports[destination_id]
+        routes[ARRIVALS][destination_id][route_id] = airports[source_id]
+    return routes
+
+
+def get_routes(kind, airport_id):
+    """Return the routes of a board, or None for an unknown airport."""
+    return routes_cache.get_or_set("routes", load_routes)[kind].get(airport_id)
+
+
+def find_flights(kind, routes, hours) -> list:
+    """Return the flights of a board, each with the airport at the other end."""
+    now = timezone.now()
+    end = now + timedelta(hours=hours)
+    flights = Flight.objects.filter(route_id__in=list(routes))
+    if kind == DEPARTURES:
+        flights = flights.filter(
+            departure_time__gte=now, departure_time__lt=end
+        ).order_by("departure_time", "id")
+        other_end = "destination"
+    else:
+        flights = flights.filter(
+            departure_time__gte=now - MAX_FLIGHT_DURATION,
+            arrival_time__gte=now,
+            arrival_time__lt=end,
+        ).order_by("arrival_time", "id")
+        other_end = "source"
+
+    return [
+        {
+            "id": flight_id,
+            "departure_time": departure_time,
+            "arrival_time": arrival_time,
+            other_end: routes[route_id],
+        }
+        for flight_id, route_id, departure_time, arrival_time in (
+            flights.values_list(
+                "id", "route_id", "departure_time", "arrival_time"
+            )
+        )
+    ]
+
+
+def get_board(kind, airport_id, hours, serialize):
+    """
+    Return the serialized board of ``airport_id``, or None for an unknown
+    airport.
+    """
+    routes = get_routes(kind, airport_id)
+    if routes is None:
+        return None
+    if not routes:
+        return serialize([])
+    return boards_cache.get_or_set(
+        (kind, airport_id, hours),
+        lambda: serialize(find_flights(kind, routes, hours)),
+    )
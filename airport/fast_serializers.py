@@ -0,0 +1,301 @@
+"""
+Fast serialization of list responses straight from ``values_list()`` rows.
+
+``ListPlan`` reads the declared fields of a serializer once and compiles
+them into a plan: the columns to select, how each output value is built
+from a row, and which many-to-many relations are loaded separately from
+their through table. Lists are then serialized without creating model
+instances or running the DRF field machinery per row, producing the same
+data as the serializer. Serializers with fields the plan can't express
+(method fields, properties, custom ``to_representation``) are serialized
+normally.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+VALUE, NESTED, MANY = range(3)
+
+# Fields whose representation of a value of the matching model fields is the
+# value itself.
+IDENTITY_FIELDS = {
+    serializers.CharField: (models.CharField, models.TextField),
+    serializers.IntegerField: (models.IntegerField, models.AutoField),
+    serializers.ReadOnlyField: (models.Field,),
+}
+
+
+class Unsupported(Exception):
+    pass
+
+
+def datetime_converter(field):
+    """
+    Return ``field.to_representation`` with the timezone resolved once.
+
+    DRF looks the current timezone up for every value, which dominates the
+    serialization of long lists.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    zone = (
+        field.timezone
+        if hasattr(field, "timezone")
+        else field.default_timezone()
+    )
+    if (
+        output_format is None
+        or output_format.lower() != ISO_8601
+        or zone is None
+    ):
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(zone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-len("+00:00")] + "Z"
+        return value
+
+    return convert
+
+
+# Build the converter of a field for each serialization, as it may depend on
+# the request (the active timezone).
+CONVERTER_FACTORIES = {
+    serializers.DateTimeField: datetime_converter,
+}
+
+
+def resolve_model_field(model, path):
+    """Return the model field ``path`` ends at, or None for an annotation."""
+    field = None
+    for part in path:
+        if model is None:
+            raise Unsupported(path)
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            if field is None and len(path) == 1:
+                return None
+            raise Unsupported(path)
+        model = field.related_model
+    return field
+
+
+class ManyLoader:
+    """Load the representation of a many-to-many field for a page of rows."""
+
+    def __init__(self, field, model_field):
+        self.through = model_field.remote_field.through
+        self.source_column = model_field.m2m_field_name() + "_id"
+        target_name = model_field.m2m_reverse_field_name()
+        self.target = model_field.related_model
+        # Targets come in their default order, then by primary key.
+        self.ordering = [
+            f"{target_name}__{name}"
+            for name in (*self.target._meta.ordering, "pk")
+        ]
+        child = field.child_relation
+        if isinstance(child, relations.SlugRelatedField):
+            self.slug_field = child.slug_field
+        elif type(child) is relations.PrimaryKeyRelatedField:
+            if child.pk_field is not None:
+                raise Unsupported(field.field_name)
+            self.slug_field = "pk"
+        else:
+            raise Unsupported(field.field_name)
+
+        try:
+            self.target._meta.get_field(self.slug_field)
+            self.attnames = None
+            self.columns = [f"{target_name}__{self.slug_field}"]
+        except FieldDoesNotExist:
+            # A property: build the (few distinct) targets from their columns.
+            self.attnames = [
+                target_field.attname
+                for target_field in self.target._meta.concrete_fields
+            ]
+            self.columns = [
+                f"{target_name}__{attname}" for attname in self.attnames
+            ]
+
+    def load(self, ids) -> dict:
+        """Return the represented values for each source id."""
+        links = self.through.objects.filter(
+            **{f"{self.source_column}__in": ids}
+        ).order_by(*self.ordering).values_list(self.source_column, *self.columns)
+        result = {}
+        if self.attnames is None:
+            for source_id, value in links:
+                result.setdefault(source_id, []).append(value)
+            return result
+
+        values = {}
+        for source_id, *columns in links:
+            key = tuple(columns)
+            if key not in values:
+                target = self.target.from_db(None, self.attnames, columns)
+                values[key] = getattr(target, self.slug_field)
+            result.setdefault(source_id, []).append(values[key])
+        return result
+
+
+class ListPlan:
+    def __init__(self, serializer_class, fields=None, expand=frozenset()):
+        serializer = serializer_class(
+            context={"fields": fields, "expand": expand}
+        )
+        self.model = serializer.Meta.model
+        self.paths = ["pk"]
+        self.annotations = set()
+        self.loaders = []
+        self.converters = []
+        self.fields = self._compile(serializer, self.model, ())
+
+    def _column(self, path) -> int:
+        name = "__".join(path)
+        if name not in self.paths:
+            self.paths.append(name)
+        return self.paths.index(name)
+
+    def _compile(self, serializer, model, prefix) -> list:
+        if (
+            type(serializer).to_representation
+            is not serializers.Serializer.to_representation
+        ):
+            raise Unsupported(type(serializer).__name__)
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*":
+                raise Unsupported(name)
+            path = (*prefix, *field.source_attrs)
+
+            if isinstance(field, relations.ManyRelatedField):
+                if prefix:
+                    raise Unsupported(name)
+                model_field = resolve_model_field(model, path)
+                if model_field is None or not model_field.many_to_many:
+                    raise Unsupported(name)
+                self.loaders.append(ManyLoader(field, model_field))
+                plan.append((name, MANY, len(self.loaders) - 1, None, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                model_field = resolve_model_field(model, path[len(prefix):])
+                if model_field is None or not model_field.many_to_one:
+                    raise Unsupported(name)
+                plan.append(
+                    (
+                        name,
+                        NESTED,
+                        self._column(path),
+                        None,
+                        self._compile(field, model_field.related_model, path),
+                    )
+                )
+            elif isinstance(field, serializers.SerializerMethodField):
+                raise Unsupported(name)
+            elif isinstance(field, relations.RelatedField):
+                if type(field) is not relations.PrimaryKeyRelatedField:
+                    raise Unsupported(name)
+                if field.pk_field is not None:
+                    raise Unsupported(name)
+                plan.append((name, VALUE, self._column(path), None, None))
+            else:
+                model_field = resolve_model_field(model, path[len(prefix):])
+                if model_field is None:
+                    if prefix:
+                        raise Unsupported(name)
+                    self.annotations.add(path[0])
+                elif model_field.is_relation:
+                    raise Unsupported(name)
+                convert = None
+                identity = IDENTITY_FIELDS.get(type(field))
+                if not identity or not isinstance(model_field, identity):
+                    self.converters.append(field)
+                    convert = len(self.converters) - 1
+                plan.append((name, VALUE, self._column(path), convert, None))
+        return plan
+
+    def supports(self, queryset) -> bool:
+        return self.annotations <= set(queryset.query.annotations)
+
+    def rows(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.paths)
+
+    def serialize(self, rows) -> list:
+        rows = list(rows)
+        ids = [row[0] for row in rows]
+        many = [loader.load(ids) for loader in self.loaders]
+        converters = [
+            CONVERTER_FACTORIES[type(field)](field)
+            if type(field) in CONVERTER_FACTORIES
+            else field.to_representation
+            for field in self.converters
+        ]
+        return [
+            self._build(self.fields, row, many, converters) for row in rows
+        ]
+
+    def _build(self, fields, row, many, converters) -> dict:
+        data = {}
+        for name, kind, index, convert, children in fields:
+            if kind == VALUE:
+                value = row[index]
+                if value is not None and convert is not None:
+                    value = converters[convert](value)
+            elif kind == NESTED:
+                value = (
+                    None
+                    if row[index] is None
+                    else self._build(children, row, many, converters)
+                )
+            else:
+                value = many[index].get(row[0], [])
+            data[name] = value
+        return data
+
+
+_plans = {}
+
+
+def get_plan(serializer_class, fields=None, expand=frozenset()):
+    """
+    Return the compiled plan of ``serializer_class`` or None.
+
+    ``fields`` and ``expand`` are the sparse fieldset of the request, each
+    selection has its own plan.
+    """
+    key = (serializer_class, fields, expand)
+    if key not in _plans:
+        try:
+            _plans[key] = ListPlan(serializer_class, fields, expand)
+        except Unsupported:
+            _plans[key] = None
+    return _plans[key]
+
+
+class FastListMixin:
+    """Serialize the ``list`` action with the plan of its serializer."""
+
+    def list(self, request, *args, **kwargs):
+        context = self.get_serializer_context()
+        plan = settings.FAST_LIST_SERIALIZATION and get_plan(
+            self.get_serializer_class(),
+            context.get("fields"),
+            context.get("expand", frozenset()),
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        if not plan or not plan.supports(queryset):
+            return super().list(request, *args, **kwargs)
+
+        rows = plan.rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(rows))
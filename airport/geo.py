@@ -0,0 +1,196 @@
+"""
+Great-circle distances and nearest airports.
+
+Airport coordinates are kept as unit vectors: the straight (chord) distance
+between two points of the sphere grows with their great-circle distance, so
+a KD-tree over the vectors finds the nearest airports with plain
+arithmetic, and the trigonometry is only done for the airports returned.
+The tree is built on first use in each process and dropped whenever an
+airport changes, or after ``AIRPORT_NEAREST_CACHE_TTL`` seconds should an
+invalidation be missed.
+"""
+import heapq
+import math
+
+from django.conf import settings
+
+from airport.invalidation import LocalCache
+from airport.models import Airport, Route
+
+# Mean radius of the Earth, in km.
+EARTH_RADIUS = 6371.0088
+MAX_DISTANCE = math.pi * EARTH_RADIUS
+LEAF_SIZE = 8
+
+
+def unit_vector(latitude, longitude) -> tuple:
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (
+        math.cos(latitude) * math.cos(longitude),
+        math.cos(latitude) * math.sin(longitude),
+        math.sin(latitude),
+    )
+
+
+def great_circle(latitude1, longitude1, latitude2, longitude2) -> float:
+    """Return the distance in km between two points (haversine formula)."""
+    latitude1, longitude1, latitude2, longitude2 = map(
+        math.radians, (latitude1, longitude1, latitude2, longitude2)
+    )
+    haversine = (
+        math.sin((latitude2 - latitude1) / 2) ** 2
+        + math.cos(latitude1)
+        * math.cos(latitude2)
+        * math.sin((longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(haversine)))
+
+
+def chord(distance) -> float:
+    """Return the chord of the unit sphere spanning ``distance`` km."""
+    return 2 * math.sin(min(distance, MAX_DISTANCE) / EARTH_RADIUS / 2)
+
+
+def arc(chord_length) -> float:
+    """Return the distance in km spanned by a chord of the unit sphere."""
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, chord_length / 2))
+
+
+class KDTree:
+    """
+    A static KD-tree over 3D points. A node is ``(axis, split, left,
+    right)``, a leaf the list of the indexes of its points.
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self._root = self._build(list(range(len(points))))
+
+    def _build(self, indexes):
+        if len(indexes) <= LEAF_SIZE:
+            return indexes
+        axis = max(
+            range(3),
+            key=lambda axis: (
+                max(self.points[index][axis] for index in indexes)
+                - min(self.points[index][axis] for index in indexes)
+            ),
+        )
+        indexes.sort(key=lambda index: self.points[index][axis])
+        middle = len(indexes) // 2
+        return (
+            axis,
+            self.points[indexes[middle]][axis],
+            self._build(indexes[:middle]),
+            self._build(indexes[middle:]),
+        )
+
+    def nearest(self, point, limit, max_distance) -> list:
+        """
+        Return up to ``limit`` ``(distance, index)`` pairs of the points
+        nearest to ``point`` and at most ``max_distance`` from it, nearest
+        first.
+        """
+        # Max-heap of (-squared distance, index) of the best points so far.
+        best = []
+        bound = max_distance ** 2
+        # (node, squared distance from point to the node's half-space)
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, squared_offset = stack.pop()
+            if squared_offset > bound:
+                continue
+            if isinstance(node, list):
+                for index in node:
+                    x, y, z = self.points[index]
+                    squared = (
+                        (x - point[0]) ** 2
+                        + (y - point[1]) ** 2
+                        + (z - point[2]) ** 2
+                    )
+                    if squared > bound:
+                        continue
+                    if len(best) < limit:
+                        heapq.heappush(best, (-squared, index))
+                    else:
+                        heapq.heapreplace(best, (-squared, index))
+                    if len(best) == limit:
+                        bound = -best[0][0]
+                continue
+            axis, split, left, right = node
+            offset = point[axis] - split
+            near, far = (left, right) if offset < 0 else (right, left)
+            # The near side is searched first and tightens the bound.
+            stack.append((far, max(squared_offset, offset ** 2)))
+            stack.append((near, squared_offset))
+        return sorted(
+            (math.sqrt(-squared), index) for squared, index in best
+        )
+
+
+class AirportTree:
+    def __init__(self, airports):
+        """``airports`` are dicts with a ``latitude`` and a ``longitude``."""
+        self.airports = airports
+        self._tree = KDTree(
+            [
+                unit_vector(airport["latitude"], airport["longitude"])
+                for airport in airports
+            ]
+        )
+
+    def nearest(self, latitude, longitude, limit, radius) -> list:
+        """
+        Return up to ``limit`` airports at most ``radius`` km from the
+        point, nearest first, each with its ``distance`` in km.
+        """
+        return [
+            {**self.airports[index], "distance": round(arc(length), 1)}
+            for length, index in self._tree.nearest(
+                unit_vector(latitude, longitude), limit, chord(radius)
+            )
+        ]
+
+
+def build_tree() -> AirportTree:
+    return AirportTree(
+        list(
+            Airport.objects.filter(
+                latitude__isnull=False, longitude__isnull=False
+            ).values("id", "name", "closet_big_city", "latitude", "longitude")
+        )
+    )
+
+
+tree_cache = LocalCache(
+    "airport_tree", [Airport], ttl=settings.AIRPORT_NEAREST_CACHE_TTL
+)
+
+
+def nearest_airports(latitude, longitude, limit, radius) -> list:
+    return tree_cache.get_or_set("tree", build_tree).nearest(
+        latitude, longitude, limit, radius
+    )
+
+
+def route_distances():
+    """
+    Yield ``(route_id, distance, great-circle distance)`` for the routes
+    between airports with coordinates, distances rounded to whole km like
+    ``Route.distance``.
+    """
+    routes = Route.objects.filter(
+        source__latitude__isnull=False,
+        source__longitude__isnull=False,
+        destination__latitude__isnull=False,
+        destination__longitude__isnull=False,
+    ).values_list(
+        "id",
+        "distance",
+        "source__latitude",
+        "source__longitude",
+        "destination__latitude",
+        "destination__longitude",
+    )
+    for route_id, distance, *coordinates in routes.iterator(chunk_size=10000):
+        yield route_id, distance, round(great_circle(*coordinates))
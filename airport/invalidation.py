@@ -0,0 +1,311 @@
+"""
+Cross-worker invalidation of in-process caches.
+
+Every gunicorn worker keeps its own copy of cached reference data, so a write
+in one worker has to reach all the others. Saves and deletes of the watched
+models are published after commit as compact events over Postgres
+``LISTEN/NOTIFY``, and a listener thread in each worker applies them to the
+local caches. Each publisher numbers its events, so a gap (or a reconnect of
+the listener) triggers a full resync instead of serving stale data.
+"""
+import itertools
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from airport_api_service.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+SAVED = "s"
+DELETED = "d"
+# The whole table changed (bulk_create, bulk_update, raw SQL).
+RESET = "r"
+
+
+def model_label(model) -> str:
+    return model._meta.label_lower
+
+
+class InvalidationBus:
+    def __init__(self):
+        self.new_publisher()
+        self._send_lock = threading.Lock()
+        self._subscribers = []
+        self._last_seen = {}
+        self._listener = None
+
+    def new_publisher(self) -> None:
+        """Publish under a new id, numbering events from 1 again."""
+        self.publisher = uuid.uuid4().hex[:12]
+        self._seq = itertools.count(1)
+
+    def subscribe(self, models, on_change, on_resync=None) -> None:
+        """
+        Call ``on_change(label, pk, op)`` for events on ``models``
+        and ``on_resync()`` (defaults to ``on_change`` with a RESET
+        for every model) when events may have been lost. Only models
+        somebody subscribed to are watched.
+        """
+        labels = frozenset(model_label(model) for model in models)
+        self._subscribers.append((labels, on_change, on_resync))
+        self.watch(*models)
+
+    def watch(self, *models) -> None:
+        """Publish save/delete events for ``models``."""
+        for model in models:
+            post_save.connect(
+                self._on_save, sender=model, weak=False,
+                dispatch_uid=f"invalidation-save-{model_label(model)}",
+            )
+            post_delete.connect(
+                self._on_delete, sender=model, weak=False,
+                dispatch_uid=f"invalidation-delete-{model_label(model)}",
+            )
+            for field in model._meta.local_many_to_many:
+                m2m_changed.connect(
+                    self._on_m2m_changed,
+                    sender=field.remote_field.through,
+                    weak=False,
+                    dispatch_uid=(
+                        f"invalidation-m2m-{model_label(model)}-{field.name}"
+                    ),
+                )
+
+    def _on_save(self, sender, instance, using, **kwargs):
+        self.publish(sender, instance.pk, SAVED, using=using)
+
+    def _on_delete(self, sender, instance, using, **kwargs):
+        self.publish(sender, instance.pk, DELETED, using=using)
+
+    def _on_m2m_changed(
+            self, sender, instance, action, reverse, model, pk_set, using,
+            **kwargs
+    ):
+        if not action.startswith("post_"):
+            return
+        if not reverse:
+            self.publish(type(instance), instance.pk, SAVED, using=using)
+        elif pk_set:
+            for pk in pk_set:
+                self.publish(model, pk, SAVED, using=using)
+        else:
+            self.publish(model, None, RESET, using=using)
+
+    def publish(self, model, pk=None, op=SAVED, using="default") -> None:
+        """Send an event once the current transaction commits."""
+        label = model_label(model)
+        transaction.on_commit(
+            lambda: self._send(label, pk, op, using), using=using
+        )
+
+    def _send(self, label, pk, op, using) -> None:
+        connection = connections[using]
+        with self._send_lock:
+            seq = next(self._seq)
+            if connection.vendor == "postgresql":
+                payload = json.dumps(
+                    [self.publisher, seq, label, pk, op],
+                    separators=(",", ":"),
+                )
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            "SELECT pg_notify(%s, %s)",
+                            [settings.AIRPORT_INVALIDATION_CHANNEL, payload],
+                        )
+                except DatabaseError:
+                    # Peers will notice the gap in sequence numbers.
+                    logger.exception("Failed to publish invalidation event")
+        self.apply(label, pk, op)
+
+    def receive(self, payload: str) -> None:
+        """Apply an event published by another process."""
+        try:
+            publisher, seq, label, pk, op = json.loads(payload)
+        except ValueError:
+            logger.warning("Malformed invalidation event: %r", payload)
+            return
+        if publisher == self.publisher:
+            return
+
+        last_seq = self._last_seen.get(publisher)
+        self._last_seen[publisher] = seq
+        if last_seq is not None and seq != last_seq + 1:
+            logger.warning(
+                "Lost invalidation events from %s (%s -> %s), resyncing",
+                publisher, last_seq, seq,
+            )
+            self.resync()
+            return
+        self.apply(label, pk, op)
+
+    def apply(self, label, pk, op) -> None:
+        for labels, on_change, _ in self._subscribers:
+            if label in labels:
+                self._notify(on_change, label, pk, op)
+
+    def resync(self) -> None:
+        for labels, on_change, on_resync in self._subscribers:
+            if on_resync is not None:
+                self._notify(on_resync)
+            else:
+                for label in labels:
+                    self._notify(on_change, label, None, RESET)
+
+    @staticmethod
+    def _notify(callback, *args) -> None:
+        # A failing subscriber must neither starve the others nor kill the
+        # listener thread.
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception("Invalidation subscriber %r failed", callback)
+
+    def start_listener(self, using="default") -> None:
+        """Start the listener thread of this process (Postgres only)."""
+        if connections[using].vendor != "postgresql":
+            return
+        if self._listener is not None and self._listener.pid == os.getpid():
+            return
+        self._last_seen.clear()
+        self._listener = Listener(self, using)
+        self._listener.start()
+
+
+class Listener(threading.Thread):
+    """Blocks on a dedicated connection and feeds notifications to the bus."""
+
+    poll_timeout = 5
+    reconnect_delay = 1
+
+    def __init__(self, bus, using="default"):
+        super().__init__(name="invalidation-listener", daemon=True)
+        self.bus = bus
+        self.pid = os.getpid()
+        self.connection = connections[using]
+
+    def connect(self):
+        params = self.connection.get_connection_params()
+        params.pop("cursor_factory", None)
+        conn = self.connection.Database.connect(**params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(
+                'LISTEN "%s"' % settings.AIRPORT_INVALIDATION_CHANNEL
+            )
+        return conn
+
+    def run(self):
+        while True:
+            conn = None
+            try:
+                conn = self.connect()
+                # Anything published while we were not listening is gone.
+                self.bus.resync()
+                while True:
+                    if select.select([conn], [], [], self.poll_timeout) == (
+                            [], [], []
+                    ):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.bus.receive(conn.notifies.pop(0).payload)
+            except self.connection.Database.Error:
+                logger.warning(
+                    "Invalidation listener lost its connection, reconnecting",
+                    exc_info=True,
+                )
+                time.sleep(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+class LocalCache:
+    """
+    Process-local cache of data derived from ``models``. It is cleared
+    whenever one of them changes in any worker; entries also expire after
+    ``ttl`` seconds when it is given, and expired entries are dropped on
+    inserts at most once per ``ttl``.
+    """
+
+    def __init__(self, name, models, ttl=None):
+        self.name = name
+        self.ttl = ttl
+        self._data = {}
+        self._swept_at = time.monotonic()
+        bus.subscribe(models, self._on_change, self.clear)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if not self._is_fresh(entry):
+            CACHE_REQUESTS.inc(self.name, "miss")
+            return default
+        CACHE_REQUESTS.inc(self.name, "hit")
+        return entry[0]
+
+    def set(self, key, value) -> None:
+        self._sweep(self._data)
+        self._data[key] = self._entry(value)
+
+    def get_or_set(self, key, loader):
+        data = self._data
+        entry = data.get(key)
+        if self._is_fresh(entry):
+            CACHE_REQUESTS.inc(self.name, "hit")
+            return entry[0]
+        CACHE_REQUESTS.inc(self.name, "miss")
+        value = loader()
+        # Don't store a value loaded before a concurrent clear().
+        if data is self._data:
+            self._sweep(data)
+            data[key] = self._entry(value)
+        return value
+
+    def _sweep(self, data) -> None:
+        """Drop the expired entries of ``data`` if ``ttl`` passed since last."""
+        now = time.monotonic()
+        if self.ttl is None or now - self._swept_at < self.ttl:
+            return
+        self._swept_at = now
+        for key, (_, expires_at) in list(data.items()):
+            if expires_at < now:
+                data.pop(key, None)
+
+    @staticmethod
+    def _is_fresh(entry) -> bool:
+        return entry is not None and (
+            entry[1] is None or entry[1] >= time.monotonic()
+        )
+
+    def _entry(self, value):
+        if self.ttl is None:
+            return value, None
+        return value, time.monotonic() + self.ttl
+
+    def clear(self) -> None:
+        self._data = {}
+
+    def _on_change(self, label, pk, op) -> None:
+        self.clear()
+
+
+bus = InvalidationBus()
+if hasattr(os, "register_at_fork"):
+    # Workers forked from a preloaded master would share its id and drop
+    # each other's events as their own.
+    os.register_at_fork(after_in_child=bus.new_publisher)
+
+
+def start_listener(**kwargs) -> None:
+    """``request_started`` receiver: runs in the worker, not the master."""
+    bus.start_listener()
@@ -0,0 +1,268 @@
+import json
+import platform
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, F
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from airport.models import Flight
+
+SIZES = {"small": 0.2, "medium": 1, "large": 5}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class QueryRecorder:
+    """``execute_wrapper`` counting queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+
+
+class Command(BaseCommand):
+    """Benchmark the main API endpoints against seeded datasets."""
+
+    help = (
+        "Seed datasets of several sizes into a throwaway test database, "
+        "measure latency percentiles, query counts and SQL time of the "
+        "main endpoints, save them as JSON and compare with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="small,medium",
+            help=f"Comma separated {', '.join(SIZES)} or --scale factors.",
+        )
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the results to this file.")
+        parser.add_argument("--baseline", help="Compare with these results.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Allowed relative p95 slowdown before failing.",
+        )
+        parser.add_argument(
+            "--query-threshold", type=int, default=0,
+            help="Allowed extra queries per request before failing.",
+        )
+        parser.add_argument(
+            "--current-db", action="store_true",
+            help="Run against the configured database instead of a test "
+                 "database. Its airport data is replaced!",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [size.strip() for size in options["sizes"].split(",")]
+        for size in sizes:
+            if size not in SIZES:
+                try:
+                    float(size)
+                except ValueError:
+                    raise CommandError(f"Unknown size: {size}")
+
+        with self.database(options["current_db"]), self.no_throttling():
+            results = {
+                size: self.run_size(size, options) for size in sizes
+            }
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "iterations": options["iterations"],
+            },
+            "results": results,
+        }
+        self.print_results(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline:
+                regressions = self.compare(
+                    json.load(baseline)["results"],
+                    results,
+                    options["threshold"],
+                    options["query_threshold"],
+                )
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} regression(s) against the baseline"
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    @contextmanager
+    def database(self, use_current):
+        old_name = None
+        if not use_current:
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                yield
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    @contextmanager
+    def no_throttling(self):
+        with mock.patch.object(APIView, "throttle_classes", ()):
+            yield
+
+    def run_size(self, size, options):
+        scale = SIZES.get(size) or float(size)
+        call_command(
+            "seed_airport",
+            scale=scale,
+            seed=options["seed"],
+            clear=True,
+            stdout=StringIO(),
+        )
+        client = APIClient()
+        user = get_user_model().objects.annotate(
+            orders_count=Count("order")
+        ).order_by("-orders_count").first()
+        flight = Flight.objects.annotate(
+            free=F("airplane__rows") * F("airplane__seats_in_row")
+            - Count("tickets")
+        ).order_by("-free").select_related("airplane").first()
+        free_places = self.free_places(flight)
+
+        def create_order():
+            row, seat = free_places.pop()
+            return client.post(
+                reverse("airport:order-list"),
+                {"tickets": [{"row": row, "seat": seat, "flight": flight.pk}]},
+                format="json",
+            )
+
+        flights_url = reverse("airport:flight-list")
+        # Seeded flights may all have departed by now.
+        scenarios = {
+            "flights-list": lambda: client.get(
+                flights_url, {"history": "true"}
+            ),
+            "flights-list-source": lambda: client.get(
+                flights_url, {"source": "Kyiv", "history": "true"}
+            ),
+            "orders-list": lambda: client.get(reverse("airport:order-list")),
+            "orders-create": create_order,
+        }
+        authenticated = {"orders-list", "orders-create"}
+
+        results = {}
+        for name, scenario in scenarios.items():
+            client.force_authenticate(user if name in authenticated else None)
+            runs = options["warmup"] + options["iterations"]
+            if name == "orders-create":
+                runs = min(runs, len(free_places))
+            results[name] = self.measure(scenario, runs, options["warmup"])
+            self.stdout.write(f"{size}: {name} done")
+        return results
+
+    @staticmethod
+    def free_places(flight):
+        taken = set(flight.tickets.values_list("row", "seat"))
+        return [
+            (row, seat)
+            for row in range(1, flight.airplane.rows + 1)
+            for seat in range(1, flight.airplane.seats_in_row + 1)
+            if (row, seat) not in taken
+        ]
+
+    @staticmethod
+    def measure(scenario, runs, warmup):
+        timings, queries, sql_times = [], [], []
+        for run in range(runs):
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                started = time.perf_counter()
+                response = scenario()
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"Request failed with {response.status_code}: "
+                    f"{response.content[:200]!r}"
+                )
+            if run >= warmup:
+                timings.append(elapsed * 1000)
+                queries.append(recorder.count)
+                sql_times.append(recorder.time * 1000)
+        if not timings:
+            raise CommandError("Not enough runs after the warmup")
+        return {
+            "runs": len(timings),
+            "wall_ms": {
+                "mean": round(sum(timings) / len(timings), 3),
+                "p50": round(percentile(timings, 0.50), 3),
+                "p95": round(percentile(timings, 0.95), 3),
+                "p99": round(percentile(timings, 0.99), 3),
+            },
+            "queries": max(queries),
+            "sql_ms": round(sum(sql_times) / len(sql_times), 3),
+        }
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'size':<8}{'scenario':<22}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'queries':>9}{'sql ms':>10}"
+        )
+        for size, scenarios in results.items():
+            for name, result in scenarios.items():
+                wall = result["wall_ms"]
+                self.stdout.write(
+                    f"{size:<8}{name:<22}{wall['p50']:>10.2f}"
+                    f"{wall['p95']:>10.2f}{wall['p99']:>10.2f}"
+                    f"{result['queries']:>9}{result['sql_ms']:>10.2f}"
+                )
+
+    def compare(self, baseline, results, threshold, query_threshold):
+        regressions = []
+        for size, scenarios in results.items():
+            for name, result in scenarios.items():
+                before = baseline.get(size, {}).get(name)
+                if before is None:
+                    continue
+                p95, p95_before = result["wall_ms"]["p95"], before["wall_ms"]["p95"]
+                if p95 > p95_before * (1 + threshold):
+                    regressions.append(
+                        f"{size} {name}: p95 {p95_before:.2f} -> {p95:.2f} ms"
+                    )
+                if result["queries"] > before["queries"] + query_threshold:
+                    regressions.append(
+                        f"{size} {name}: queries "
+                        f"{before['queries']} -> {result['queries']}"
+                    )
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(f"REGRESSION {regression}"))
+        return regressions
@@ -0,0 +1,42 @@
+import gzip
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from airport_api_service.schema import build_schema, generate_schema
+
+
+class Command(BaseCommand):
+    """Generate, validate and store the gzipped OpenAPI schema."""
+
+    help = (
+        "Build the OpenAPI schema served at /api/doc/. With --check, only "
+        "verify that the stored schema is up to date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path", help="Where to write it (default OPENAPI_SCHEMA_PATH)."
+        )
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Fail if the stored schema differs from a fresh build.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"] or settings.OPENAPI_SCHEMA_PATH
+        if options["check"]:
+            try:
+                with gzip.open(path) as artifact:
+                    stored = artifact.read()
+            except FileNotFoundError:
+                raise CommandError(f"{path} does not exist")
+            if stored != generate_schema():
+                raise CommandError(f"{path} is out of date")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date"))
+            return
+
+        content = build_schema(path)
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {path} ({len(content)} bytes)")
+        )
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from airport.invalidation import RESET, bus
+from airport.models import Flight, Ticket
+from airport.partitions import (
+    add_months,
+    archive_partition,
+    create_partition,
+    default_months,
+    existing_partitions,
+    month_start,
+    partition_name,
+)
+
+
+class Command(BaseCommand):
+    """Create upcoming flight partitions and archive old ones."""
+
+    help = (
+        "Create the monthly flight partitions of the coming months and of "
+        "the months of flights left in the default partition (e.g. past "
+        "flights loaded after partitioning, which queries on them would "
+        "otherwise always scan), and move the partitions of old months, "
+        "with their tickets, to the archive schema. Meant to run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead", type=int, default=settings.FLIGHT_PARTITIONS_AHEAD,
+            help="Months after the current one to have partitions for.",
+        )
+        parser.add_argument(
+            "--keep", type=int, default=settings.FLIGHT_PARTITIONS_KEEP,
+            help="Months before the current one to keep (0: never archive).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only print what would be done.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Flight partitions need PostgreSQL.")
+
+        this_month = month_start(timezone.now())
+        with connection.cursor() as cursor:
+            existing = existing_partitions(cursor)
+            stray = default_months(cursor)
+        upcoming = [
+            add_months(this_month, count) for count in range(options["ahead"] + 1)
+        ]
+        missing = sorted(
+            month for month in {*upcoming, *stray} if month not in existing
+        )
+        expired = (
+            [
+                month
+                for month in sorted({*existing, *missing})
+                if month < add_months(this_month, -options["keep"])
+            ]
+            if options["keep"]
+            else []
+        )
+
+        for month in missing:
+            if not options["dry_run"]:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    create_partition(cursor, month)
+            self.stdout.write(f"Created {partition_name(month)}")
+
+        for month in expired:
+            if options["dry_run"]:
+                self.stdout.write(f"Archived {partition_name(month)}")
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                moved = archive_partition(cursor, month)
+            self.stdout.write(
+                f"Archived {partition_name(month)} ("
+                + ", ".join(f"{table}: {rows}" for table, rows in moved.items())
+                + ")"
+            )
+        if expired and not options["dry_run"]:
+            # Rows left the tables behind the back of the ORM.
+            bus.publish(Flight, None, RESET)
+            bus.publish(Ticket, None, RESET)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(missing)} partitions created, {len(expired)} archived"
+            )
+        )
@@ -0,0 +1,80 @@
+import csv
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.invalidation import RESET, bus
+from airport.models import Airport
+
+COLUMNS = ("id", "latitude", "longitude")
+
+
+class Command(BaseCommand):
+    """Set the coordinates of airports from a CSV file."""
+
+    help = (
+        "Set airport coordinates from a CSV file with an 'id,latitude,"
+        "longitude' header, '-' reading standard input. Rows are applied "
+        "in batches within one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file, or - for stdin.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["path"] == "-":
+            airports = self.read(sys.stdin)
+        else:
+            with open(options["path"], newline="", encoding="utf-8") as file:
+                airports = self.read(file)
+
+        with transaction.atomic():
+            updated = Airport.objects.bulk_update(
+                airports,
+                ["latitude", "longitude"],
+                batch_size=options["batch_size"],
+            )
+        # bulk_update() sends no signals.
+        bus.publish(Airport, None, RESET)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {updated} airports in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+        )
+        if updated < len(airports):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(airports) - updated} rows matched no airport"
+                )
+            )
+
+    def read(self, file) -> list:
+        reader = csv.DictReader(file)
+        if reader.fieldnames is None or not set(COLUMNS) <= set(
+            reader.fieldnames
+        ):
+            raise CommandError(f"Expected the columns {', '.join(COLUMNS)}.")
+
+        airports = []
+        for row in reader:
+            # An empty value clears the coordinate.
+            airport = Airport(
+                **{column: row[column] or None for column in COLUMNS}
+            )
+            try:
+                airport.clean_fields(exclude=("name", "closet_big_city"))
+            except ValidationError as error:
+                raise CommandError(
+                    f"Line {reader.line_num}: {error.message_dict}"
+                )
+            if airport.id is None:
+                raise CommandError(f"Line {reader.line_num}: no id.")
+            airports.append(airport)
+        return airports
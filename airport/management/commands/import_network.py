@@ -0,0 +1,165 @@
+import csv
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.geo import great_circle
+from airport.invalidation import RESET, bus
+from airport.models import Airport, Route
+
+# OpenFlights files have no header and write missing values as \N.
+NULL = "\\N"
+# Columns of airports.dat.
+AIRPORT_NAME, AIRPORT_CITY, IATA, ICAO, LATITUDE, LONGITUDE = 1, 2, 4, 5, 6, 7
+# Columns of routes.dat.
+ROUTE_SOURCE, ROUTE_DESTINATION = 2, 4
+NAME_LENGTH = Airport._meta.get_field("name").max_length
+
+
+def column(row, index):
+    value = row[index].strip() if index < len(row) else ""
+    return None if value in ("", NULL) else value
+
+
+class Command(BaseCommand):
+    """Upsert airports and routes from OpenFlights data files."""
+
+    help = (
+        "Import airports and routes from OpenFlights-style airports.dat and "
+        "routes.dat files. Airports are matched on their code (IATA, or "
+        "ICAO without one) and routes on their airports, so imports can be "
+        "repeated. Route distances are great-circle distances; routes of "
+        "airports without coordinates are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", help="airports.dat file.")
+        parser.add_argument("--routes", help="routes.dat file.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options["airports"] and not options["routes"]:
+            raise CommandError("Give --airports, --routes or both.")
+        self.batch_size = options["batch_size"]
+        # IATA and ICAO codes of the imported airports -> Airport.code, for
+        # routes referring to an airport by the code it isn't stored under.
+        self.aliases = {}
+
+        # bulk_create() sends no signals.
+        if options["airports"]:
+            self.step("airports", self.import_airports, options["airports"])
+            bus.publish(Airport, None, RESET)
+        if options["routes"]:
+            self.step("routes", self.import_routes, options["routes"])
+            bus.publish(Route, None, RESET)
+
+    def step(self, name, load, path):
+        started = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as file:
+            with transaction.atomic():
+                rows, saved = load(csv.reader(file))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{name:<10}{rows:>10} rows {saved:>10} saved "
+            f"{rows - saved:>8} skipped {elapsed:>8.2f}s "
+            f"{rows / max(elapsed, 1e-9):>10.0f} rows/s"
+        )
+
+    def import_airports(self, reader):
+        rows = saved = 0
+        # Keyed by code: a batch may not upsert the same row twice.
+        batch = {}
+        for row in reader:
+            rows += 1
+            iata, icao = column(row, IATA), column(row, ICAO)
+            code = iata or icao
+            if code is None:
+                continue
+            for alias in (iata, icao):
+                if alias:
+                    self.aliases[alias] = code
+            batch[code] = Airport(
+                code=code,
+                name=(column(row, AIRPORT_NAME) or code)[:NAME_LENGTH],
+                closet_big_city=(column(row, AIRPORT_CITY) or "")[:NAME_LENGTH],
+                latitude=self.coordinate(reader, row, LATITUDE, 90),
+                longitude=self.coordinate(reader, row, LONGITUDE, 180),
+            )
+            if len(batch) == self.batch_size:
+                saved += self.save_airports(batch)
+                batch = {}
+        return rows, saved + self.save_airports(batch)
+
+    @staticmethod
+    def coordinate(reader, row, index, limit):
+        value = column(row, index)
+        if value is None:
+            return None
+        try:
+            coordinate = float(value)
+        except ValueError:
+            coordinate = math.nan
+        # False for NaN too.
+        if not -limit <= coordinate <= limit:
+            raise CommandError(
+                f"Line {reader.line_num}: invalid coordinate {value!r}."
+            )
+        return coordinate
+
+    def save_airports(self, batch) -> int:
+        Airport.objects.bulk_create(
+            batch.values(),
+            update_conflicts=True,
+            unique_fields=["code"],
+            update_fields=["name", "closet_big_city", "latitude", "longitude"],
+        )
+        return len(batch)
+
+    def import_routes(self, reader):
+        airports = {
+            code: (pk, latitude, longitude)
+            for code, pk, latitude, longitude in Airport.objects.filter(
+                code__isnull=False,
+                latitude__isnull=False,
+                longitude__isnull=False,
+            ).values_list("code", "id", "latitude", "longitude")
+        }
+        rows = saved = 0
+        # The same airports are served by many airlines: one route each.
+        seen = set()
+        batch = []
+        for row in reader:
+            rows += 1
+            source, destination = (
+                airports.get(self.aliases.get(code, code))
+                for code in (
+                    column(row, ROUTE_SOURCE), column(row, ROUTE_DESTINATION)
+                )
+            )
+            if source is None or destination is None or source is destination:
+                continue
+            if (source[0], destination[0]) in seen:
+                continue
+            seen.add((source[0], destination[0]))
+            batch.append(
+                Route(
+                    source_id=source[0],
+                    destination_id=destination[0],
+                    distance=round(great_circle(*source[1:], *destination[1:])),
+                )
+            )
+            if len(batch) == self.batch_size:
+                saved += self.save_routes(batch)
+                batch = []
+        return rows, saved + self.save_routes(batch)
+
+    def save_routes(self, batch) -> int:
+        Route.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["source", "destination"],
+            update_fields=["distance"],
+        )
+        return len(batch)
@@ -0,0 +1,81 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ("dev", "test", "prod", "bench")
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "modules": len(sys.modules),
+    "middleware": len(settings.MIDDLEWARE),
+}))
+"""
+
+
+class Command(BaseCommand):
+    """Compare the cold start time of the settings profiles."""
+
+    help = (
+        "Start a fresh interpreter per settings profile and measure how long "
+        "it takes to load the settings, apps, middleware and URLconf."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles", default=",".join(PROFILES),
+            help="Comma separated DJANGO_PROFILE values.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        profiles = [name.strip() for name in options["profiles"].split(",")]
+        results = {
+            profile: self.measure(profile, options["repeat"])
+            for profile in profiles
+        }
+
+        baseline = results[profiles[0]]["seconds"]
+        self.stdout.write(
+            f"{'profile':<10}{'startup ms':>12}{'vs ' + profiles[0]:>12}"
+            f"{'modules':>10}{'middleware':>12}"
+        )
+        for profile, result in results.items():
+            self.stdout.write(
+                f"{profile:<10}{result['seconds'] * 1000:>12.1f}"
+                f"{(result['seconds'] - baseline) * 1000:>+12.1f}"
+                f"{result['modules']:>10}{result['middleware']:>12}"
+            )
+
+    def measure(self, profile, repeat) -> dict:
+        env = {**os.environ, "DJANGO_PROFILE": profile}
+        runs = []
+        for _ in range(repeat):
+            process = subprocess.run(
+                [sys.executable, "-c", STARTUP_SCRIPT],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if process.returncode:
+                raise CommandError(
+                    f"Profile {profile} failed to start:\n{process.stderr}"
+                )
+            runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+        return {
+            "seconds": statistics.median(run["seconds"] for run in runs),
+            "modules": runs[-1]["modules"],
+            "middleware": runs[-1]["middleware"],
+        }
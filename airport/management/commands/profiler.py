@@ -0,0 +1,68 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from airport_api_service.profiling import (
+    get_config,
+    get_control_path,
+    get_profiler_dir,
+    write_control,
+)
+
+
+class Command(BaseCommand):
+    """Control the sampling profiler of the running workers."""
+
+    help = (
+        "Turn the sampling profiler on or off and tune it without a "
+        "restart. Workers pick the change up within a second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=("on", "off", "status", "reset"))
+        parser.add_argument(
+            "--sample-rate", type=int,
+            help="Profile every N-th request (0 disables sampling).",
+        )
+        parser.add_argument(
+            "--slow-ms", type=float,
+            help=(
+                "Profile requests slower than this (0 disables). Every "
+                "request is then sampled, use it for short investigations."
+            ),
+        )
+        parser.add_argument(
+            "--interval-ms", type=float, help="Stack sampling interval."
+        )
+        parser.add_argument(
+            "--max-files", type=int, help="Number of profiles to keep."
+        )
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        if action == "reset":
+            try:
+                os.remove(get_control_path())
+            except FileNotFoundError:
+                pass
+        elif action != "status":
+            overrides = {"enabled": action == "on"}
+            if options["sample_rate"] is not None:
+                overrides["sample_rate"] = options["sample_rate"]
+            if options["slow_ms"] is not None:
+                overrides["slow_threshold"] = options["slow_ms"] / 1000
+            if options["interval_ms"] is not None:
+                overrides["interval"] = options["interval_ms"] / 1000
+            if options["max_files"] is not None:
+                overrides["max_files"] = options["max_files"]
+            write_control(**overrides)
+
+        directory = get_profiler_dir()
+        profiles = (
+            sum(name.endswith(".collapsed") for name in os.listdir(directory))
+            if os.path.isdir(directory)
+            else 0
+        )
+        for key, value in get_config().items():
+            self.stdout.write(f"{key}: {value}")
+        self.stdout.write(f"{profiles} profiles in {directory}")
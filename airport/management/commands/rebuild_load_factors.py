@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.analytics import rebuild
+
+
+class Command(BaseCommand):
+    """Recompute the route load factor table from flights and tickets."""
+
+    help = (
+        "Recompute every row of the route load factor table. Rows are kept "
+        "up to date as tickets and flights change; this repairs them after "
+        "writes that bypass the ORM."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {rows} rows in {time.perf_counter() - started:.2f}s"
+            )
+        )
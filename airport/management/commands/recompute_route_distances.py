@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.geo import route_distances
+from airport.invalidation import RESET, bus
+from airport.models import Route
+
+
+class Command(BaseCommand):
+    """Set route distances to the great-circle distance of their airports."""
+
+    help = (
+        "Recompute the distance of every route whose airports have "
+        "coordinates as the great-circle distance between them. With "
+        "--check, only report the routes whose distance is off by more "
+        "than --tolerance percent, failing if there are any."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Report implausible distances instead of fixing them.",
+        )
+        parser.add_argument(
+            "--tolerance", type=float, default=10,
+            help="Percent a distance may be off by with --check.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        checked = 0
+        implausible = 0
+        changed = []
+        for route_id, distance, great_circle in route_distances():
+            checked += 1
+            if distance == great_circle:
+                continue
+            changed.append(Route(id=route_id, distance=great_circle))
+            if abs(distance - great_circle) > (
+                great_circle * options["tolerance"] / 100
+            ):
+                implausible += 1
+                if options["check"]:
+                    self.stdout.write(
+                        f"Route {route_id}: {distance} km, "
+                        f"great-circle {great_circle} km"
+                    )
+        elapsed = time.perf_counter() - started
+
+        if options["check"]:
+            if implausible:
+                raise CommandError(
+                    f"{implausible} of {checked} routes are off by more "
+                    f"than {options['tolerance']:g}%"
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"{checked} routes checked in {elapsed:.2f}s")
+            )
+            return
+
+        with transaction.atomic():
+            Route.objects.bulk_update(
+                changed, ["distance"], batch_size=options["batch_size"]
+            )
+        # bulk_update() sends no signals.
+        bus.publish(Route, None, RESET)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {len(changed)} of {checked} routes in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,380 @@
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from airport.analytics import rebuild
+from airport.invalidation import RESET, bus
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    RouteDailyLoad,
+    Ticket,
+)
+
+CITIES = [
+    "Kyiv", "Lviv", "Krakow", "Warsaw", "Berlin", "Munich", "Paris", "Lyon",
+    "London", "Manchester", "Madrid", "Barcelona", "Rome", "Milan", "Vienna",
+    "Prague", "Budapest", "Amsterdam", "Brussels", "Zurich", "Geneva",
+    "Lisbon", "Porto", "Athens", "Istanbul", "Copenhagen", "Oslo",
+    "Stockholm", "Helsinki", "Riga", "Vilnius", "Tallinn", "Dublin",
+    "New York", "Chicago", "Toronto", "Dubai", "Tokyo", "Seoul", "Sydney",
+]
+AIRPLANE_MODELS = [
+    ("Airbus A320", 30, 6), ("Airbus A321", 35, 6), ("Boeing 737", 32, 6),
+    ("Boeing 787", 40, 9), ("Embraer 190", 25, 4), ("Airbus A350", 42, 9),
+]
+FIRST_NAMES = [
+    "Olena", "Taras", "Anna", "Ivan", "Maria", "Petro", "Sofia", "Andrii",
+    "Kateryna", "Mykola", "Iryna", "Oleh", "Yulia", "Dmytro", "Nataliia",
+]
+LAST_NAMES = [
+    "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko",
+    "Oliinyk", "Shevchuk", "Koval", "Polishchuk", "Bondar", "Tkachuk",
+    "Marchenko", "Rudenko", "Savchenko", "Melnyk",
+]
+DEFAULTS = {
+    "airports": 40,
+    "routes": 300,
+    "airplanes": 60,
+    "crews": 200,
+    "flights": 5000,
+    "users": 200,
+    "tickets": 100000,
+}
+SEED_EMAIL = "seed-{seed}-{index}@example.com"
+AIRPORT_MODELS = (
+    RouteDailyLoad, Ticket, Order, Flight, Route, Airplane, AirplaneType, Airport, Crew,
+)
+
+
+class Command(BaseCommand):
+    """Generate a deterministic synthetic dataset for performance work."""
+
+    help = (
+        "Generate airports, routes, airplanes, crews, flights, orders and "
+        "tickets from a fixed seed. Counts default to a small dataset and "
+        "are multiplied by --scale unless given explicitly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--scale", type=float, default=1.0)
+        for name in DEFAULTS:
+            parser.add_argument(f"--{name}", type=int)
+        parser.add_argument(
+            "--start", default="2024-01-01",
+            help="Date of the first flight (YYYY-MM-DD).",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=20000)
+        parser.add_argument(
+            "--clear", action="store_true",
+            help="Delete all airport data before seeding.",
+        )
+        parser.add_argument(
+            "--no-copy", action="store_true",
+            help="Load tickets with bulk_create even on PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.use_copy = (
+            connection.vendor == "postgresql" and not options["no_copy"]
+        )
+        counts = {
+            name: options[name]
+            if options[name] is not None
+            else max(int(default * options["scale"]), 1)
+            for name, default in DEFAULTS.items()
+        }
+        if counts["airports"] < 2:
+            raise CommandError("At least 2 airports are required.")
+        counts["routes"] = min(
+            counts["routes"], counts["airports"] * (counts["airports"] - 1)
+        )
+        start = datetime.strptime(options["start"], "%Y-%m-%d").replace(
+            tzinfo=timezone.utc
+        )
+
+        if options["clear"]:
+            self.clear()
+
+        started = time.perf_counter()
+        airports = self.step(
+            "airports", self.create_airports, counts["airports"]
+        )
+        routes = self.step(
+            "routes", self.create_routes, airports, counts["routes"]
+        )
+        airplanes = self.step(
+            "airplanes", self.create_airplanes, counts["airplanes"]
+        )
+        crews = self.step("crews", self.create_crews, counts["crews"])
+        flights = self.step(
+            "flights", self.create_flights,
+            routes, airplanes, crews, counts["flights"], start, options["days"],
+        )
+        users = self.step(
+            "users", self.create_users, options["seed"], counts["users"]
+        )
+        self.step(
+            "tickets", self.create_tickets, flights, users, counts["tickets"]
+        )
+        self.step("loads", lambda: (None, rebuild()))
+
+        for model in AIRPORT_MODELS:
+            bus.publish(model, None, RESET)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded in {time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    def step(self, name, create, *args):
+        started = time.perf_counter()
+        with transaction.atomic():
+            result, rows = create(*args)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{name:<10}{rows:>12} rows {elapsed:>8.2f}s "
+            f"{rows / max(elapsed, 1e-9):>12.0f} rows/s"
+        )
+        return result
+
+    def clear(self) -> None:
+        if connection.vendor == "postgresql":
+            tables = ", ".join(
+                model._meta.db_table for model in AIRPORT_MODELS
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+        else:
+            for model in AIRPORT_MODELS:
+                model.objects.all().delete()
+        get_user_model().objects.filter(
+            email__startswith="seed-", email__endswith="@example.com"
+        ).delete()
+
+    def bulk_create(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def create_airports(self, count):
+        airports = []
+        for i in range(count):
+            number, city = divmod(i, len(CITIES))
+            airports.append(
+                Airport(
+                    name=f"{CITIES[city]} Airport {number + 1}",
+                    closet_big_city=CITIES[city],
+                )
+            )
+        airports = self.bulk_create(Airport, airports)
+        return [airport.pk for airport in airports], count
+
+    def create_routes(self, airports, count):
+        others = len(airports) - 1
+        routes = []
+        for pair in self.rng.sample(range(len(airports) * others), count):
+            source, destination = divmod(pair, others)
+            if destination >= source:
+                destination += 1
+            routes.append(
+                Route(
+                    source_id=airports[source],
+                    destination_id=airports[destination],
+                    distance=self.rng.randint(200, 9000),
+                )
+            )
+        routes = self.bulk_create(Route, routes)
+        return [(route.pk, route.distance) for route in routes], count
+
+    def create_airplanes(self, count):
+        types = self.bulk_create(
+            AirplaneType,
+            [AirplaneType(name=name) for name, _, _ in AIRPLANE_MODELS],
+        )
+        airplanes = []
+        for i in range(count):
+            index = self.rng.randrange(len(AIRPLANE_MODELS))
+            name, rows, seats_in_row = AIRPLANE_MODELS[index]
+            airplanes.append(
+                Airplane(
+                    name=f"{name} #{i + 1}",
+                    rows=rows,
+                    seats_in_row=seats_in_row,
+                    airplane_type_id=types[index].pk,
+                )
+            )
+        airplanes = self.bulk_create(Airplane, airplanes)
+        return [
+            (airplane.pk, airplane.rows, airplane.seats_in_row)
+            for airplane in airplanes
+        ], count + len(types)
+
+    def create_crews(self, count):
+        crews = self.bulk_create(
+            Crew,
+            [
+                Crew(
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                )
+                for _ in range(count)
+            ],
+        )
+        return [crew.pk for crew in crews], count
+
+    def create_flights(self, routes, airplanes, crews, count, start, days):
+        flights = []
+        for _ in range(count):
+            route_id, distance = self.rng.choice(routes)
+            airplane = self.rng.choice(airplanes)
+            departure_time = start + timedelta(
+                days=self.rng.randrange(days),
+                minutes=self.rng.randrange(0, 24 * 60, 5),
+            )
+            flights.append(
+                Flight(
+                    route_id=route_id,
+                    airplane_id=airplane[0],
+                    departure_time=departure_time,
+                    arrival_time=departure_time + timedelta(
+                        minutes=30 + distance * 60 // 800
+                    ),
+                )
+            )
+        flights = self.bulk_create(Flight, flights)
+
+        through = Flight.crews.through
+        links = [
+            through(flight_id=flight.pk, crew_id=crew_id)
+            for flight in flights
+            for crew_id in self.rng.sample(crews, min(len(crews), 3))
+        ]
+        self.bulk_create(through, links)
+
+        capacity = {airplane[0]: airplane[1:] for airplane in airplanes}
+        return [
+            (flight.pk, *capacity[flight.airplane_id]) for flight in flights
+        ], count + len(links)
+
+    def create_users(self, seed, count):
+        User = get_user_model()
+        emails = [SEED_EMAIL.format(seed=seed, index=i) for i in range(count)]
+        existing = set(
+            User.objects.filter(email__in=emails).values_list(
+                "email", flat=True
+            )
+        )
+        User.objects.bulk_create(
+            [
+                # "!" marks an unusable password.
+                User(email=email, password="!")
+                for email in emails
+                if email not in existing
+            ],
+            batch_size=self.batch_size,
+        )
+        users = dict(
+            User.objects.filter(email__in=emails).values_list("email", "pk")
+        )
+        return [users[email] for email in emails], count - len(existing)
+
+    def create_tickets(self, flights, users, count):
+        """
+        Spread ``count`` tickets over the flights with a random load factor
+        per flight, never above capacity, in orders of one to four seats.
+        """
+        capacities = [rows * seats for _, rows, seats in flights]
+        count = min(count, sum(capacities))
+        weights = [
+            capacity * self.rng.uniform(0.5, 1.0) for capacity in capacities
+        ]
+        total_weight = sum(weights)
+        sold = [
+            min(capacity, int(count * weight / total_weight))
+            for capacity, weight in zip(capacities, weights)
+        ]
+        remaining = count - sum(sold)
+        for index, capacity in enumerate(capacities):
+            if not remaining:
+                break
+            extra = min(capacity - sold[index], remaining)
+            sold[index] += extra
+            remaining -= extra
+
+        batch, batch_tickets, orders = [], 0, 0
+        for (flight_id, _, seats_in_row), capacity, flight_sold in zip(
+                flights, capacities, sold
+        ):
+            places = self.rng.sample(range(capacity), flight_sold)
+            while places:
+                size = min(len(places), self.rng.randint(1, 4))
+                batch.append(
+                    (
+                        flight_id,
+                        seats_in_row,
+                        self.rng.choice(users),
+                        [places.pop() for _ in range(size)],
+                    )
+                )
+                batch_tickets += size
+            if batch_tickets >= self.batch_size:
+                orders += self.write_orders(batch)
+                batch, batch_tickets = [], 0
+        orders += self.write_orders(batch)
+        return None, count + orders
+
+    def write_orders(self, batch):
+        """Create one order per entry of ``batch`` and insert its tickets."""
+        if not batch:
+            return 0
+        orders = self.bulk_create(
+            Order, [Order(user_id=user_id) for _, _, user_id, _ in batch]
+        )
+        tickets = [
+            (*divmod(place, seats_in_row), flight_id, order.pk)
+            for order, (flight_id, seats_in_row, _, places) in zip(orders, batch)
+            for place in places
+        ]
+        if self.use_copy:
+            self.copy_tickets(tickets)
+        else:
+            self.bulk_create(
+                Ticket,
+                [
+                    Ticket(
+                        row=row + 1,
+                        seat=seat + 1,
+                        flight_id=flight_id,
+                        order_id=order_id,
+                    )
+                    for row, seat, flight_id, order_id in tickets
+                ],
+            )
+        return len(orders)
+
+    def copy_tickets(self, tickets) -> None:
+        buffer = io.StringIO(
+            "".join(
+                f"{row + 1}\t{seat + 1}\t{flight_id}\t{order_id}\n"
+                for row, seat, flight_id, order_id in tickets
+            )
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Ticket._meta.db_table} (row, seat, flight_id, order_id) "
+                "FROM STDIN",
+                buffer,
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-19 10:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0005_crew_image_alter_flight_crews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekdays', models.CharField(max_length=7)),
+                ('departure_time', models.TimeField()),
+                ('duration', models.DurationField()),
+                ('valid_from', models.DateField()),
+                ('valid_until', models.DateField()),
+                ('airplane', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='airport.airplane')),
+                ('crews', models.ManyToManyField(blank=True, related_name='schedules', to='airport.crew')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='airport.route')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='flight',
+            name='schedule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='flights', to='airport.flightschedule'),
+        ),
+    ]
@@ -0,0 +1,172 @@
+"""
+Partition the flight table by month of departure (PostgreSQL only).
+
+PostgreSQL can't enforce a unique ``id`` on a partitioned table, whose keys
+must include the partition column, nor point a foreign key at it. Flight
+ids are therefore also kept in ``airport_flight_ids``, filled by a trigger
+on the flight table: its primary key rejects a duplicate id, and the
+foreign keys of tickets and crew links, dropped along with the old table,
+are recreated against it. Django's state is left as it was.
+
+The DDL is written out here rather than taken from ``airport.partitions``,
+so the migration keeps doing what it did when the module changes.
+"""
+from datetime import date, datetime, timezone
+
+from django.db import migrations
+
+TABLE = "airport_flight"
+OLD_TABLE = "airport_flight_unpartitioned"
+DEFAULT_PARTITION = "airport_flight_default"
+FLIGHT_IDS = "airport_flight_ids"
+# Months after the current one given a partition; `manage.py
+# flight_partitions` creates the later ones.
+PARTITIONS_AHEAD = 3
+FLIGHT_COLUMNS = (
+    ("route_id", "airport_route"),
+    ("airplane_id", "airport_airplane"),
+    ("schedule_id", "airport_flightschedule"),
+)
+FLIGHT_REFERENCES = ("airport_ticket", "airport_flight_crews")
+
+
+def add_months(month, count) -> date:
+    year, index = divmod(month.year * 12 + month.month - 1 + count, 12)
+    return date(year, index + 1, 1)
+
+
+def add_flight_keys(cursor) -> None:
+    """Number ``TABLE`` from a sequence and add its indexes and keys."""
+    cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    cursor.execute(
+        f"ALTER TABLE {TABLE} "
+        f"ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')"
+    )
+    cursor.execute(
+        f"SELECT setval('{TABLE}_id_seq', coalesce(max(id), 0) + 1, false) "
+        f"FROM {TABLE}"
+    )
+    for column, target in FLIGHT_COLUMNS:
+        cursor.execute(f"CREATE INDEX {TABLE}_{column} ON {TABLE} ({column})")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_{column}_fk "
+            f"FOREIGN KEY ({column}) REFERENCES {target} (id) "
+            "DEFERRABLE INITIALLY DEFERRED"
+        )
+
+
+def reference_flights(cursor, target) -> None:
+    for table in FLIGHT_REFERENCES:
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_flight_id_fk "
+            f"FOREIGN KEY (flight_id) REFERENCES {target} (id) "
+            "DEFERRABLE INITIALLY DEFERRED"
+        )
+
+
+def partition_flights(apps, schema_editor):
+    """Rebuild the flight table partitioned by month of departure."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {OLD_TABLE}) "
+            "PARTITION BY RANGE (departure_time)"
+        )
+
+        cursor.execute(
+            "SELECT DISTINCT date_trunc('month', departure_time, 'UTC') "
+            f"FROM {OLD_TABLE}"
+        )
+        months = {date(row[0].year, row[0].month, 1) for row in cursor}
+        now = datetime.now(timezone.utc)
+        months.update(
+            add_months(date(now.year, now.month, 1), count)
+            for count in range(PARTITIONS_AHEAD + 1)
+        )
+        for month in sorted(months):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_{month:%Y_%m} PARTITION OF {TABLE} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [
+                    datetime(day.year, day.month, 1, tzinfo=timezone.utc)
+                    for day in (month, add_months(month, 1))
+                ],
+            )
+        cursor.execute(
+            f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"
+        )
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+        # Also drops the foreign keys of tickets and crew links on flights,
+        # recreated against FLIGHT_IDS below.
+        cursor.execute(f"DROP TABLE {OLD_TABLE} CASCADE")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, departure_time)"
+        )
+        add_flight_keys(cursor)
+
+        cursor.execute(f"CREATE TABLE {FLIGHT_IDS} (id bigint PRIMARY KEY)")
+        cursor.execute(f"INSERT INTO {FLIGHT_IDS} SELECT id FROM {TABLE}")
+        # Moving a flight to another partition runs as a delete and an
+        # insert, each firing its trigger.
+        cursor.execute(
+            f"CREATE FUNCTION {FLIGHT_IDS}_sync() RETURNS trigger "
+            "LANGUAGE plpgsql AS $$ BEGIN "
+            "IF TG_OP = 'TRUNCATE' THEN "
+            f"DELETE FROM {FLIGHT_IDS}; "
+            "ELSIF TG_OP IN ('DELETE', 'UPDATE') THEN "
+            f"DELETE FROM {FLIGHT_IDS} WHERE id = OLD.id; "
+            "END IF; "
+            "IF TG_OP IN ('INSERT', 'UPDATE') THEN "
+            f"INSERT INTO {FLIGHT_IDS} (id) VALUES (NEW.id); "
+            "END IF; "
+            "RETURN NULL; END $$"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {FLIGHT_IDS}_sync "
+            f"AFTER INSERT OR DELETE OR UPDATE OF id ON {TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {FLIGHT_IDS}_sync()"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {FLIGHT_IDS}_truncate AFTER TRUNCATE ON {TABLE} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {FLIGHT_IDS}_sync()"
+        )
+        reference_flights(cursor, FLIGHT_IDS)
+
+
+def unpartition_flights(apps, schema_editor):
+    """
+    Rebuild the plain flight table. Partitions already archived by
+    ``flight_partitions`` stay in the archive schema.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        cursor.execute(f"CREATE TABLE {TABLE} (LIKE {OLD_TABLE})")
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+        # Drops the partitions, the trigger and the sequence with the table,
+        # and the foreign keys of tickets and crew links with FLIGHT_IDS.
+        cursor.execute(f"DROP TABLE {OLD_TABLE} CASCADE")
+        cursor.execute(f"DROP TABLE {FLIGHT_IDS} CASCADE")
+        cursor.execute(f"DROP FUNCTION {FLIGHT_IDS}_sync()")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id)")
+        add_flight_keys(cursor)
+        reference_flights(cursor, TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0006_flightschedule"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            partition_flights, unpartition_flights, elidable=False
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.9 on 2026-10-19 11:01
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def fill_loads(apps, schema_editor):
+    # Written out rather than taken from airport.analytics, which works on
+    # the current models.
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    RouteDailyLoad = apps.get_model("airport", "RouteDailyLoad")
+    totals = {}
+    for route_id, day, airplane_type_id, flights, seats in (
+        Flight.objects.annotate(day=TruncDate("departure_time"))
+        .values_list("route_id", "day", "airplane__airplane_type_id")
+        .annotate(
+            flights=Count("id"),
+            seats=Sum(F("airplane__rows") * F("airplane__seats_in_row")),
+        )
+        .order_by()
+    ):
+        totals[route_id, day, airplane_type_id] = {
+            "flights": flights, "seats": seats, "sold": 0
+        }
+    for route_id, day, airplane_type_id, sold in (
+        Ticket.objects.annotate(day=TruncDate("flight__departure_time"))
+        .values_list(
+            "flight__route_id", "day", "flight__airplane__airplane_type_id"
+        )
+        .annotate(sold=Count("id"))
+        .order_by()
+    ):
+        totals[route_id, day, airplane_type_id]["sold"] = sold
+    RouteDailyLoad.objects.bulk_create(
+        (
+            RouteDailyLoad(
+                route_id=route_id,
+                day=day,
+                airplane_type_id=airplane_type_id,
+                **counts,
+            )
+            for (route_id, day, airplane_type_id), counts in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0007_partition_flights'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteDailyLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('flights', models.PositiveIntegerField(default=0)),
+                ('seats', models.PositiveIntegerField(default=0)),
+                ('sold', models.PositiveIntegerField(default=0)),
+                ('airplane_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_loads', to='airport.airplanetype')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_loads', to='airport.route')),
+            ],
+            options={
+                'ordering': ['route', 'day', 'airplane_type'],
+                'unique_together': {('route', 'day', 'airplane_type')},
+            },
+        ),
+        migrations.RunPython(fill_loads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0008_routedailyload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['route', 'departure_time'], name='flight_route_departure_idx'),
+        ),
+    ]
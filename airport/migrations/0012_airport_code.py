@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0011_airport_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airport',
+            name='code',
+            field=models.CharField(blank=True, max_length=4, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+"""
+Index airport cities for the admin's prefix searches (PostgreSQL only).
+
+``^`` search fields run ``UPPER(col::text) LIKE UPPER('x%')``, which a plain
+btree index can't serve; this expression index with ``text_pattern_ops``
+can. Routes, flights and their admin searches reach the airports through it.
+"""
+from django.db import migrations
+
+INDEX = "airport_airport_city_search_idx"
+
+
+def add_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX {INDEX} ON airport_airport "
+        "(UPPER(closet_big_city::text) text_pattern_ops)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX {INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0012_airport_code"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, drop_index, elidable=False),
+    ]
@@ -3,6 +3,7 @@ import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils.text import slugify
 
@@ -28,8 +29,20 @@ class Crew(models.Model):
 
 
 class Airport(models.Model):
+    # IATA code, or ICAO code for airports without one.
+    code = models.CharField(max_length=4, unique=True, null=True, blank=True)
     name = models.CharField(max_length=69)
     closet_big_city = models.CharField(max_length=69)
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
 
     def __str__(self) -> str:
         return self.name
@@ -76,6 +89,65 @@ class Airplane(models.Model):
         return f"{self.name} - {self.airplane_type.name}"
 
 
+class FlightSchedule(models.Model):
+    """Weekly pattern of flights, expanded into ``Flight`` rows."""
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="schedules"
+    )
+    airplane = models.ForeignKey(
+        Airplane,
+        on_delete=models.CASCADE,
+        related_name="schedules"
+    )
+    # ISO weekdays the flight operates on, "135" for Mon, Wed and Fri.
+    weekdays = models.CharField(max_length=7)
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    crews = models.ManyToManyField(Crew, related_name="schedules", blank=True)
+
+    @staticmethod
+    def validate_schedule(
+            weekdays, duration, valid_from, valid_until, error_to_raise
+    ):
+        if (
+            not weekdays
+            or not set(weekdays) <= set("1234567")
+            or len(set(weekdays)) != len(weekdays)
+        ):
+            raise error_to_raise(
+                {
+                    "weekdays": "Distinct ISO weekdays from 1 (Monday) "
+                                "to 7 (Sunday) are expected, e.g. 135."
+                }
+            )
+        if duration.total_seconds() <= 0:
+            raise error_to_raise({"duration": "Must be positive."})
+        if valid_until < valid_from:
+            raise error_to_raise(
+                {"valid_until": "Must not be before valid_from."}
+            )
+
+    def clean(self):
+        FlightSchedule.validate_schedule(
+            self.weekdays,
+            self.duration,
+            self.valid_from,
+            self.valid_until,
+            ValidationError,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.route_id}: {self.weekdays} at {self.departure_time} "
+            f"({self.valid_from} - {self.valid_until})"
+        )
+
+
 class Flight(models.Model):
     route = models.ForeignKey(
         Route,
@@ -90,10 +162,29 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField(Crew, related_name="flights", blank=True)
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights"
+    )
 
     def __str__(self) -> str:
         return f"{self.route} ({self.departure_time} - {self.arrival_time})"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["route", "departure_time"],
+                name="flight_route_departure_idx",
+            ),
+            models.Index(
+                fields=["route", "arrival_time"],
+                name="flight_route_arrival_idx",
+            ),
+        ]
+
 
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -163,3 +254,35 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("flight", "row", "seat")
         ordering = ["row", "seat"]
+
+
+class RouteDailyLoad(models.Model):
+    """
+    Flights, seats and sold tickets of a route per day of departure and
+    airplane type, kept up to date by ``airport.analytics``.
+    """
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="daily_loads"
+    )
+    day = models.DateField()
+    airplane_type = models.ForeignKey(
+        AirplaneType,
+        on_delete=models.CASCADE,
+        related_name="daily_loads"
+    )
+    flights = models.PositiveIntegerField(default=0)
+    seats = models.PositiveIntegerField(default=0)
+    sold = models.PositiveIntegerField(default=0)
+
+    @property
+    def load_factor(self) -> float:
+        return self.sold / self.seats if self.seats else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.route_id} {self.day} ({self.sold}/{self.seats})"
+
+    class Meta:
+        unique_together = ("route", "day", "airplane_type")
+        ordering = ["route", "day", "airplane_type"]
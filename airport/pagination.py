@@ -0,0 +1,127 @@
+"""
+Pagination that doesn't count large tables.
+
+On PostgreSQL ``COUNT(*)`` reads every matching row. Results of at least
+``ESTIMATED_COUNT_THRESHOLD`` rows get the planner's estimate instead: the
+table statistics for an unfiltered queryset, the ``EXPLAIN`` row estimate
+of a filtered one. A filtered queryset is first counted up to the
+threshold, so small results (a user's orders) stay exact and cost a single
+query. Other databases are always counted exactly.
+"""
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+def estimate_count(queryset):
+    """Return the planner's row estimate of ``queryset``, or None."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+            # -1 until the table is first analyzed.
+            if row is None or row[0] < 0:
+                return None
+            return int(row[0])
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedPage(Page):
+    def has_next(self):
+        if self.paginator.count_is_exact:
+            return super().has_next()
+        # The estimate may end before the rows do.
+        return len(self.object_list) == self.paginator.per_page
+
+
+class EstimatedCountPaginator(Paginator):
+    """``Paginator`` whose ``count`` may be the planner's estimate."""
+
+    count_is_exact = True
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+        queryset = self.object_list.order_by()
+
+        if queryset.query.where or queryset.query.distinct:
+            # Reads at most ``threshold`` rows.
+            bounded = queryset[:threshold].count()
+            if bounded < threshold:
+                return bounded
+            estimate = estimate_count(queryset)
+            if estimate is None:
+                return queryset.count()
+            self.count_is_exact = False
+            return max(estimate, threshold)
+
+        estimate = estimate_count(queryset)
+        if estimate is None or estimate < threshold:
+            return queryset.count()
+        self.count_is_exact = False
+        return estimate
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            number = int(number)
+            # An estimate may fall short of the real count.
+            if self.count_is_exact or number < 1:
+                raise
+            return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_is_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self
+        )
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedPage(*args, **kwargs)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page number pagination telling whether ``count`` is exact."""
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "count_is_exact": self.page.paginator.count_is_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_exact"] = {
+            "type": "boolean",
+            "example": True,
+        }
+        response_schema["required"].append("count_is_exact")
+        return response_schema
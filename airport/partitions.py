@@ -0,0 +1,129 @@
+"""
+Monthly partitions of the flight table on PostgreSQL.
+
+Migration 0007 turns ``airport_flight`` into a table partitioned by range
+of ``departure_time``, one partition per month plus a default one, so that
+queries on upcoming flights only touch the partitions they can match.
+``manage.py flight_partitions`` creates partitions ahead of time, gives
+the months of flights left in the default partition (past flights loaded
+after the migration, say) their own, and moves old ones, together with the
+tickets and crew links of their flights, to the ``archive`` schema.
+
+PostgreSQL can only reference a partitioned table through a key that
+includes the partition column, so a trigger keeps the flight ids in
+``airport_flight_ids``. Its primary key keeps ids unique and the foreign
+keys of tickets and crew links point at it; Django's migration state still
+has them on ``airport_flight``. Statements bypassing the trigger, like
+moving rows into a detached table, update ``airport_flight_ids`` themselves.
+"""
+import re
+from datetime import date, datetime, timezone
+
+from airport.models import Flight, Ticket
+
+ARCHIVE_SCHEMA = "archive"
+DEFAULT_PARTITION = f"{Flight._meta.db_table}_default"
+FLIGHT_IDS = f"{Flight._meta.db_table}_ids"
+PARTITION_NAME = re.compile(
+    rf"^{Flight._meta.db_table}_(?P<year>\d{{4}})_(?P<month>\d{{2}})$"
+)
+
+
+def month_start(moment) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month, count) -> date:
+    year, index = divmod(month.year * 12 + month.month - 1 + count, 12)
+    return date(year, index + 1, 1)
+
+
+def partition_name(month) -> str:
+    return f"{Flight._meta.db_table}_{month:%Y_%m}"
+
+
+def bounds(month) -> tuple:
+    """The UTC ``[start, end)`` range of departures in ``month``."""
+    return tuple(
+        datetime(day.year, day.month, 1, tzinfo=timezone.utc)
+        for day in (month, add_months(month, 1))
+    )
+
+
+def existing_partitions(cursor) -> list:
+    """Return the months that have a partition, in order."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = %s::regclass",
+        [Flight._meta.db_table],
+    )
+    months = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match["year"]), int(match["month"]), 1))
+    return sorted(months)
+
+
+def default_months(cursor) -> list:
+    """Return the months of the flights in the default partition, in order."""
+    cursor.execute(
+        "SELECT DISTINCT date_trunc('month', departure_time, 'UTC') "
+        f"FROM {DEFAULT_PARTITION}"
+    )
+    return sorted(month_start(row[0]) for row in cursor.fetchall())
+
+
+def create_partition(cursor, month) -> None:
+    """
+    Attach a partition for ``month``, moving the flights of that month
+    out of the default partition first.
+    """
+    table = Flight._meta.db_table
+    name = partition_name(month)
+    start, end = bounds(month)
+    cursor.execute(f"CREATE TABLE {name} (LIKE {table})")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        "WHERE departure_time >= %s AND departure_time < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        [start, end],
+    )
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+    # The delete from the default partition dropped their ids, the insert
+    # into the detached table didn't add them back.
+    cursor.execute(f"INSERT INTO {FLIGHT_IDS} SELECT id FROM {name}")
+
+
+def archive_partition(cursor, month) -> dict:
+    """
+    Detach the partition of ``month`` and move it, the tickets and the crew
+    links of its flights to the archive schema. Return the rows moved.
+    """
+    name = partition_name(month)
+    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+    cursor.execute(f"ALTER TABLE {Flight._meta.db_table} DETACH PARTITION {name}")
+
+    moved = {}
+    for model in (Ticket, Flight.crews.through):
+        table = model._meta.db_table
+        cursor.execute(
+            f"CREATE TABLE {ARCHIVE_SCHEMA}.{table}_{month:%Y_%m} AS "
+            f"SELECT * FROM {table} WHERE flight_id IN (SELECT id FROM {name})"
+        )
+        moved[table] = cursor.rowcount
+        cursor.execute(
+            f"DELETE FROM {table} WHERE flight_id IN (SELECT id FROM {name})"
+        )
+    cursor.execute(
+        f"DELETE FROM {FLIGHT_IDS} WHERE id IN (SELECT id FROM {name})"
+    )
+    cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+    cursor.execute(f"SELECT count(*) FROM {ARCHIVE_SCHEMA}.{name}")
+    moved[Flight._meta.db_table] = cursor.fetchone()[0]
+    return moved
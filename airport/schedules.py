@@ -0,0 +1,162 @@
+"""
+Expansion of flight schedules into flights.
+
+``generate_flights`` computes every flight in the window of a schedule and
+checks them, in memory, against each other and against the flights the
+airplane and the crew roster already have. Only when nothing overlaps are
+they written: one ``bulk_create`` for the flights and one for their crew
+links. Flights generated before are skipped, so a schedule can be extended
+and generated again.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from airport.analytics import load_key, refresh
+from airport.invalidation import RESET, bus
+from airport.models import Airplane, Crew, Flight
+
+MAX_REPORTED_CONFLICTS = 20
+
+
+def expand(schedule) -> list:
+    """Return the ``(departure, arrival)`` of every flight of ``schedule``."""
+    weekdays = {int(day) for day in schedule.weekdays}
+    zone = timezone.get_default_timezone()
+    slots = []
+    day = schedule.valid_from
+    while day <= schedule.valid_until:
+        if day.isoweekday() in weekdays:
+            departure = datetime.combine(
+                day, schedule.departure_time, tzinfo=zone
+            )
+            slots.append((departure, departure + schedule.duration))
+        day += timedelta(days=1)
+    return slots
+
+
+def find_overlaps(intervals) -> list:
+    """
+    Return overlapping pairs of ``(start, end, is_new, label)`` intervals
+    that involve at least one new interval.
+    """
+    overlaps = []
+    # The interval seen so far that ends last.
+    latest = None
+    for interval in sorted(intervals):
+        if latest is not None and interval[0] < latest[1] and (
+            interval[2] or latest[2]
+        ):
+            overlaps.append((latest[3], interval[3]))
+        if latest is None or interval[1] > latest[1]:
+            latest = interval
+    return overlaps
+
+
+def describe(departure) -> str:
+    return f"new flight at {departure:%Y-%m-%d %H:%M}"
+
+
+def find_conflicts(schedule, slots, crew_ids) -> list:
+    start = slots[0][0]
+    end = max(arrival for _, arrival in slots)
+    new = [
+        (departure, arrival, True, describe(departure))
+        for departure, arrival in slots
+    ]
+    conflicts = []
+
+    busy = Flight.objects.filter(
+        airplane_id=schedule.airplane_id,
+        departure_time__lt=end,
+        arrival_time__gt=start,
+    ).values_list("id", "departure_time", "arrival_time")
+    conflicts += [
+        f"Airplane {schedule.airplane_id}: {first} overlaps {second}"
+        for first, second in find_overlaps(
+            new + [
+                (departure, arrival, False, f"flight {flight_id}")
+                for flight_id, departure, arrival in busy
+            ]
+        )
+    ]
+
+    crew_flights = {crew_id: [] for crew_id in crew_ids}
+    for crew_id, flight_id, departure, arrival in (
+        Flight.crews.through.objects.filter(
+            crew_id__in=crew_ids,
+            flight__departure_time__lt=end,
+            flight__arrival_time__gt=start,
+        ).values_list(
+            "crew_id",
+            "flight_id",
+            "flight__departure_time",
+            "flight__arrival_time",
+        )
+    ):
+        crew_flights[crew_id].append(
+            (departure, arrival, False, f"flight {flight_id}")
+        )
+    for crew_id, busy in crew_flights.items():
+        conflicts += [
+            f"Crew {crew_id}: {first} overlaps {second}"
+            for first, second in find_overlaps(new + busy)
+        ]
+    return conflicts
+
+
+def generate_flights(schedule) -> dict:
+    """Create the missing flights of ``schedule``, all or none of them."""
+    slots = expand(schedule)
+    with transaction.atomic():
+        # Concurrent generations for the same airplane or crew queue here.
+        airplane_type_id = (
+            Airplane.objects.select_for_update()
+            .filter(pk=schedule.airplane_id)
+            .values_list("airplane_type_id", flat=True)
+            .get()
+        )
+        crew_ids = list(
+            Crew.objects.select_for_update().filter(
+                schedules=schedule
+            ).order_by("pk").values_list("pk", flat=True)
+        )
+        generated = set(
+            schedule.flights.values_list("departure_time", flat=True)
+        )
+        new_slots = [slot for slot in slots if slot[0] not in generated]
+        skipped = len(slots) - len(new_slots)
+        if not new_slots:
+            return {"created": 0, "skipped": skipped}
+
+        conflicts = find_conflicts(schedule, new_slots, crew_ids)
+        if conflicts:
+            raise ValidationError(
+                {"conflicts": conflicts[:MAX_REPORTED_CONFLICTS]}
+            )
+
+        flights = Flight.objects.bulk_create(
+            Flight(
+                route_id=schedule.route_id,
+                airplane_id=schedule.airplane_id,
+                departure_time=departure,
+                arrival_time=arrival,
+                schedule=schedule,
+            )
+            for departure, arrival in new_slots
+        )
+        through = Flight.crews.through
+        through.objects.bulk_create(
+            through(flight_id=flight.pk, crew_id=crew_id)
+            for flight in flights
+            for crew_id in crew_ids
+        )
+        # bulk_create sends no signals.
+        refresh(
+            load_key(schedule.route_id, departure, airplane_type_id)
+            for departure, _ in new_slots
+        )
+        bus.publish(Flight, None, RESET)
+    return {"created": len(flights), "skipped": skipped}
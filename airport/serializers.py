@@ -1,4 +1,9 @@
-from django.db import transaction
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -11,7 +16,17 @@ from airport.models import (
     Ticket,
     Order,
     Flight,
+    FlightSchedule,
+    RouteDailyLoad,
 )
+from airport.analytics import count_sold
+from airport.autocomplete import MAX_RESULTS
+from airport.geo import MAX_DISTANCE
+from airport.sparse_fields import SparseFieldsMixin
+from airport_api_service.metrics import BOOKING_CONFLICTS
+
+FLIGHT_CALENDAR_DEFAULT_DAYS = 31
+FLIGHT_CALENDAR_MAX_DAYS = 92
 
 
 class CrewImageSerializer(serializers.ModelSerializer):
@@ -20,19 +35,72 @@ class CrewImageSerializer(serializers.ModelSerializer):
         fields = ("id", "image")
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Crew
         fields = ("id", "first_name", "last_name", "image")
 
 
-class AirportSerializer(serializers.ModelSerializer):
+class AirportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Airport
-        fields = ("id", "name", "closet_big_city")
+        fields = (
+            "id", "code", "name", "closet_big_city", "latitude", "longitude"
+        )
+
+
+class NearestAirportQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(
+        min_value=0, max_value=MAX_DISTANCE, default=200,
+        help_text="Distance in km.",
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class NearestAirportSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    closet_big_city = serializers.CharField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    distance = serializers.FloatField()
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_RESULTS, default=10
+    )
+
+
+class AirportSuggestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    closet_big_city = serializers.CharField()
+    routes = serializers.IntegerField()
+
+
+class BoardQuerySerializer(serializers.Serializer):
+    hours = serializers.IntegerField(min_value=1, max_value=48, default=6)
+
+
+class BoardFlightSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
 
+class DepartureSerializer(BoardFlightSerializer):
+    destination = AirportSerializer()
 
-class RouteSerializer(serializers.ModelSerializer):
+
+class ArrivalSerializer(BoardFlightSerializer):
+    source = AirportSerializer()
+
+
+class RouteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
@@ -48,19 +116,61 @@ class RouteListSerializer(RouteSerializer):
         source="destination.closet_big_city"
     )
 
+    class Meta(RouteSerializer.Meta):
+        expandable_fields = {
+            "source": (AirportSerializer, {}),
+            "destination": (AirportSerializer, {}),
+        }
+
 
 class RouteDetailSerializer(RouteSerializer):
     source = AirportSerializer(read_only=True)
     destination = AirportSerializer(read_only=True)
 
 
-class AirplaneTypeSerializer(serializers.ModelSerializer):
+class DateRangeSerializer(serializers.Serializer):
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        since, until = attrs.get("since"), attrs.get("until")
+        if since and until and until < since:
+            raise ValidationError({"until": "Must not be before since."})
+        return attrs
+
+
+class LoadFactorQuerySerializer(DateRangeSerializer):
+    airplane_type = serializers.IntegerField(required=False)
+
+
+class RouteDailyLoadSerializer(serializers.ModelSerializer):
+    load_factor = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = RouteDailyLoad
+        fields = (
+            "day", "airplane_type", "flights", "seats", "sold", "load_factor"
+        )
+
+
+class RouteLoadSerializer(serializers.Serializer):
+    route = serializers.IntegerField()
+    flights = serializers.IntegerField()
+    seats = serializers.IntegerField()
+    sold = serializers.IntegerField()
+    load_factor = serializers.SerializerMethodField()
+
+    def get_load_factor(self, obj) -> float:
+        return obj["sold"] / obj["seats"] if obj["seats"] else 0.0
+
+
+class AirplaneTypeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AirplaneType
         fields = ("id", "name")
 
 
-class AirplaneSerializer(serializers.ModelSerializer):
+class AirplaneSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Airplane
         fields = (
@@ -78,12 +188,15 @@ class AirplaneListSerializer(AirplaneSerializer):
         source="airplane_type.name"
     )
 
+    class Meta(AirplaneSerializer.Meta):
+        expandable_fields = {"airplane_type": (AirplaneTypeSerializer, {})}
+
 
 class AirplaneDetailSerializer(AirplaneSerializer):
     airplane_type = AirplaneTypeSerializer(read_only=True)
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Flight
         fields = (
@@ -121,9 +234,55 @@ class FlightListSerializer(FlightSerializer):
             "crews",
             "tickets_available"
         )
+        expandable_fields = {
+            "route": (RouteDetailSerializer, {}),
+            "airplane": (AirplaneDetailSerializer, {}),
+            "crews": (CrewSerializer, {"many": True}),
+        }
+
+
+class FlightCalendarQuerySerializer(DateRangeSerializer):
+    route = serializers.IntegerField(required=False)
+    source = serializers.CharField(required=False)
+    destination = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if "route" not in attrs and not (
+            "source" in attrs and "destination" in attrs
+        ):
+            raise ValidationError(
+                "Either route or source and destination are required."
+            )
+
+        since = attrs.setdefault("since", timezone.localdate())
+        until = attrs.setdefault(
+            "until", since + timedelta(days=FLIGHT_CALENDAR_DEFAULT_DAYS - 1)
+        )
+        if (until - since).days >= FLIGHT_CALENDAR_MAX_DAYS:
+            raise ValidationError(
+                {"until": f"At most {FLIGHT_CALENDAR_MAX_DAYS} days at once."}
+            )
+        return attrs
+
+
+class FlightCalendarDaySerializer(serializers.Serializer):
+    day = serializers.DateField()
+    flights = serializers.IntegerField()
+    min_free_seats = serializers.IntegerField()
+    free_seats = serializers.IntegerField()
+    first_departure = serializers.DateTimeField()
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    def run_validators(self, value):
+        try:
+            super().run_validators(value)
+        except ValidationError as error:
+            if "unique" in error.get_codes():
+                BOOKING_CONFLICTS.inc("taken")
+            raise
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -170,20 +329,124 @@ class FlightDetailSerializer(FlightSerializer):
         )
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+class FlightScheduleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    def validate(self, attrs):
+        data = super(FlightScheduleSerializer, self).validate(attrs=attrs)
+        FlightSchedule.validate_schedule(
+            *(
+                attrs.get(name, getattr(self.instance, name, None))
+                for name in ("weekdays", "duration", "valid_from", "valid_until")
+            ),
+            ValidationError
+        )
+        return data
+
+    class Meta:
+        model = FlightSchedule
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "weekdays",
+            "departure_time",
+            "duration",
+            "valid_from",
+            "valid_until",
+            "crews"
+        )
+
+
+class OrderFlightField(serializers.PrimaryKeyRelatedField):
+    """``flight`` of an order ticket, among the flights its order loaded."""
+
+    def to_internal_value(self, data):
+        flights = getattr(self.parent, "flights", {})
+        if not isinstance(data, bool) and str(data) in flights:
+            return flights[str(data)]
+        return super().to_internal_value(data)
+
+
+class OrderTicketListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # One query for the flights and airplanes of all the tickets instead
+        # of two per ticket.
+        if isinstance(data, list):
+            ids = {
+                str(ticket.get("flight"))
+                for ticket in data
+                if isinstance(ticket, dict)
+            }
+            self.child.flights = {
+                str(flight.pk): flight
+                for flight in Flight.objects.select_related("airplane").filter(
+                    pk__in=[pk for pk in ids if pk.isdigit()]
+                )
+            }
+        return super().to_internal_value(data)
+
+
+class OrderTicketSerializer(TicketSerializer):
+    flight = OrderFlightField(queryset=Flight.objects.select_related("airplane"))
+
+    class Meta(TicketSerializer.Meta):
+        list_serializer_class = OrderTicketListSerializer
+        # Taken seats are looked up for the whole order at once.
+        validators = []
+
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    tickets = OrderTicketSerializer(
+        many=True, read_only=False, allow_empty=False
+    )
 
     class Meta:
         model = Order
         fields = ("id", "tickets", "created_at")
 
+    def validate_tickets(self, tickets):
+        places = Counter(
+            (ticket["flight"].pk, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        )
+        taken = Q()
+        for flight_id, row, seat in places:
+            taken |= Q(flight_id=flight_id, row=row, seat=seat)
+        places.update(
+            Ticket.objects.filter(taken).values_list("flight_id", "row", "seat")
+        )
+        errors = [
+            {
+                "non_field_errors": [
+                    "The fields flight, row, seat must make a unique set."
+                ]
+            }
+            if places[ticket["flight"].pk, ticket["row"], ticket["seat"]] > 1
+            else {}
+            for ticket in tickets
+        ]
+        if any(errors):
+            BOOKING_CONFLICTS.inc("taken")
+            raise ValidationError(errors)
+        return tickets
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+        try:
+            with transaction.atomic():
+                tickets_data = validated_data.pop("tickets")
+                order = Order.objects.create(**validated_data)
+                tickets = Ticket.objects.bulk_create(
+                    Ticket(order=order, **ticket_data)
+                    for ticket_data in tickets_data
+                )
+                # bulk_create() sends no signals.
+                count_sold(tickets)
+                return order
+        except IntegrityError:
+            # Another order took one of the seats since validation.
+            BOOKING_CONFLICTS.inc("race")
+            raise ValidationError(
+                {"tickets": "One of the seats has just been taken."}
+            )
 
 
 class OrderListSerializer(OrderSerializer):
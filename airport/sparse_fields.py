@@ -0,0 +1,83 @@
+"""
+Sparse fieldsets (``?fields=``) and expansion (``?expand=``) of responses.
+
+``?fields=id,departure_time`` returns only the listed fields and
+``?expand=route`` replaces a field by the serializer declared for it in
+``Meta.expandable_fields``. Only the serializer of the response itself is
+affected, nested serializers keep their fields. Views read the selection
+with ``wants()``/``expands()`` to join and prefetch only what is returned.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_names(value):
+    if value is None:
+        return None
+    return frozenset(name.strip() for name in value.split(",") if name.strip())
+
+
+class SparseFieldsMixin:
+    """Apply the ``fields`` and ``expand`` of the context to the root."""
+
+    def is_response_root(self) -> bool:
+        return self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer)
+            and self.parent.parent is None
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only = self.context.get("fields")
+        expand = self.context.get("expand")
+        if not self.is_response_root() or (only is None and not expand):
+            return fields
+
+        if expand:
+            expandable = getattr(self.Meta, "expandable_fields", {})
+            unknown = expand - expandable.keys()
+            if unknown:
+                raise ValidationError(
+                    {"expand": f"Can't expand: {', '.join(sorted(unknown))}."}
+                )
+            for name in expand:
+                serializer_class, kwargs = expandable[name]
+                fields[name] = serializer_class(read_only=True, **kwargs)
+
+        if only is not None:
+            unknown = only - fields.keys()
+            if unknown:
+                raise ValidationError(
+                    {"fields": f"Unknown fields: {', '.join(sorted(unknown))}."}
+                )
+            fields = {
+                name: field for name, field in fields.items() if name in only
+            }
+        return fields
+
+
+class SparseFieldsViewMixin:
+    """Pass ``?fields=`` and ``?expand=`` of read requests to the serializer."""
+
+    def get_field_selection(self) -> tuple:
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None, frozenset()
+        return (
+            parse_names(request.query_params.get("fields")),
+            parse_names(request.query_params.get("expand")) or frozenset(),
+        )
+
+    def wants(self, name) -> bool:
+        """Whether the response includes the field ``name``."""
+        only, expand = self.get_field_selection()
+        return only is None or name in only
+
+    def expands(self, name) -> bool:
+        return self.wants(name) and name in self.get_field_selection()[1]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"], context["expand"] = self.get_field_selection()
+        return context
@@ -0,0 +1,109 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from airport.models import Order, Ticket
+
+
+class AdminQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command(
+            "seed_airport",
+            airports=8,
+            routes=20,
+            airplanes=4,
+            crews=10,
+            flights=60,
+            users=3,
+            tickets=300,
+            stdout=StringIO(),
+        )
+        cls.admin = get_user_model().objects.create_superuser(
+            "admin@admin.com", "Testpass123@"
+        )
+
+    def setUp(self) -> None:
+        self.client.force_login(self.admin)
+
+    def count_queries(self, url) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self) -> None:
+        for name in ("ticket", "order", "flight", "route", "airplane"):
+            with self.subTest(name):
+                self.assertLess(
+                    self.count_queries(reverse(f"admin:airport_{name}_changelist")),
+                    10,
+                )
+
+    def test_ticket_form_does_not_list_flights(self) -> None:
+        ticket = Ticket.objects.first()
+
+        self.assertLess(
+            self.count_queries(
+                reverse("admin:airport_ticket_change", args=[ticket.id])
+            ),
+            10,
+        )
+
+    def test_order_form_shows_tickets_inline(self) -> None:
+        order = Order.objects.filter(tickets__isnull=False).first()
+        url = reverse("admin:airport_order_change", args=[order.id])
+
+        res = self.client.get(url)
+
+        self.assertContains(res, "tickets-TOTAL_FORMS")
+        # The selected flight of each ticket, nothing per available flight.
+        self.assertLessEqual(
+            self.count_queries(url), 8 + 2 * order.tickets.count()
+        )
+
+    def test_flight_autocomplete(self) -> None:
+        res = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "airport",
+                "model_name": "ticket",
+                "field_name": "flight",
+                "term": "",
+            },
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.json()["results"])
+
+    def test_prefix_searches(self) -> None:
+        for name, term in (
+            ("route", "a"),
+            ("flight", "a"),
+            ("order", "user"),
+            ("ticket", "user"),
+        ):
+            with self.subTest(name):
+                res = self.client.get(
+                    reverse(f"admin:airport_{name}_changelist"), {"q": term}
+                )
+                self.assertEqual(res.status_code, 200)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+    def test_prefix_searches_are_indexed(self) -> None:
+        with connection.cursor() as cursor:
+            for table, index in (
+                ("airport_airport", "airport_airport_city_search_idx"),
+                ("user_user", "user_user_email_search_idx"),
+            ):
+                with self.subTest(index):
+                    self.assertIn(
+                        index,
+                        connection.introspection.get_constraints(cursor, table),
+                    )
@@ -0,0 +1,260 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import analytics
+from airport.analytics import rebuild
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    Order,
+    Route,
+    RouteDailyLoad,
+    Ticket,
+)
+
+LOAD_FACTORS_URL = reverse("airport:route-load-factors")
+
+
+def load_factor_url(route_id) -> str:
+    return reverse("airport:route-load-factor", args=[route_id])
+
+
+def loads() -> list:
+    return list(
+        RouteDailyLoad.objects.filter(flights__gt=0).values_list(
+            "route_id", "day", "airplane_type_id", "flights", "seats", "sold"
+        )
+    )
+
+
+class RouteLoadTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@admin.com", "Testpass123@"
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.airplane_type = AirplaneType.objects.create(name="test-type")
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6,
+            airplane_type=self.airplane_type,
+        )
+        kyiv = Airport.objects.create(name="Boryspil", closet_big_city="Kyiv")
+        krakow = Airport.objects.create(name="Balice", closet_big_city="Krakow")
+        self.route = Route.objects.create(
+            source=kyiv, destination=krakow, distance=500
+        )
+        self.flight = self.create_flight(datetime(2025, 6, 2, 8, 30))
+
+    def create_flight(self, departure_time, airplane=None) -> Flight:
+        departure_time = departure_time.replace(tzinfo=timezone.utc)
+        return Flight.objects.create(
+            route=self.route,
+            airplane=airplane or self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+        )
+
+    def book(self, flight, *places) -> None:
+        res = self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": flight.id}
+                    for row, seat in places
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def assertMatchesRebuild(self) -> None:
+        incremental = loads()
+        rebuild()
+        self.assertEqual(incremental, loads())
+
+    def test_tickets_and_flights_update_their_day(self) -> None:
+        self.create_flight(datetime(2025, 6, 2, 18, 0))
+        self.book(self.flight, (1, 1), (1, 2), (2, 1))
+        Ticket.objects.filter(row=2).delete()
+
+        self.assertEqual(
+            loads(),
+            [
+                (
+                    self.route.id, date(2025, 6, 2), self.airplane_type.id,
+                    2, 120, 2,
+                )
+            ],
+        )
+        self.assertMatchesRebuild()
+
+    def test_moved_flight_takes_its_tickets_along(self) -> None:
+        self.book(self.flight, (1, 1))
+        bigger = Airplane.objects.create(
+            name="Bigger", rows=20, seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="wide-body"),
+        )
+
+        self.flight.departure_time += timedelta(days=1)
+        self.flight.airplane = bigger
+        self.flight.save()
+
+        self.assertEqual(
+            loads(),
+            [(self.route.id, date(2025, 6, 3), bigger.airplane_type_id, 1, 120, 1)],
+        )
+        self.assertMatchesRebuild()
+
+    def test_airplane_capacity_change_updates_seats(self) -> None:
+        self.airplane.rows = 20
+        self.airplane.save()
+
+        self.assertEqual(loads()[0][4], 120)
+        self.assertMatchesRebuild()
+
+    def test_deleted_flight_leaves_no_load(self) -> None:
+        self.book(self.flight, (1, 1))
+
+        self.flight.delete()
+
+        self.assertEqual(loads(), [])
+        self.assertFalse(Order.objects.get().tickets.exists())
+
+    def test_flight_delete_does_not_adjust_per_ticket(self) -> None:
+        other = self.create_flight(datetime(2025, 6, 2, 18, 0))
+        self.book(self.flight, (1, 1))
+        self.book(other, *[(row, 1) for row in range(1, 11)])
+
+        with CaptureQueriesContext(connection) as one_ticket:
+            self.flight.delete()
+        with CaptureQueriesContext(connection) as ten_tickets:
+            other.delete()
+
+        self.assertEqual(len(ten_tickets), len(one_ticket))
+        self.assertEqual(loads(), [])
+        self.assertMatchesRebuild()
+
+    def test_order_delete_does_not_adjust_per_ticket(self) -> None:
+        other = self.create_flight(datetime(2025, 6, 3, 8, 30))
+        self.book(self.flight, (1, 1))
+        self.book(self.flight, *[(row, 2) for row in range(1, 11)])
+        self.book(other, (1, 1), (1, 2))
+        one_ticket, ten_tickets, _ = Order.objects.order_by("id")
+
+        with CaptureQueriesContext(connection) as one:
+            one_ticket.delete()
+        with CaptureQueriesContext(connection) as ten:
+            ten_tickets.delete()
+        Order.objects.all().delete()
+
+        self.assertEqual(len(ten), len(one))
+        self.assertEqual([load[5] for load in loads()], [0, 0])
+        self.assertMatchesRebuild()
+
+    def test_airplane_delete_does_not_adjust_per_flight(self) -> None:
+        airplane = Airplane.objects.create(
+            name="Small", rows=5, seats_in_row=4,
+            airplane_type=self.airplane_type,
+        )
+        for hour in range(10):
+            self.book(
+                self.create_flight(datetime(2025, 6, 2, hour), airplane), (1, 1)
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            airplane.delete()
+
+        self.assertLess(len(queries), 15)
+        self.assertEqual(
+            loads(),
+            [(self.route.id, date(2025, 6, 2), self.airplane_type.id, 1, 60, 0)],
+        )
+        self.assertMatchesRebuild()
+
+    def test_ticket_update_does_not_reload_the_ticket(self) -> None:
+        other = self.create_flight(datetime(2025, 6, 3, 8, 30))
+        self.book(self.flight, (1, 1), (1, 2))
+        ticket = Ticket.objects.get(seat=2)
+
+        with mock.patch.object(
+            analytics, "_loaded_values", wraps=analytics._loaded_values
+        ) as loaded_values:
+            ticket.row = 2
+            ticket.save()
+            ticket.flight = other
+            ticket.save()
+
+        loaded_values.assert_not_called()
+        self.assertEqual([load[5] for load in loads()], [1, 1])
+        self.assertMatchesRebuild()
+
+    def test_route_load_factor_per_day(self) -> None:
+        self.create_flight(datetime(2025, 6, 5, 8, 30))
+        self.book(self.flight, (1, 1), (1, 2), (1, 3))
+
+        res = self.client.get(
+            load_factor_url(self.route.id), {"until": "2025-06-04"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "day": "2025-06-02",
+                    "airplane_type": self.airplane_type.id,
+                    "flights": 1,
+                    "seats": 60,
+                    "sold": 3,
+                    "load_factor": 0.05,
+                }
+            ],
+        )
+
+    def test_load_factor_of_every_route(self) -> None:
+        self.create_flight(datetime(2025, 6, 5, 8, 30))
+        self.book(self.flight, (1, 1), (1, 2), (1, 3), (1, 4), (1, 5), (1, 6))
+
+        res = self.client.get(LOAD_FACTORS_URL, {"since": "2025-06-01"})
+
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "route": self.route.id,
+                    "flights": 2,
+                    "seats": 120,
+                    "sold": 6,
+                    "load_factor": 0.05,
+                }
+            ],
+        )
+
+    def test_invalid_range_is_rejected(self) -> None:
+        res = self.client.get(
+            LOAD_FACTORS_URL, {"since": "2025-06-02", "until": "2025-06-01"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_load_factors_are_admin_only(self) -> None:
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("a@a.com", "Testpass123@")
+        )
+
+        for url in (LOAD_FACTORS_URL, load_factor_url(self.route.id)):
+            with self.subTest(url):
+                res = self.client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,148 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.autocomplete import PrefixIndex, index_cache
+from airport.models import Airport, Route
+from user.throttling import ScopedRateThrottle
+
+AUTOCOMPLETE_URL = reverse("airport:airport-autocomplete")
+
+
+def suggestion(pk, name, city, routes=0) -> dict:
+    return {"id": pk, "name": name, "closet_big_city": city, "routes": routes}
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.index = PrefixIndex(
+            [
+                suggestion(1, "John F. Kennedy", "New York", 9),
+                suggestion(2, "Kraków John Paul II", "Krakow", 5),
+                suggestion(3, "LaGuardia", "New York", 4),
+                suggestion(4, "Newark Liberty", "Newark", 1),
+            ]
+        )
+
+    def ids(self, query, limit=20) -> list:
+        return [airport["id"] for airport in self.index.search(query, limit)]
+
+    def test_prefix_of_any_word_in_rank_order(self) -> None:
+        self.assertEqual(self.ids("new"), [1, 3, 4])
+        self.assertEqual(self.ids("jo"), [1, 2])
+        self.assertEqual(self.ids("n", limit=2), [1, 3])
+
+    def test_accents_and_case_are_ignored(self) -> None:
+        self.assertEqual(self.ids("KRAKÓW"), [2])
+
+    def test_every_word_must_match(self) -> None:
+        self.assertEqual(self.ids("new la"), [3])
+        self.assertEqual(self.ids("york j"), [1])
+        self.assertEqual(self.ids(""), [])
+
+    def test_search_is_fast_on_many_airports(self) -> None:
+        index = PrefixIndex(
+            [
+                suggestion(pk, f"Airport {pk:05d}", f"City {pk % 977}")
+                for pk in range(20000)
+            ]
+        )
+
+        for query in ("a", "ci", "city 97", "airport 123", "9 1", "city 9 zz"):
+            started = time.perf_counter()
+            for _ in range(100):
+                index.search(query, 10)
+            self.assertLess((time.perf_counter() - started) / 100, 0.001)
+
+
+class AutocompleteApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        index_cache.clear()
+        self.balice = Airport.objects.create(
+            name="Balice", closet_big_city="Krakow"
+        )
+        self.boryspil = Airport.objects.create(
+            name="Boryspil", closet_big_city="Kyiv"
+        )
+        Route.objects.create(
+            source=self.boryspil, destination=self.balice, distance=500
+        )
+        Route.objects.create(
+            source=self.balice, destination=self.boryspil, distance=500
+        )
+        Route.objects.create(
+            source=self.boryspil,
+            destination=Airport.objects.create(
+                name="Balti", closet_big_city="Riga"
+            ),
+            distance=900,
+        )
+
+    def test_suggestions_ranked_by_routes(self) -> None:
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "b"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [airport["name"] for airport in res.data],
+            ["Boryspil", "Balice", "Balti"],
+        )
+        self.assertEqual(res.data[0]["routes"], 3)
+
+    def test_index_is_kept_in_memory(self) -> None:
+        self.client.get(AUTOCOMPLETE_URL, {"q": "k"})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "kyi"})
+
+        self.assertEqual(res.data[0]["id"], self.boryspil.id)
+
+    def test_changes_rebuild_the_index(self) -> None:
+        self.client.get(AUTOCOMPLETE_URL, {"q": "k"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(name="Zhuliany", closet_big_city="Kyiv")
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "zh"})
+
+        self.assertEqual([airport["name"] for airport in res.data], ["Zhuliany"])
+
+    def test_query_is_required(self) -> None:
+        res = self.client.get(AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_expires(self) -> None:
+        self.client.get(AUTOCOMPLETE_URL, {"q": "k"})
+        # Created without an invalidation event.
+        Airport.objects.create(name="Zhuliany", closet_big_city="Kyiv")
+        later = time.monotonic() + index_cache.ttl + 1
+
+        with mock.patch("airport.invalidation.time.monotonic", return_value=later):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "zh"})
+
+        self.assertEqual([airport["name"] for airport in res.data], ["Zhuliany"])
+
+    @override_settings(THROTTLE_STORE="cache")
+    def test_autocomplete_is_throttled(self) -> None:
+        cache.clear()
+        with mock.patch.object(
+            ScopedRateThrottle, "THROTTLE_RATES", {"autocomplete": "2/min"}
+        ):
+            statuses = [
+                self.client.get(AUTOCOMPLETE_URL, {"q": q}).status_code
+                for q in ("k", "kr", "kra")
+            ]
+
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
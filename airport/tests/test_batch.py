@@ -0,0 +1,177 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order
+from airport_api_service import batch
+from user.authentication import ClaimsJWTAuthentication, revocations
+
+BATCH_URL = reverse("batch")
+FLIGHTS_URL = reverse("airport:flight-list")
+AIRPORTS_URL = reverse("airport:airport-list")
+ORDERS_URL = reverse("airport:order-list")
+ME_URL = reverse("user:manage")
+
+
+def seed() -> None:
+    call_command(
+        "seed_airport",
+        airports=6,
+        routes=10,
+        airplanes=3,
+        crews=8,
+        flights=20,
+        users=2,
+        tickets=50,
+        stdout=StringIO(),
+    )
+
+
+@override_settings(BATCH_MAX_WORKERS=1)
+class BatchApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        seed()
+        cls.user = get_user_model().objects.create_user(
+            "batch@test.com", "Testpass123@"
+        )
+
+    def setUp(self) -> None:
+        revocations.load()
+        self.client = APIClient()
+
+    def authenticate(self) -> None:
+        res = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "batch@test.com", "password": "Testpass123@"},
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+    def post_batch(self, *requests):
+        return self.client.post(
+            BATCH_URL, {"requests": list(requests)}, format="json"
+        )
+
+    def test_sub_requests_return_the_view_responses(self) -> None:
+        res = self.post_batch(
+            {"url": f"{FLIGHTS_URL}?fields=id&history=true"},
+            {"url": AIRPORTS_URL},
+        )
+        flights, airports = res.data["responses"]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(flights["status"], status.HTTP_200_OK)
+        self.assertEqual(
+            [flight["id"] for flight in flights["body"]],
+            list(Flight.objects.order_by("id").values_list("id", flat=True)),
+        )
+        self.assertEqual(airports["body"], self.client.get(AIRPORTS_URL).data)
+
+    def test_token_is_decoded_once(self) -> None:
+        self.authenticate()
+        with mock.patch.object(
+            ClaimsJWTAuthentication,
+            "get_validated_token",
+            wraps=ClaimsJWTAuthentication().get_validated_token,
+        ) as get_validated_token:
+            res = self.post_batch({"url": ME_URL}, {"url": ORDERS_URL})
+
+        self.assertEqual(get_validated_token.call_count, 1)
+        me, orders = res.data["responses"]
+        self.assertEqual(me["body"]["email"], "batch@test.com")
+        self.assertEqual(orders["status"], status.HTTP_200_OK)
+
+    def test_later_reads_see_earlier_writes(self) -> None:
+        self.authenticate()
+        flight = Flight.objects.first()
+
+        res = self.post_batch(
+            {"url": ORDERS_URL},
+            {
+                "method": "POST",
+                "url": ORDERS_URL,
+                "body": {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]},
+            },
+            {"url": ORDERS_URL},
+        )
+        before, created, after = res.data["responses"]
+
+        self.assertEqual(created["status"], status.HTTP_201_CREATED)
+        self.assertEqual(before["body"]["count"], 0)
+        self.assertEqual(after["body"]["count"], 1)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_sub_requests_keep_their_permissions(self) -> None:
+        res = self.post_batch({"url": ORDERS_URL})
+
+        self.assertEqual(
+            res.data["responses"][0]["status"], status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_unknown_url_is_not_found(self) -> None:
+        res = self.post_batch({"url": "/api/nowhere/"})
+
+        self.assertEqual(
+            res.data["responses"][0]["status"], status.HTTP_404_NOT_FOUND
+        )
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_number_of_sub_requests_is_limited(self) -> None:
+        res = self.post_batch(*[{"url": AIRPORTS_URL}] * 3)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_nested_batches_are_rejected(self) -> None:
+        res = self.post_batch({"method": "POST", "url": BATCH_URL})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_views_outside_the_api_are_rejected(self) -> None:
+        for url in (reverse("metrics"), reverse("admin:index")):
+            with self.subTest(url=url):
+                res = self.post_batch({"url": AIRPORTS_URL}, {"url": url})
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_non_json_responses_are_rejected(self) -> None:
+        res = self.post_batch(
+            {"url": reverse("swagger-ui")},
+            {"url": reverse("redoc")},
+            {"url": AIRPORTS_URL},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [response["status"] for response in res.data["responses"]],
+            [400, 400, 200],
+        )
+
+@override_settings(BATCH_MAX_WORKERS=4)
+class ConcurrentBatchTest(TransactionTestCase):
+    def setUp(self) -> None:
+        seed()
+
+    def test_reads_run_on_the_pool(self) -> None:
+        urls = [FLIGHTS_URL, AIRPORTS_URL, reverse("airport:route-list")]
+        expected = [APIClient().get(url).data for url in urls]
+
+        with mock.patch.object(
+            batch.pool, "map", wraps=batch.pool.map
+        ) as pool_map:
+            res = APIClient().post(
+                BATCH_URL,
+                {"requests": [{"url": url} for url in urls]},
+                format="json",
+            )
+
+        pool_map.assert_called_once()
+        self.assertEqual(
+            [response["body"] for response in res.data["responses"]], expected
+        )
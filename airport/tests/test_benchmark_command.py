@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+SCENARIOS = {
+    "flights-list", "flights-list-source", "orders-list", "orders-create",
+}
+
+
+class BenchmarkApiCommandTest(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, "results.json")
+
+    def benchmark(self, **options) -> None:
+        call_command(
+            "benchmark_api",
+            sizes="0.05",
+            iterations=3,
+            warmup=1,
+            current_db=True,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_results_are_written_as_json(self) -> None:
+        self.benchmark(output=self.output)
+
+        with open(self.output) as output:
+            results = json.load(output)["results"]["0.05"]
+        self.assertEqual(set(results), SCENARIOS)
+        for result in results.values():
+            self.assertEqual(result["runs"], 3)
+            self.assertLessEqual(result["wall_ms"]["p50"], result["wall_ms"]["p99"])
+            self.assertGreater(result["queries"], 0)
+
+    def test_query_count_regression_fails(self) -> None:
+        self.benchmark(output=self.output)
+        with open(self.output) as output:
+            baseline = json.load(output)
+        for result in baseline["results"]["0.05"].values():
+            result["wall_ms"]["p95"] = float("inf")
+        baseline["results"]["0.05"]["orders-list"]["queries"] -= 1
+        with open(self.output, "w") as output:
+            json.dump(baseline, output)
+
+        with self.assertRaisesMessage(CommandError, "1 regression(s)"):
+            self.benchmark(baseline=self.output)
@@ -0,0 +1,168 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.boards import boards_cache, routes_cache
+from airport.models import Airplane, AirplaneType, Airport, Flight, Route
+from user.throttling import ScopedRateThrottle
+
+
+def departures_url(airport_id) -> str:
+    return reverse("airport:airport-departures", args=[airport_id])
+
+
+def arrivals_url(airport_id) -> str:
+    return reverse("airport:airport-arrivals", args=[airport_id])
+
+
+class AirportBoardTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        routes_cache.clear()
+        boards_cache.clear()
+
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="test-type"),
+        )
+        self.kyiv = Airport.objects.create(
+            name="Boryspil", closet_big_city="Kyiv"
+        )
+        self.krakow = Airport.objects.create(
+            name="Balice", closet_big_city="Krakow"
+        )
+        # Same city, other airport: must not show up on Boryspil's boards.
+        self.zhuliany = Airport.objects.create(
+            name="Zhuliany", closet_big_city="Kyiv"
+        )
+        self.outbound = Route.objects.create(
+            source=self.kyiv, destination=self.krakow, distance=500
+        )
+        self.inbound = Route.objects.create(
+            source=self.krakow, destination=self.kyiv, distance=500
+        )
+        self.other = Route.objects.create(
+            source=self.zhuliany, destination=self.krakow, distance=500
+        )
+
+        now = timezone.now()
+        self.later = self.create_flight(self.outbound, now + timedelta(hours=3))
+        self.soon = self.create_flight(self.outbound, now + timedelta(hours=1))
+        self.create_flight(self.outbound, now + timedelta(hours=10))
+        self.create_flight(self.outbound, now - timedelta(hours=1))
+        self.create_flight(self.other, now + timedelta(hours=1))
+        # In the air now, lands in an hour.
+        self.landing = self.create_flight(
+            self.inbound, now - timedelta(hours=1)
+        )
+
+    def create_flight(self, route, departure_time) -> Flight:
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+        )
+
+    def test_departures_of_the_next_hours(self) -> None:
+        res = self.client.get(departures_url(self.kyiv.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [flight["id"] for flight in res.data],
+            [self.soon.id, self.later.id],
+        )
+        self.assertEqual(
+            res.data[0]["destination"],
+            {
+                "id": self.krakow.id,
+                "code": None,
+                "name": "Balice",
+                "closet_big_city": "Krakow",
+                "latitude": None,
+                "longitude": None,
+            },
+        )
+
+    def test_arrivals_include_flights_in_the_air(self) -> None:
+        res = self.client.get(arrivals_url(self.kyiv.id), {"hours": 2})
+
+        self.assertEqual([flight["id"] for flight in res.data], [self.landing.id])
+        self.assertEqual(res.data[0]["source"]["id"], self.krakow.id)
+
+    def test_polling_is_served_from_memory(self) -> None:
+        self.client.get(departures_url(self.kyiv.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(departures_url(self.kyiv.id))
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_flight_changes_refresh_the_board(self) -> None:
+        self.client.get(departures_url(self.kyiv.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soon.delete()
+        res = self.client.get(departures_url(self.kyiv.id))
+
+        self.assertEqual([flight["id"] for flight in res.data], [self.later.id])
+
+    def test_unknown_airport_is_not_found(self) -> None:
+        res = self.client.get(departures_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_hours_are_limited(self) -> None:
+        res = self.client.get(departures_url(self.kyiv.id), {"hours": 100})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_routes_expire(self) -> None:
+        self.client.get(departures_url(self.kyiv.id))
+        # Changed without an invalidation event.
+        Route.objects.create(
+            source=self.kyiv, destination=self.zhuliany, distance=30
+        )
+        boards_cache.clear()
+        later = time.monotonic() + routes_cache.ttl + 1
+
+        with mock.patch("airport.invalidation.time.monotonic", return_value=later):
+            res = self.client.get(departures_url(self.kyiv.id), {"hours": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(routes_cache.get("routes"))
+        self.assertIn(
+            Route.objects.get(destination=self.zhuliany).id,
+            routes_cache.get("routes")["departures"][self.kyiv.id],
+        )
+
+    @override_settings(THROTTLE_STORE="cache")
+    def test_boards_are_throttled(self) -> None:
+        cache.clear()
+        with mock.patch.object(
+            ScopedRateThrottle, "THROTTLE_RATES", {"boards": "2/min"}
+        ):
+            statuses = [
+                self.client.get(url).status_code
+                for url in (
+                    departures_url(self.kyiv.id),
+                    arrivals_url(self.kyiv.id),
+                    departures_url(self.kyiv.id),
+                )
+            ]
+
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
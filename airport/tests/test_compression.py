@@ -0,0 +1,143 @@
+import gzip
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport_api_service import compression
+from airport_api_service.compression import (
+    CompressionMiddleware,
+    compressed_cache,
+    negotiate,
+)
+
+
+class NegotiateTest(SimpleTestCase):
+    def test_gzip_is_picked_from_accept_encoding(self) -> None:
+        self.assertEqual(negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(negotiate("*"), next(iter(compression.ENCODINGS)))
+
+    def test_unacceptable_encodings_are_not_picked(self) -> None:
+        self.assertIsNone(negotiate(""))
+        self.assertIsNone(negotiate("deflate"))
+        self.assertIsNone(negotiate("gzip;q=0"))
+        self.assertIsNone(negotiate("*, gzip;q=0, br;q=0, zstd;q=0"))
+
+    def test_quality_decides_between_encodings(self) -> None:
+        with mock.patch.dict(
+            compression.ENCODINGS,
+            {"zstd": compression.GzipCompressor},
+        ):
+            self.assertEqual(negotiate("gzip;q=0.5, zstd;q=0.8"), "zstd")
+            self.assertEqual(negotiate("gzip, zstd;q=0.8"), "gzip")
+
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    def setUp(self) -> None:
+        compressed_cache.clear()
+        self.request = RequestFactory().get(
+            "/api/airport/flights/", HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+    def process(self, response, request=None):
+        return CompressionMiddleware(lambda request: response)(
+            request or self.request
+        )
+
+    def test_large_json_is_compressed(self) -> None:
+        content = b'{"flights": [' + b'{"id": 1},' * 500 + b"]}"
+        response = self.process(
+            HttpResponse(content, content_type="application/json")
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.content), content)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+
+    def test_small_and_encoded_responses_are_not_compressed(self) -> None:
+        small = self.process(HttpResponse(b"{}", content_type="application/json"))
+        self.assertFalse(small.has_header("Content-Encoding"))
+
+        encoded = HttpResponse(b"x" * 5000, content_type="application/json")
+        encoded["Content-Encoding"] = "br"
+        self.assertEqual(self.process(encoded).content, b"x" * 5000)
+
+        image = self.process(HttpResponse(b"x" * 5000, content_type="image/png"))
+        self.assertFalse(image.has_header("Content-Encoding"))
+
+    def test_pages_and_csrf_cookies_are_not_compressed(self) -> None:
+        page = self.process(HttpResponse(b"x" * 5000, content_type="text/html"))
+        self.assertFalse(page.has_header("Content-Encoding"))
+
+        response = HttpResponse(b"x" * 5000, content_type="application/json")
+        response.set_cookie(settings.CSRF_COOKIE_NAME, "token")
+        self.assertFalse(self.process(response).has_header("Content-Encoding"))
+
+    def test_compressed_body_is_reused(self) -> None:
+        content = b"[" + b'"flight",' * 500 + b"]"
+        with mock.patch.object(
+            compression, "compress", wraps=compression.compress
+        ) as compress:
+            first = self.process(
+                HttpResponse(content, content_type="application/json")
+            )
+            second = self.process(
+                HttpResponse(content, content_type="application/json")
+            )
+
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_strong_etag_becomes_weak(self) -> None:
+        response = HttpResponse(b"a" * 5000, content_type="application/json")
+        response["ETag"] = '"abc"'
+
+        self.assertEqual(self.process(response)["ETag"], 'W/"abc"')
+
+    def test_streaming_response_is_compressed_by_chunk(self) -> None:
+        chunks = [b"[", b'{"id": 1},' * 300, b'{"id": 2}]']
+        response = self.process(
+            StreamingHttpResponse(iter(chunks), content_type="application/json")
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)),
+            b"".join(chunks),
+        )
+
+
+class CompressedFlightListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command(
+            "seed_airport",
+            airports=6,
+            routes=10,
+            airplanes=3,
+            crews=8,
+            flights=30,
+            users=2,
+            tickets=100,
+            stdout=StringIO(),
+        )
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_flight_list_is_gzipped_when_accepted(self) -> None:
+        url = reverse("airport:flight-list") + "?history=true"
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertLess(len(compressed.content), len(plain.content) // 3)
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
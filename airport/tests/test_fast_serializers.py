@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.fast_serializers import get_plan
+from airport.models import Route
+from airport.serializers import (
+    FlightDetailSerializer,
+    FlightListSerializer,
+    RouteListSerializer,
+)
+
+
+class FastListSerializationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command(
+            "seed_airport",
+            airports=8,
+            routes=20,
+            airplanes=4,
+            crews=10,
+            flights=60,
+            users=3,
+            tickets=500,
+            stdout=StringIO(),
+        )
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def assertSameAsSerializer(self, url, params=None) -> None:
+        # Seeded flights have departed already.
+        params = {"history": "true", **(params or {})}
+        fast = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, 200)
+        self.assertTrue(fast.data)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_flight_list_is_byte_identical(self) -> None:
+        self.assertSameAsSerializer(reverse("airport:flight-list"))
+
+    def test_filtered_flight_list_is_byte_identical(self) -> None:
+        route = Route.objects.select_related("source").first()
+        self.assertSameAsSerializer(
+            reverse("airport:flight-list"),
+            {"route": route.id, "source": route.source.closet_big_city},
+        )
+
+    def test_route_list_is_byte_identical(self) -> None:
+        self.assertSameAsSerializer(reverse("airport:route-list"))
+
+    def test_plan_selects_columns_instead_of_instances(self) -> None:
+        plan = get_plan(FlightListSerializer)
+
+        self.assertIn("route__source__closet_big_city", plan.paths)
+        self.assertIn("airplane__name", plan.paths)
+        self.assertEqual(plan.annotations, {"tickets_available"})
+        self.assertIsNotNone(get_plan(RouteListSerializer))
+
+    def test_unsupported_serializer_has_no_plan(self) -> None:
+        self.assertIsNone(get_plan(FlightDetailSerializer))
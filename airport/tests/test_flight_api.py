@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -67,7 +67,7 @@ class PublicFlightApiTest(TestCase):
         self.flight2.crews.add(self.crew)
 
     def test_list_flights(self) -> None:
-        res = self.client.get(FLIGHTS_URL)
+        res = self.client.get(FLIGHTS_URL, {"history": "true"})
         flights = Flight.objects.annotate(
             tickets_available=(
                 (F("airplane__rows") * F("airplane__seats_in_row")) - Count("tickets")
@@ -79,7 +79,9 @@ class PublicFlightApiTest(TestCase):
         self.assertEqual(res.data, serializer.data)
 
     def test_filter_flights_by_route_id(self) -> None:
-        res = self.client.get(FLIGHTS_URL, {"route": f"{self.route2.id}"})
+        res = self.client.get(
+            FLIGHTS_URL, {"route": f"{self.route2.id}", "history": "true"}
+        )
 
         matching_flights = Flight.objects.filter(route=self.route2).annotate(
             tickets_available=(
@@ -92,6 +94,20 @@ class PublicFlightApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_flights_skips_departed_by_default(self) -> None:
+        tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+        upcoming = Flight.objects.create(
+            route=self.route1,
+            airplane=self.airplane1,
+            departure_time=tomorrow,
+            arrival_time=tomorrow + timedelta(hours=1),
+        )
+
+        res = self.client.get(FLIGHTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([flight["id"] for flight in res.data], [upcoming.id])
+
     def test_retrieve_flight_detail(self) -> None:
         url = reverse("airport:flight-detail", args=[self.flight1.id])
         res = self.client.get(url)
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+CALENDAR_URL = reverse("airport:flight-calendar")
+
+
+class FlightCalendarTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        small = Airplane.objects.create(
+            name="Small", rows=10, seats_in_row=4, airplane_type=airplane_type
+        )
+        big = Airplane.objects.create(
+            name="Big", rows=20, seats_in_row=6, airplane_type=airplane_type
+        )
+        kyiv = Airport.objects.create(name="Boryspil", closet_big_city="Kyiv")
+        krakow = Airport.objects.create(name="Balice", closet_big_city="Krakow")
+        cls.route = Route.objects.create(
+            source=kyiv, destination=krakow, distance=500
+        )
+        cls.other_route = Route.objects.create(
+            source=krakow, destination=kyiv, distance=500
+        )
+
+        def create_flight(route, airplane, departure_time):
+            return Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=2),
+            )
+
+        morning = create_flight(
+            cls.route, small, datetime(2025, 6, 2, 6, 0, tzinfo=timezone.utc)
+        )
+        create_flight(
+            cls.route, big, datetime(2025, 6, 2, 18, 0, tzinfo=timezone.utc)
+        )
+        create_flight(
+            cls.route, big, datetime(2025, 6, 4, 9, 0, tzinfo=timezone.utc)
+        )
+        create_flight(
+            cls.other_route, big, datetime(2025, 6, 3, 9, 0, tzinfo=timezone.utc)
+        )
+        order = Order.objects.create(
+            user=get_user_model().objects.create_user("a@a.com", "Testpass123@")
+        )
+        for seat in range(1, 4):
+            Ticket.objects.create(order=order, flight=morning, row=1, seat=seat)
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_days_of_a_route_in_one_query(self) -> None:
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                CALENDAR_URL,
+                {
+                    "route": self.route.id,
+                    "since": "2025-06-01",
+                    "until": "2025-06-30",
+                },
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "day": "2025-06-02",
+                    "flights": 2,
+                    "min_free_seats": 37,
+                    "free_seats": 157,
+                    "first_departure": "2025-06-02T06:00:00Z",
+                },
+                {
+                    "day": "2025-06-04",
+                    "flights": 1,
+                    "min_free_seats": 120,
+                    "free_seats": 120,
+                    "first_departure": "2025-06-04T09:00:00Z",
+                },
+            ],
+        )
+
+    def test_days_between_two_cities(self) -> None:
+        res = self.client.get(
+            CALENDAR_URL,
+            {
+                "source": "Krakow",
+                "destination": "Kyiv",
+                "since": "2025-06-01",
+                "until": "2025-06-03",
+            },
+        )
+
+        self.assertEqual(
+            [(day["day"], day["flights"]) for day in res.data],
+            [("2025-06-03", 1)],
+        )
+
+    def test_route_or_cities_are_required(self) -> None:
+        res = self.client.get(CALENDAR_URL, {"source": "Kyiv"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_range_is_limited(self) -> None:
+        res = self.client.get(
+            CALENDAR_URL,
+            {
+                "route": self.route.id,
+                "since": "2025-01-01",
+                "until": "2025-12-31",
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("until", res.data)
@@ -0,0 +1,221 @@
+import math
+import random
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.geo import (
+    EARTH_RADIUS,
+    KDTree,
+    arc,
+    chord,
+    great_circle,
+    tree_cache,
+    unit_vector,
+)
+from airport.models import Airport, Route
+from user.throttling import ScopedRateThrottle
+
+NEAREST_URL = reverse("airport:airport-nearest")
+
+
+class GreatCircleTest(SimpleTestCase):
+    def test_distances(self) -> None:
+        self.assertAlmostEqual(
+            great_circle(0, 0, 0, 90), math.pi / 2 * EARTH_RADIUS
+        )
+        # Boryspil - Balice
+        self.assertEqual(round(great_circle(50.345, 30.895, 50.078, 19.785)), 790)
+        self.assertAlmostEqual(arc(chord(1234.5)), 1234.5)
+
+    def test_tree_finds_what_a_full_scan_finds(self) -> None:
+        rng = random.Random(7)
+        points = [
+            (rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(2000)
+        ]
+        tree = KDTree([unit_vector(*point) for point in points])
+
+        for _ in range(20):
+            here = (rng.uniform(-90, 90), rng.uniform(-180, 180))
+            found = tree.nearest(unit_vector(*here), 5, chord(3000))
+            scanned = sorted(
+                (great_circle(*here, *point), index)
+                for index, point in enumerate(points)
+                if great_circle(*here, *point) <= 3000
+            )[:5]
+
+            self.assertEqual(
+                [index for _, index in found], [index for _, index in scanned]
+            )
+            for (length, _), (distance, _) in zip(found, scanned):
+                self.assertAlmostEqual(arc(length), distance, places=6)
+
+
+class NearestAirportApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        tree_cache.clear()
+        self.boryspil = Airport.objects.create(
+            name="Boryspil", closet_big_city="Kyiv",
+            latitude=50.345, longitude=30.895,
+        )
+        self.zhuliany = Airport.objects.create(
+            name="Zhuliany", closet_big_city="Kyiv",
+            latitude=50.402, longitude=30.452,
+        )
+        self.balice = Airport.objects.create(
+            name="Balice", closet_big_city="Krakow",
+            latitude=50.078, longitude=19.785,
+        )
+        Airport.objects.create(name="Nowhere", closet_big_city="Unknown")
+
+    def test_nearest_within_radius(self) -> None:
+        res = self.client.get(NEAREST_URL, {"lat": 50.45, "lon": 30.52})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [airport["name"] for airport in res.data], ["Zhuliany", "Boryspil"]
+        )
+        self.assertAlmostEqual(
+            res.data[1]["distance"],
+            great_circle(50.45, 30.52, 50.345, 30.895),
+            places=0,
+        )
+
+    def test_limit_and_radius(self) -> None:
+        res = self.client.get(
+            NEAREST_URL, {"lat": 50.45, "lon": 30.52, "radius": 1000, "limit": 1}
+        )
+        self.assertEqual([airport["id"] for airport in res.data], [self.zhuliany.id])
+
+        res = self.client.get(
+            NEAREST_URL, {"lat": 50.45, "lon": 30.52, "radius": 1000}
+        )
+        self.assertEqual(len(res.data), 3)
+
+    def test_tree_is_rebuilt_on_change(self) -> None:
+        self.client.get(NEAREST_URL, {"lat": 50.45, "lon": 30.52})
+        with self.assertNumQueries(0):
+            self.client.get(NEAREST_URL, {"lat": 50.0, "lon": 19.9})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(
+                name="Kyiv Central", closet_big_city="Kyiv",
+                latitude=50.45, longitude=30.52,
+            )
+        res = self.client.get(NEAREST_URL, {"lat": 50.45, "lon": 30.52})
+
+        self.assertEqual(res.data[0]["name"], "Kyiv Central")
+        self.assertEqual(res.data[0]["distance"], 0)
+
+    def test_tree_expires(self) -> None:
+        self.client.get(NEAREST_URL, {"lat": 50.45, "lon": 30.52})
+        # Created without an invalidation event.
+        Airport.objects.create(
+            name="Kyiv Central", closet_big_city="Kyiv",
+            latitude=50.45, longitude=30.52,
+        )
+        later = time.monotonic() + tree_cache.ttl + 1
+
+        with mock.patch("airport.invalidation.time.monotonic", return_value=later):
+            res = self.client.get(NEAREST_URL, {"lat": 50.45, "lon": 30.52})
+
+        self.assertEqual(res.data[0]["name"], "Kyiv Central")
+
+    @override_settings(THROTTLE_STORE="cache")
+    def test_nearest_is_throttled(self) -> None:
+        cache.clear()
+        with mock.patch.object(
+            ScopedRateThrottle, "THROTTLE_RATES", {"nearest": "2/min"}
+        ):
+            statuses = [
+                self.client.get(NEAREST_URL, {"lat": 50, "lon": lon}).status_code
+                for lon in (30, 31, 32)
+            ]
+
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+
+    def test_coordinates_are_validated(self) -> None:
+        res = self.client.get(NEAREST_URL, {"lat": 91, "lon": 30})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("lat", res.data)
+
+
+class GeoCommandsTest(TestCase):
+    def setUp(self) -> None:
+        self.kyiv = Airport.objects.create(name="Boryspil", closet_big_city="Kyiv")
+        self.krakow = Airport.objects.create(
+            name="Balice", closet_big_city="Krakow"
+        )
+        self.route = Route.objects.create(
+            source=self.kyiv, destination=self.krakow, distance=500
+        )
+
+    def import_coordinates(self, content) -> str:
+        out = StringIO()
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(content)
+            file.flush()
+            call_command("import_airport_coordinates", file.name, stdout=out)
+        return out.getvalue()
+
+    def test_import_coordinates(self) -> None:
+        out = self.import_coordinates(
+            "id,latitude,longitude\n"
+            f"{self.kyiv.id},50.345,30.895\n"
+            f"{self.krakow.id},50.078,19.785\n"
+            "0,1,1\n"
+        )
+
+        self.kyiv.refresh_from_db()
+        self.assertEqual((self.kyiv.latitude, self.kyiv.longitude), (50.345, 30.895))
+        self.assertIn("Updated 2 airports", out)
+        self.assertIn("1 rows matched no airport", out)
+
+    def test_import_rejects_invalid_coordinates(self) -> None:
+        with self.assertRaisesMessage(CommandError, "Line 2"):
+            self.import_coordinates(f"id,latitude,longitude\n{self.kyiv.id},95,0\n")
+
+        self.kyiv.refresh_from_db()
+        self.assertIsNone(self.kyiv.latitude)
+
+    def test_recompute_route_distances(self) -> None:
+        Airport.objects.filter(id=self.kyiv.id).update(
+            latitude=50.345, longitude=30.895
+        )
+        Airport.objects.filter(id=self.krakow.id).update(
+            latitude=50.078, longitude=19.785
+        )
+
+        with self.assertRaisesMessage(CommandError, "1 of 1 routes"):
+            call_command("recompute_route_distances", "--check", stdout=StringIO())
+
+        call_command("recompute_route_distances", stdout=StringIO())
+        self.route.refresh_from_db()
+        self.assertEqual(self.route.distance, 790)
+
+        call_command("recompute_route_distances", "--check", stdout=StringIO())
+
+    def test_routes_without_coordinates_are_left_alone(self) -> None:
+        out = StringIO()
+        call_command("recompute_route_distances", stdout=out)
+
+        self.route.refresh_from_db()
+        self.assertEqual(self.route.distance, 500)
+        self.assertIn("Updated 0 of 0 routes", out.getvalue())
@@ -0,0 +1,88 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from airport.models import Airport, Route
+
+AIRPORTS = (
+    '1,"Boryspil International Airport","Kiev","Ukraine","KBP","UKBB",'
+    '50.345001,30.894699,427,2,"E","Europe/Kiev","airport","OurAirports"\n'
+    '2,"Kraków John Paul II International Airport","Krakow","Poland","KRK",'
+    '"EPKK",50.077702,19.784800,791,1,"E","Europe/Warsaw","airport",'
+    '"OurAirports"\n'
+    '3,"Kyiv Zhuliany International Airport","Kiev","Ukraine",\\N,"UKKK",'
+    '50.401699,30.451900,586,2,"E","Europe/Kiev","airport","OurAirports"\n'
+    '4,"Nameless Strip","Nowhere","Nowhere",\\N,\\N,1,1,0,0,"U",\\N,'
+    '"airport","OurAirports"\n'
+)
+ROUTES = (
+    "PS,5,KBP,1,KRK,2,,0,738\n"
+    "LO,1,KBP,1,KRK,2,Y,0,E75\n"
+    "LO,1,EPKK,2,UKKK,3,,0,E75\n"
+    "PS,5,KBP,1,LHR,507,,0,738\n"
+)
+
+
+class ImportNetworkCommandTest(TestCase):
+    def write(self, content) -> str:
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=".dat", encoding="utf-8", delete=False
+        )
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def import_network(self, airports=AIRPORTS, routes=ROUTES) -> str:
+        out = StringIO()
+        call_command(
+            "import_network",
+            airports=self.write(airports),
+            routes=self.write(routes),
+            batch_size=2,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_import_airports_and_routes(self) -> None:
+        out = self.import_network()
+
+        self.assertEqual(
+            sorted(Airport.objects.values_list("code", "closet_big_city")),
+            [("KBP", "Kiev"), ("KRK", "Krakow"), ("UKKK", "Kiev")],
+        )
+        self.assertEqual(
+            sorted(
+                Route.objects.values_list(
+                    "source__code", "destination__code", "distance"
+                )
+            ),
+            [("KBP", "KRK", 790), ("KRK", "UKKK", 759)],
+        )
+        self.assertIn("rows/s", out)
+
+    def test_import_is_repeatable(self) -> None:
+        self.import_network()
+        Route.objects.update(distance=1)
+
+        self.import_network(
+            airports=AIRPORTS.replace("Boryspil", "Kyiv Boryspil")
+        )
+
+        self.assertEqual(Airport.objects.count(), 3)
+        self.assertEqual(Route.objects.count(), 2)
+        self.assertTrue(Airport.objects.filter(name__startswith="Kyiv Bor").exists())
+        self.assertFalse(Route.objects.filter(distance=1).exists())
+
+    def test_invalid_coordinates_abort_the_import(self) -> None:
+        with self.assertRaisesMessage(CommandError, "Line 2"):
+            self.import_network(airports=AIRPORTS.replace("19.784800", "x"))
+
+        self.assertFalse(Airport.objects.exists())
+
+    def test_a_file_is_required(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command("import_network", stdout=StringIO())
@@ -0,0 +1,165 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from airport.invalidation import (
+    DELETED,
+    RESET,
+    SAVED,
+    InvalidationBus,
+    LocalCache,
+    bus,
+)
+from airport.models import Airport, Crew, Flight, Order
+
+
+def event(publisher, seq, label="airport.airport", pk=1, op=SAVED) -> str:
+    return json.dumps([publisher, seq, label, pk, op])
+
+
+class InvalidationBusTest(TestCase):
+    def setUp(self) -> None:
+        self.bus = InvalidationBus()
+        self.events = []
+        self.resyncs = 0
+        self.bus.subscribe(
+            [Airport],
+            lambda *args: self.events.append(args),
+            self.on_resync,
+        )
+
+    def on_resync(self) -> None:
+        self.resyncs += 1
+
+    def test_sequential_events_are_applied(self) -> None:
+        self.bus.receive(event("peer", 1, pk=1))
+        self.bus.receive(event("peer", 2, pk=2, op=DELETED))
+
+        self.assertEqual(
+            self.events,
+            [("airport.airport", 1, SAVED), ("airport.airport", 2, DELETED)],
+        )
+        self.assertEqual(self.resyncs, 0)
+
+    def test_gap_in_sequence_triggers_resync(self) -> None:
+        self.bus.receive(event("peer", 1))
+        with self.assertLogs("airport.invalidation", "WARNING"):
+            self.bus.receive(event("peer", 3))
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.resyncs, 1)
+
+    def test_sequences_are_tracked_per_publisher(self) -> None:
+        self.bus.receive(event("peer-a", 7))
+        self.bus.receive(event("peer-b", 1))
+        self.bus.receive(event("peer-a", 8))
+
+        self.assertEqual(len(self.events), 3)
+        self.assertEqual(self.resyncs, 0)
+
+    def test_own_events_are_ignored(self) -> None:
+        self.bus.receive(event(self.bus.publisher, 1))
+
+        self.assertEqual(self.events, [])
+
+    def test_events_for_other_models_are_ignored(self) -> None:
+        self.bus.receive(event("peer", 1, label="airport.crew"))
+
+        self.assertEqual(self.events, [])
+
+    def test_failing_subscriber_does_not_stop_the_others(self) -> None:
+        def fail(*args):
+            raise RuntimeError("broken cache")
+
+        self.bus._subscribers.insert(0, (frozenset(["airport.airport"]), fail, fail))
+        with self.assertLogs("airport.invalidation", "ERROR"):
+            self.bus.receive(event("peer", 1))
+        with self.assertLogs("airport.invalidation", "ERROR"):
+            self.bus.resync()
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.resyncs, 1)
+
+    def test_new_publisher_restarts_the_sequence(self) -> None:
+        publisher = self.bus.publisher
+        self.bus.new_publisher()
+
+        self.assertNotEqual(self.bus.publisher, publisher)
+        self.assertEqual(next(self.bus._seq), 1)
+
+
+class ModelSignalsTest(TestCase):
+    def setUp(self) -> None:
+        self.events = []
+        bus.subscribe(
+            [Airport, Flight], lambda *args: self.events.append(args)
+        )
+
+    def tearDown(self) -> None:
+        bus._subscribers.pop()
+
+    def test_save_and_delete_are_published_on_commit(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            airport = Airport.objects.create(
+                name="Test Airport", closet_big_city="Kyiv"
+            )
+        pk = airport.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            airport.delete()
+
+        self.assertEqual(
+            self.events,
+            [("airport.airport", pk, SAVED), ("airport.airport", pk, DELETED)],
+        )
+
+    def test_nothing_is_published_before_commit(self) -> None:
+        with self.captureOnCommitCallbacks(execute=False):
+            Airport.objects.create(name="Test Airport", closet_big_city="Kyiv")
+
+        self.assertEqual(self.events, [])
+
+    def test_models_nothing_caches_are_not_published(self) -> None:
+        user = get_user_model().objects.create_user("a@a.com", "Testpass123@")
+        with self.captureOnCommitCallbacks() as callbacks:
+            Order.objects.create(user=user)
+
+        self.assertEqual(callbacks, [])
+
+    def test_reverse_m2m_change_publishes_affected_flights(self) -> None:
+        crew = Crew.objects.create(first_name="Test", last_name="Crew")
+        with self.captureOnCommitCallbacks(execute=True):
+            crew.flights.clear()
+
+        self.assertEqual(self.events, [("airport.flight", None, RESET)])
+
+
+class LocalCacheTest(TestCase):
+    def test_cache_is_cleared_when_model_changes(self) -> None:
+        cache = LocalCache("airports", [Airport])
+        self.addCleanup(bus._subscribers.pop)
+
+        self.assertEqual(cache.get_or_set("count", lambda: 1), 1)
+        self.assertEqual(cache.get_or_set("count", lambda: 2), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(name="Test Airport", closet_big_city="Kyiv")
+
+        self.assertIsNone(cache.get("count"))
+        self.assertEqual(cache.get_or_set("count", lambda: 2), 2)
+
+    def test_expired_entries_are_dropped(self) -> None:
+        with mock.patch(
+            "airport.invalidation.time.monotonic", return_value=1000
+        ):
+            cache = LocalCache("boards", [Airport], ttl=5)
+            self.addCleanup(bus._subscribers.pop)
+            for hours in range(1, 49):
+                cache.set(hours, [])
+        with mock.patch(
+            "airport.invalidation.time.monotonic", return_value=1006
+        ):
+            cache.set("fresh", [])
+
+        self.assertEqual(list(cache._data), ["fresh"])
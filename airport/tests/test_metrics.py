@@ -0,0 +1,200 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.models import Ticket
+from airport_api_service import metrics
+
+METRICS_URL = reverse("metrics")
+
+
+class MetricsStoreTest(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.store = metrics.MetricsFile(self.directory, size=64)
+        patcher = mock.patch.object(metrics, "store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_samples_are_summed_across_process_files(self) -> None:
+        counter = metrics.Counter("test_events_total", "Test.", ("kind",))
+        self.addCleanup(metrics.REGISTRY.pop, counter.name)
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        # Pretend the file belongs to an exited worker.
+        path = os.path.join(self.directory, f"{os.getpid()}.metrics")
+        os.rename(path, os.path.join(self.directory, "1.metrics"))
+        self.store._map = None
+        counter.inc("a")
+        counter.inc("b")
+
+        self.assertEqual(
+            metrics.collect_samples(self.directory),
+            {'test_events_total{kind="a"}': 4.0, 'test_events_total{kind="b"}': 1.0},
+        )
+
+    def test_files_of_exited_processes_are_archived(self) -> None:
+        name = f"{os.getpid()}.metrics"
+        self.store.inc("test_key", 2)
+        # Above the highest pid Linux hands out.
+        os.rename(
+            os.path.join(self.directory, name),
+            os.path.join(self.directory, f"{2 ** 22 + 1}.metrics"),
+        )
+        self.store._map = None
+        self.store.inc("test_key", 3)
+
+        self.assertEqual(
+            metrics.collect_samples(self.directory), {"test_key": 5.0}
+        )
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), [".lock", name, metrics.ARCHIVE]
+        )
+
+        # A new process reusing the pid.
+        self.store._map = None
+        self.store.inc("test_key")
+
+        self.assertEqual(
+            metrics.collect_samples(self.directory), {"test_key": 6.0}
+        )
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), [".lock", name, metrics.ARCHIVE]
+        )
+
+    def test_file_grows_when_full(self) -> None:
+        for index in range(20):
+            self.store.inc(f"test_key_{index}", index)
+
+        samples = metrics.collect_samples(self.directory)
+
+        self.assertEqual(len(samples), 20)
+        self.assertEqual(samples["test_key_19"], 19)
+
+    @override_settings(METRICS_MIDDLEWARE=False)
+    def test_nothing_is_recorded_when_metrics_are_off(self) -> None:
+        metrics.CACHE_REQUESTS.inc("test", "hit")
+        metrics.REQUEST_DURATION.observe(0.1, "X.list")
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_histogram_buckets_are_rendered_cumulative(self) -> None:
+        histogram = metrics.Histogram(
+            "test_duration_seconds", "Test.", ("view",), buckets=(0.1, 1)
+        )
+        self.addCleanup(metrics.REGISTRY.pop, histogram.name)
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value, "X.list")
+
+        output = metrics.generate_latest(self.directory)
+
+        self.assertIn("# TYPE test_duration_seconds histogram", output)
+        for line in (
+            'test_duration_seconds_bucket{view="X.list",le="0.1"} 1.0',
+            'test_duration_seconds_bucket{view="X.list",le="1.0"} 3.0',
+            'test_duration_seconds_bucket{view="X.list",le="+Inf"} 4.0',
+            'test_duration_seconds_sum{view="X.list"} 6.05',
+            'test_duration_seconds_count{view="X.list"} 4.0',
+        ):
+            self.assertIn(line, output)
+
+
+class MetricsEndpointTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command(
+            "seed_airport",
+            airports=4,
+            routes=4,
+            airplanes=2,
+            crews=4,
+            flights=5,
+            users=2,
+            tickets=20,
+            stdout=StringIO(),
+        )
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(
+            metrics, "store", metrics.MetricsFile(directory.name)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        settings_override = override_settings(
+            METRICS_DIR=directory.name, METRICS_TOKEN="secret"
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+    def scrape(self, token="secret"):
+        return self.client.get(METRICS_URL, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_requests_are_recorded_per_action(self) -> None:
+        self.client.get(reverse("airport:flight-list"))
+
+        output = self.scrape().content.decode()
+
+        self.assertIn(
+            'http_request_duration_seconds_count{view="FlightViewSet.list"} 1.0',
+            output,
+        )
+        self.assertIn(
+            'http_requests_total{view="FlightViewSet.list",status="200"} 1.0',
+            output,
+        )
+        for phase in ("db", "serialize", "render"):
+            self.assertIn(
+                "http_request_phase_duration_seconds_count"
+                f'{{view="FlightViewSet.list",phase="{phase}"}} 1.0',
+                output,
+            )
+
+    def test_booking_conflicts_are_counted(self) -> None:
+        ticket = Ticket.objects.select_related("order__user").first()
+        self.client.force_authenticate(get_user_model().objects.first())
+
+        response = self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {
+                        "row": ticket.row,
+                        "seat": ticket.seat,
+                        "flight": ticket.flight_id,
+                    }
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(
+            'booking_conflicts_total{reason="taken"} 1.0',
+            self.scrape().content.decode(),
+        )
+
+    def test_token_is_required(self) -> None:
+        response = self.scrape()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertEqual(self.scrape("wrong").status_code, 403)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+    def test_denied_without_a_configured_token(self) -> None:
+        with self.settings(METRICS_TOKEN=None):
+            response = self.scrape("None")
+
+        self.assertEqual(response.status_code, 403)
@@ -103,6 +103,31 @@ class PrivateOrderApiTest(TestCase):
 
         self.assertEqual(Order.objects.count(), initial_order_count)
 
+    def test_create_order_with_taken_seats(self) -> None:
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight1.id},
+                {"row": 9, "seat": 6, "flight": self.flight1.id},
+                {"row": 2, "seat": 2, "flight": self.flight2.id},
+                {"row": 2, "seat": 2, "flight": self.flight2.id},
+            ]
+        }
+        res = self.client.post(ORDERS_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [bool(error) for error in res.data["tickets"]],
+            [False, True, True, True],
+        )
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_create_order_with_unknown_flight(self) -> None:
+        payload = {"tickets": [{"row": 1, "seat": 1, "flight": 0}]}
+        res = self.client.post(ORDERS_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flight", res.data["tickets"][0])
+
     def test_delete_order_not_allowed(self) -> None:
         url = reverse("airport:order-detail", args=[self.order1.id])
         res = self.client.delete(url)
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order
+from airport.pagination import EstimatedCountPaginator
+
+ORDERS_URL = reverse("airport:order-list")
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = get_user_model().objects.create_user(
+            "a@a.com", "Testpass123@"
+        )
+        Order.objects.bulk_create(Order(user=cls.user) for _ in range(12))
+
+    def test_small_or_unsupported_querysets_are_counted(self) -> None:
+        paginator = EstimatedCountPaginator(Order.objects.all(), 5)
+
+        self.assertEqual(paginator.count, 12)
+        self.assertTrue(paginator.count_is_exact)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=5)
+    def test_large_querysets_use_the_estimate(self) -> None:
+        with mock.patch("airport.pagination.estimate_count", return_value=8):
+            paginator = EstimatedCountPaginator(Order.objects.all(), 5)
+
+            self.assertEqual(paginator.count, 8)
+            self.assertFalse(paginator.count_is_exact)
+            # Pages past the estimate are still served.
+            self.assertTrue(paginator.page(2).has_next())
+            self.assertEqual(len(paginator.page(3).object_list), 2)
+            self.assertFalse(paginator.page(3).has_next())
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=20)
+    def test_small_filtered_result_is_counted_with_one_query(self) -> None:
+        queryset = Order.objects.filter(user=self.user)
+
+        with mock.patch("airport.pagination.estimate_count") as estimate:
+            with self.assertNumQueries(1):
+                self.assertEqual(EstimatedCountPaginator(queryset, 5).count, 12)
+        estimate.assert_not_called()
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=10)
+    def test_large_filtered_result_uses_the_estimate(self) -> None:
+        queryset = Order.objects.filter(user=self.user)
+
+        with mock.patch("airport.pagination.estimate_count", return_value=7):
+            paginator = EstimatedCountPaginator(queryset, 5)
+
+            # Never less than the rows counted up to the threshold.
+            self.assertEqual(paginator.count, 10)
+            self.assertFalse(paginator.count_is_exact)
+
+
+class OrderPaginationApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "b@b.com", "Testpass123@"
+        )
+        self.client.force_authenticate(self.user)
+        Order.objects.bulk_create(Order(user=self.user) for _ in range(7))
+
+    def test_response_says_whether_count_is_exact(self) -> None:
+        res = self.client.get(ORDERS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 7)
+        self.assertIs(res.data["count_is_exact"], True)
+        self.assertIsNotNone(res.data["next"])
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=5)
+    def test_estimated_count_is_flagged(self) -> None:
+        with mock.patch("airport.pagination.estimate_count", return_value=6):
+            res = self.client.get(ORDERS_URL, {"page": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 6)
+        self.assertIs(res.data["count_is_exact"], False)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["next"])
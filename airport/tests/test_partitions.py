@@ -0,0 +1,183 @@
+from datetime import date, datetime, timezone
+from importlib import import_module
+from io import StringIO
+from unittest import skipUnless
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.partitions import (
+    ARCHIVE_SCHEMA,
+    DEFAULT_PARTITION,
+    FLIGHT_IDS,
+    PARTITION_NAME,
+    add_months,
+    bounds,
+    create_partition,
+    default_months,
+    existing_partitions,
+    month_start,
+    partition_name,
+)
+
+
+class FlightPartitionsTest(SimpleTestCase):
+    def test_month_arithmetic(self) -> None:
+        month = month_start(datetime(2025, 11, 17, 8, tzinfo=timezone.utc))
+
+        self.assertEqual(month, date(2025, 11, 1))
+        self.assertEqual(add_months(month, 2), date(2026, 1, 1))
+        self.assertEqual(add_months(month, -11), date(2024, 12, 1))
+
+    def test_partition_covers_its_month_in_utc(self) -> None:
+        month = date(2025, 12, 1)
+
+        self.assertEqual(
+            bounds(month),
+            (
+                datetime(2025, 12, 1, tzinfo=timezone.utc),
+                datetime(2026, 1, 1, tzinfo=timezone.utc),
+            ),
+        )
+        self.assertEqual(partition_name(month), "airport_flight_2025_12")
+        self.assertTrue(PARTITION_NAME.match(partition_name(month)))
+        self.assertFalse(PARTITION_NAME.match("airport_flight_default"))
+
+    def test_command_needs_postgresql(self) -> None:
+        with self.assertRaisesMessage(CommandError, "PostgreSQL"):
+            call_command("flight_partitions")
+
+    def test_migration_matches_the_partition_names(self) -> None:
+        migration = import_module("airport.migrations.0007_partition_flights")
+
+        self.assertEqual(migration.DEFAULT_PARTITION, DEFAULT_PARTITION)
+        self.assertEqual(migration.FLIGHT_IDS, FLIGHT_IDS)
+        self.assertTrue(migration.Migration.operations[0].reversible)
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+class PartitionedFlightTableTest(TestCase):
+    def setUp(self) -> None:
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="test-type"),
+        )
+        route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Boryspil", closet_big_city="Kyiv"
+            ),
+            destination=Airport.objects.create(
+                name="Balice", closet_big_city="Krakow"
+            ),
+            distance=500,
+        )
+        self.old_month = date(2001, 1, 1)
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2001, 1, 15, 8, tzinfo=timezone.utc),
+            arrival_time=datetime(2001, 1, 15, 10, tzinfo=timezone.utc),
+        )
+        self.order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                "test@test.com", "Testpass123@"
+            )
+        )
+        self.ticket = Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+
+    def count(self, query, params=()) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+
+    def flight_ids(self) -> int:
+        return self.count(
+            f"SELECT count(*) FROM {FLIGHT_IDS} WHERE id = %s", [self.flight.id]
+        )
+
+    def test_flight_goes_to_its_months_partition(self) -> None:
+        with connection.cursor() as cursor:
+            self.assertNotIn(self.old_month, existing_partitions(cursor))
+            self.assertEqual(default_months(cursor), [self.old_month])
+            create_partition(cursor, self.old_month)
+            self.assertEqual(default_months(cursor), [])
+
+        later = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time=datetime(2001, 1, 20, 8, tzinfo=timezone.utc),
+            arrival_time=datetime(2001, 1, 20, 10, tzinfo=timezone.utc),
+        )
+
+        self.assertEqual(
+            self.count(f"SELECT count(*) FROM {partition_name(self.old_month)}"),
+            2,
+        )
+        self.assertEqual(
+            self.count(
+                f"SELECT count(*) FROM {FLIGHT_IDS} WHERE id IN (%s, %s)",
+                [self.flight.id, later.id],
+            ),
+            2,
+        )
+
+    def test_ticket_needs_an_existing_flight(self) -> None:
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+                cursor.execute(
+                    f"INSERT INTO {Ticket._meta.db_table} "
+                    '("row", seat, flight_id, order_id) VALUES (1, 2, %s, %s)',
+                    [self.flight.id + 1000, self.order.id],
+                )
+
+    def test_deleted_flight_leaves_the_ids(self) -> None:
+        Flight.objects.filter(pk=self.flight.pk).delete()
+
+        self.assertEqual(self.flight_ids(), 0)
+
+    def test_old_months_are_split_off_and_archived(self) -> None:
+        call_command("flight_partitions", keep=1, stdout=StringIO())
+
+        with connection.cursor() as cursor:
+            self.assertNotIn(self.old_month, existing_partitions(cursor))
+            self.assertEqual(default_months(cursor), [])
+        archived = f"{ARCHIVE_SCHEMA}.{Ticket._meta.db_table}_2001_01"
+        self.assertEqual(self.count(f"SELECT count(*) FROM {archived}"), 1)
+        self.assertEqual(
+            self.count(
+                f"SELECT count(*) FROM "
+                f"{ARCHIVE_SCHEMA}.{partition_name(self.old_month)}"
+            ),
+            1,
+        )
+        self.assertFalse(Ticket.objects.filter(pk=self.ticket.pk).exists())
+        self.assertEqual(self.flight_ids(), 0)
+
+    def test_migration_round_trip(self) -> None:
+        migration = import_module("airport.migrations.0007_partition_flights")
+
+        with connection.schema_editor() as editor:
+            migration.unpartition_flights(apps, editor)
+            with connection.cursor() as cursor:
+                self.assertEqual(existing_partitions(cursor), [])
+            migration.partition_flights(apps, editor)
+
+        with connection.cursor() as cursor:
+            self.assertIn(self.old_month, existing_partitions(cursor))
+        self.assertEqual(self.flight_ids(), 1)
+        self.assertTrue(Ticket.objects.filter(pk=self.ticket.pk).exists())
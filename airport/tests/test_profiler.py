@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport_api_service.profiling import collapse, sampler
+
+FLIGHTS_URL = reverse("airport:flight-list")
+
+
+def busy_wait(seconds) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class SamplerTest(TestCase):
+    def test_samples_stacks_of_registered_thread(self) -> None:
+        thread_id = threading.get_ident()
+        samples = sampler.start(thread_id)
+        try:
+            busy_wait(0.1)
+        finally:
+            sampler.stop(thread_id)
+
+        self.assertTrue(samples)
+        self.assertTrue(any("busy_wait" in stack[-1] for stack in samples))
+
+    def test_collapse_counts_identical_stacks(self) -> None:
+        self.assertEqual(
+            collapse([("a", "b"), ("a", "c"), ("a", "b")]),
+            "a;b 2\na;c 1\n",
+        )
+
+
+class SamplingProfilerMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(
+            PROFILER_ENABLED=True,
+            PROFILER_DIR=self.directory,
+            PROFILER_SAMPLE_RATE=1,
+            PROFILER_SLOW_THRESHOLD=0,
+            PROFILER_MAX_FILES=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+    def profiles(self) -> list:
+        return sorted(
+            name[:-len(".json")]
+            for name in os.listdir(self.directory)
+            if name.endswith(".json") and name != "control.json"
+        )
+
+    def test_sampled_request_writes_profile_with_sql_timeline(self) -> None:
+        self.client.get(FLIGHTS_URL)
+
+        [profile] = self.profiles()
+        with open(os.path.join(self.directory, profile + ".json")) as sidecar:
+            info = json.load(sidecar)
+        self.assertEqual(info["reason"], "sampled")
+        self.assertEqual(info["view"], "FlightViewSet.list")
+        self.assertEqual(info["status"], 200)
+        self.assertTrue(info["sql"])
+        self.assertIn("SELECT", info["sql"][0]["sql"])
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, profile + ".collapsed"))
+        )
+
+    def test_only_newest_profiles_are_kept(self) -> None:
+        for _ in range(3):
+            self.client.get(FLIGHTS_URL)
+
+        self.assertEqual(len(self.profiles()), 2)
+
+    @override_settings(PROFILER_SAMPLE_RATE=0, PROFILER_SLOW_THRESHOLD=1e-9)
+    def test_slow_request_is_profiled(self) -> None:
+        self.client.get(FLIGHTS_URL)
+
+        [profile] = self.profiles()
+        with open(os.path.join(self.directory, profile + ".json")) as sidecar:
+            self.assertEqual(json.load(sidecar)["reason"], "slow")
+
+    @override_settings(PROFILER_SAMPLE_RATE=0, PROFILER_SLOW_THRESHOLD=60)
+    def test_fast_request_is_not_profiled(self) -> None:
+        self.client.get(FLIGHTS_URL)
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_profiler_can_be_turned_off_at_runtime(self) -> None:
+        call_command("profiler", "off", stdout=StringIO())
+
+        self.client.get(FLIGHTS_URL)
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_control_command_overrides_settings(self) -> None:
+        call_command("profiler", "on", sample_rate=5, slow_ms=250, stdout=StringIO())
+        output = StringIO()
+
+        call_command("profiler", "status", stdout=output)
+
+        self.assertIn("sample_rate: 5", output.getvalue())
+        self.assertIn("slow_threshold: 0.25", output.getvalue())
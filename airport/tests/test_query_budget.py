@@ -0,0 +1,118 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order, Route
+from airport.views import FlightViewSet
+from airport_api_service.query_budget import QueryBudgetTestMixin
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command(
+            "seed_airport",
+            airports=6,
+            routes=10,
+            airplanes=4,
+            crews=8,
+            flights=20,
+            users=3,
+            tickets=300,
+            stdout=StringIO(),
+        )
+        cls.user = get_user_model().objects.filter(order__isnull=False).first()
+        cls.admin = get_user_model().objects.create_superuser(
+            "admin@admin.com", "Testpassword123@"
+        )
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_read_endpoints_are_within_budget(self) -> None:
+        flight = Flight.objects.first()
+        urls = [
+            reverse("airport:flight-list"),
+            reverse("airport:flight-list") + "?source=Kyiv",
+            reverse("airport:flight-detail", args=[flight.id]),
+            reverse("airport:route-list"),
+            reverse("airport:route-detail", args=[Route.objects.first().id]),
+            reverse("airport:airport-list"),
+            reverse("airport:airplane-list"),
+            reverse("airport:airplanetype-list"),
+            reverse("airport:crew-list"),
+            reverse("airport:order-list"),
+            reverse(
+                "airport:order-detail",
+                args=[Order.objects.filter(user=self.user).first().id],
+            ),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(self.client.get(url))
+
+    def test_create_order_is_within_budget(self) -> None:
+        tickets = []
+        for flight in Flight.objects.select_related("airplane")[:2]:
+            taken = set(flight.tickets.values_list("row", "seat"))
+            tickets += [
+                {"row": row, "seat": seat, "flight": flight.id}
+                for row in range(1, flight.airplane.rows + 1)
+                for seat in range(1, flight.airplane.seats_in_row + 1)
+                if (row, seat) not in taken
+            ][:10]
+
+        response = self.client.post(
+            reverse("airport:order-list"), {"tickets": tickets}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["tickets"]), 20)
+        self.assertWithinQueryBudget(response)
+
+    def test_create_flight_is_within_budget(self) -> None:
+        self.client.force_authenticate(self.admin)
+        flight = Flight.objects.first()
+
+        response = self.client.post(
+            reverse("airport:flight-list"),
+            {
+                "route": flight.route_id,
+                "airplane": flight.airplane_id,
+                "departure_time": "2025-01-01T10:00:00Z",
+                "arrival_time": "2025-01-01T12:00:00Z",
+                "crews": list(flight.crews.values_list("id", flat=True)),
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertWithinQueryBudget(response)
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    def test_query_headers(self) -> None:
+        response = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(
+            int(response["X-Query-Count"]), response.query_stats.count
+        )
+        self.assertIn("X-Query-Duplicates", response)
+        self.assertIn("X-Query-Time", response)
+        self.assertIn("X-Query-Budget", response)
+
+    @override_settings(QUERY_BUDGET_HEADERS=False)
+    @mock.patch.object(FlightViewSet, "query_budget", {"list": 0})
+    def test_over_budget_is_logged(self) -> None:
+        with self.assertLogs(
+            "airport_api_service.query_budget", "WARNING"
+        ) as logs:
+            response = self.client.get(reverse("airport:flight-list"))
+
+        self.assertNotIn("X-Query-Count", response)
+        self.assertIn("over its budget of 0", logs.output[0])
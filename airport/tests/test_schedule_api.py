@@ -0,0 +1,180 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Route,
+)
+from airport.schedules import expand
+
+SCHEDULES_URL = reverse("airport:flightschedule-list")
+
+
+def generate_url(schedule_id) -> str:
+    return reverse("airport:flightschedule-generate", args=[schedule_id])
+
+
+class FlightScheduleApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@admin.com", "Testpass123@"
+        )
+        self.client.force_authenticate(self.admin)
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6,
+            airplane_type=airplane_type,
+        )
+        kyiv = Airport.objects.create(name="Boryspil", closet_big_city="Kyiv")
+        krakow = Airport.objects.create(name="Balice", closet_big_city="Krakow")
+        self.route = Route.objects.create(
+            source=kyiv, destination=krakow, distance=500
+        )
+        self.crews = [
+            Crew.objects.create(first_name="Test", last_name=f"Crew{i}")
+            for i in range(2)
+        ]
+
+    def create_schedule(self, **params):
+        payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            # Mondays and Fridays
+            "weekdays": "15",
+            "departure_time": "08:30",
+            "duration": "01:30:00",
+            "valid_from": "2025-06-01",
+            "valid_until": "2025-06-30",
+            "crews": [crew.id for crew in self.crews],
+        }
+        payload.update(params)
+        return self.client.post(SCHEDULES_URL, payload, format="json")
+
+    def test_expand_follows_weekly_pattern(self) -> None:
+        schedule = FlightSchedule(
+            weekdays="15",
+            departure_time=time(8, 30),
+            duration=timedelta(hours=1, minutes=30),
+            valid_from=date(2025, 6, 1),
+            valid_until=date(2025, 6, 30),
+        )
+
+        slots = expand(schedule)
+
+        self.assertEqual(len(slots), 9)
+        self.assertEqual(
+            slots[0],
+            (
+                datetime(2025, 6, 2, 8, 30, tzinfo=timezone.utc),
+                datetime(2025, 6, 2, 10, 0, tzinfo=timezone.utc),
+            ),
+        )
+        self.assertTrue(
+            all(departure.isoweekday() in (1, 5) for departure, _ in slots)
+        )
+
+    def test_invalid_schedule_is_rejected(self) -> None:
+        for params in (
+            {"weekdays": "18"},
+            {"weekdays": "11"},
+            {"duration": "00:00:00"},
+            {"valid_until": "2025-05-01"},
+        ):
+            with self.subTest(params):
+                res = self.create_schedule(**params)
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_generate_creates_flights_in_bulk(self) -> None:
+        schedule_id = self.create_schedule().data["id"]
+
+        with self.assertNumQueries(14):
+            res = self.client.post(generate_url(schedule_id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {"created": 9, "skipped": 0})
+        flights = Flight.objects.filter(schedule_id=schedule_id)
+        self.assertEqual(flights.count(), 9)
+        self.assertEqual(
+            Flight.crews.through.objects.filter(flight__in=flights).count(), 18
+        )
+
+    def test_generate_again_skips_existing_flights(self) -> None:
+        schedule_id = self.create_schedule().data["id"]
+        self.client.post(generate_url(schedule_id))
+        self.client.patch(
+            reverse("airport:flightschedule-detail", args=[schedule_id]),
+            {"valid_until": "2025-07-07"},
+            format="json",
+        )
+
+        res = self.client.post(generate_url(schedule_id))
+
+        self.assertEqual(res.data, {"created": 2, "skipped": 9})
+
+    def test_airplane_overlap_rejects_whole_batch(self) -> None:
+        Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=datetime(2025, 6, 13, 9, 0, tzinfo=timezone.utc),
+            arrival_time=datetime(2025, 6, 13, 11, 0, tzinfo=timezone.utc),
+        )
+        schedule_id = self.create_schedule().data["id"]
+
+        res = self.client.post(generate_url(schedule_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Airplane", res.data["conflicts"][0])
+        self.assertFalse(Flight.objects.filter(schedule_id=schedule_id).exists())
+
+    def test_crew_overlap_rejects_whole_batch(self) -> None:
+        other_airplane = Airplane.objects.create(
+            name="Other", rows=5, seats_in_row=4,
+            airplane_type=self.airplane.airplane_type,
+        )
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=other_airplane,
+            departure_time=datetime(2025, 6, 2, 7, 0, tzinfo=timezone.utc),
+            arrival_time=datetime(2025, 6, 2, 9, 0, tzinfo=timezone.utc),
+        )
+        flight.crews.add(self.crews[1])
+        schedule_id = self.create_schedule().data["id"]
+
+        res = self.client.post(generate_url(schedule_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["conflicts"],
+            [
+                f"Crew {self.crews[1].id}: flight {flight.id} overlaps "
+                f"new flight at 2025-06-02 08:30"
+            ],
+        )
+
+    def test_overlaps_within_the_batch_are_found(self) -> None:
+        schedule_id = self.create_schedule(
+            weekdays="12", duration="30:00:00"
+        ).data["id"]
+
+        res = self.client.post(generate_url(schedule_id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_schedules_are_admin_only(self) -> None:
+        self.client.force_authenticate(None)
+
+        res = self.client.get(SCHEDULES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
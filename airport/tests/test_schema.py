@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from airport_api_service.schema import artifact
+
+SCHEMA_URL = reverse("schema")
+
+
+class StaticSchemaViewTest(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "openapi.json.gz")
+        settings_override = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        artifact._mtime = None
+
+    def test_schema_is_built_on_first_use(self) -> None:
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(self.path))
+        schema = json.loads(response.content)
+        self.assertIn("/api/airport/flights/", schema["paths"])
+        self.assertIn("max-age=", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_gzip_is_served_as_stored(self) -> None:
+        call_command("build_schema", stdout=StringIO())
+
+        response = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        with open(self.path, "rb") as stored:
+            self.assertEqual(response.content, stored.read())
+
+    def test_matching_etag_is_not_modified(self) -> None:
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        response = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    @override_settings(OPENAPI_SCHEMA_BUILD_ON_DEMAND=False)
+    def test_missing_schema_is_not_generated_on_request(self) -> None:
+        with self.assertLogs("airport_api_service.schema", "ERROR"):
+            response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_check_detects_outdated_schema(self) -> None:
+        call_command("build_schema", stdout=StringIO())
+        call_command("build_schema", check=True, stdout=StringIO())
+
+        with gzip.open(self.path, "wb") as stored:
+            stored.write(b"{}")
+
+        with self.assertRaisesMessage(CommandError, "out of date"):
+            call_command("build_schema", check=True, stdout=StringIO())
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, F, Q
+from django.test import TestCase
+
+from airport.models import Airport, Flight, Order, Route, Ticket
+
+
+def seed(**options) -> None:
+    counts = {
+        "airports": 6,
+        "routes": 10,
+        "airplanes": 4,
+        "crews": 8,
+        "flights": 20,
+        "users": 5,
+        "tickets": 600,
+    }
+    call_command("seed_airport", stdout=StringIO(), **{**counts, **options})
+
+
+def ticket_snapshot() -> list:
+    return list(
+        Ticket.objects.order_by(
+            "flight__departure_time", "flight__route__source__name", "row", "seat"
+        ).values_list(
+            "flight__departure_time",
+            "flight__route__source__name",
+            "flight__route__destination__name",
+            "row",
+            "seat",
+        )
+    )
+
+
+class SeedAirportCommandTest(TestCase):
+    def test_seed_creates_requested_counts(self) -> None:
+        seed()
+
+        self.assertEqual(Airport.objects.count(), 6)
+        self.assertEqual(Route.objects.count(), 10)
+        self.assertEqual(Flight.objects.count(), 20)
+        self.assertEqual(Ticket.objects.count(), 600)
+        self.assertFalse(
+            Order.objects.annotate(tickets_count=Count("tickets")).filter(
+                tickets_count=0
+            ).exists()
+        )
+
+    def test_seed_is_deterministic(self) -> None:
+        seed(seed=7)
+        first = ticket_snapshot()
+
+        seed(seed=7, clear=True)
+
+        self.assertEqual(ticket_snapshot(), first)
+
+    def test_tickets_fit_airplane_seats(self) -> None:
+        seed()
+
+        out_of_range = Ticket.objects.filter(
+            Q(row__lt=1)
+            | Q(seat__lt=1)
+            | Q(row__gt=F("flight__airplane__rows"))
+            | Q(seat__gt=F("flight__airplane__seats_in_row"))
+        )
+        self.assertFalse(out_of_range.exists())
+
+    def test_tickets_are_capped_by_capacity(self) -> None:
+        seed(tickets=10 ** 6)
+
+        capacity = sum(
+            flight.airplane.rows * flight.airplane.seats_in_row
+            for flight in Flight.objects.select_related("airplane")
+        )
+        self.assertEqual(Ticket.objects.count(), capacity)
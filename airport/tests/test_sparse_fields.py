@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight
+
+FLIGHTS_URL = reverse("airport:flight-list")
+ROUTES_URL = reverse("airport:route-list")
+
+
+class SparseFieldsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command(
+            "seed_airport",
+            airports=6,
+            routes=10,
+            airplanes=3,
+            crews=8,
+            flights=20,
+            users=2,
+            tickets=100,
+            stdout=StringIO(),
+        )
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def get_both(self, url, params) -> tuple:
+        # Seeded flights have departed already.
+        params = {"history": "true", **params}
+        fast = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_fields_limit_flight_list(self) -> None:
+        res = self.get_both(FLIGHTS_URL, {"fields": "id,departure_time"})
+
+        self.assertEqual(set(res.data[0]), {"id", "departure_time"})
+
+    def test_fields_skip_joins_and_prefetches(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                FLIGHTS_URL, {"fields": "id,departure_time", "history": "true"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("JOIN", queries[0]["sql"])
+
+    def test_expand_embeds_route_airports(self) -> None:
+        res = self.get_both(
+            FLIGHTS_URL, {"fields": "id,route", "expand": "route"}
+        )
+        flight = Flight.objects.select_related("route__source").get(
+            id=res.data[0]["id"]
+        )
+
+        self.assertEqual(
+            res.data[0]["route"]["source"],
+            {
+                "id": flight.route.source.id,
+                "code": None,
+                "name": flight.route.source.name,
+                "closet_big_city": flight.route.source.closet_big_city,
+                "latitude": None,
+                "longitude": None,
+            },
+        )
+
+    def test_expand_flight_crews_and_airplane(self) -> None:
+        res = self.get_both(FLIGHTS_URL, {"expand": "crews,airplane"})
+
+        self.assertIn("airplane_type", res.data[0]["airplane"])
+        self.assertIn("first_name", res.data[0]["crews"][0])
+        self.assertIn("tickets_available", res.data[0])
+
+    def test_expand_route_list_airports(self) -> None:
+        res = self.get_both(ROUTES_URL, {"expand": "destination"})
+
+        self.assertIn("name", res.data[0]["destination"])
+        self.assertIsInstance(res.data[0]["source"], str)
+
+    def test_unknown_fields_are_rejected(self) -> None:
+        res = self.client.get(FLIGHTS_URL, {"fields": "id,price"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", res.data)
+
+        res = self.client.get(ROUTES_URL, {"expand": "distance"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("expand", res.data)
+
+    def test_retrieve_with_fields(self) -> None:
+        flight = Flight.objects.first()
+
+        res = self.client.get(
+            reverse("airport:flight-detail", args=[flight.id]),
+            {"fields": "id,arrival_time"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {"id", "arrival_time"})
@@ -9,6 +9,7 @@ from airport.views import (
     AirplaneViewSet,
     OrderViewSet,
     FlightViewSet,
+    FlightScheduleViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -19,6 +20,7 @@ router.register("routes", RouteViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("orders", OrderViewSet)
 router.register("flights", FlightViewSet)
+router.register("schedules", FlightScheduleViewSet)
 
 
 urlpatterns = [
@@ -1,11 +1,27 @@
-from django.db.models import F, Count, Prefetch
+from datetime import datetime, time, timedelta
+
+from django.db.models import (
+    F,
+    Count,
+    Min,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
+from airport.autocomplete import suggest
+from airport.boards import ARRIVALS, DEPARTURES, get_board
+from airport.fast_serializers import FastListMixin
+from airport.geo import nearest_airports
 from airport.models import (
     Crew,
     Airport,
@@ -14,10 +30,22 @@ from airport.models import (
     Airplane,
     Order,
     Flight,
+    FlightSchedule,
+    RouteDailyLoad,
     Ticket,
 )
+from airport.pagination import EstimatedCountPagination
 from airport.permissions import IsAdminOrReadOnly
+from airport.schedules import generate_flights
+from airport.sparse_fields import SparseFieldsViewMixin
 from airport.serializers import (
+    AirportSuggestionSerializer,
+    ArrivalSerializer,
+    AutocompleteQuerySerializer,
+    BoardQuerySerializer,
+    DepartureSerializer,
+    NearestAirportQuerySerializer,
+    NearestAirportSerializer,
     CrewSerializer,
     AirportSerializer,
     AirplaneTypeSerializer,
@@ -33,11 +61,19 @@ from airport.serializers import (
     FlightDetailSerializer,
     FlightSerializer,
     CrewImageSerializer,
+    FlightScheduleSerializer,
+    FlightCalendarDaySerializer,
+    FlightCalendarQuerySerializer,
+    LoadFactorQuerySerializer,
+    RouteDailyLoadSerializer,
+    RouteLoadSerializer,
 )
+from user.throttling import ScopedRateThrottle
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Crew.objects.all()
+    query_budget = {"list": 1, "retrieve": 1, "upload_image": 2}
     permission_classes = (IsAdminOrReadOnly,)
 
     def get_serializer_class(self):
@@ -63,16 +99,139 @@ class CrewViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Airport.objects.all()
+    query_budget = {
+        "list": 1,
+        "retrieve": 1,
+        "departures": 3,
+        "arrivals": 3,
+        "autocomplete": 3,
+        "nearest": 1,
+    }
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    # Set by the actions throttled with ScopedRateThrottle.
+    throttle_scope = None
+
+    def get_board(self, kind, serializer_class):
+        query = BoardQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        try:
+            airport_id = int(self.kwargs["pk"])
+        except ValueError:
+            raise NotFound()
+
+        board = get_board(
+            kind,
+            airport_id,
+            query.validated_data["hours"],
+            lambda flights: serializer_class(flights, many=True).data,
+        )
+        if board is None:
+            raise NotFound()
+        return Response(board)
+
+    # Boards are served from memory and polled by screens all day long,
+    # under a per-client rate of their own.
+    @extend_schema(
+        parameters=[BoardQuerySerializer],
+        responses=DepartureSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="departures",
+        throttle_classes=(ScopedRateThrottle,),
+        throttle_scope="boards",
+    )
+    def departures(self, request, pk=None):
+        """Flights leaving the airport in the next hours"""
+        return self.get_board(DEPARTURES, DepartureSerializer)
+
+    @extend_schema(
+        parameters=[BoardQuerySerializer],
+        responses=ArrivalSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="arrivals",
+        throttle_classes=(ScopedRateThrottle,),
+        throttle_scope="boards",
+    )
+    def arrivals(self, request, pk=None):
+        """Flights reaching the airport in the next hours"""
+        return self.get_board(ARRIVALS, ArrivalSerializer)
+
+    # Answered from memory on every keystroke, under a per-client rate of
+    # its own.
+    @extend_schema(
+        parameters=[AutocompleteQuerySerializer],
+        responses=AirportSuggestionSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="autocomplete",
+        throttle_classes=(ScopedRateThrottle,),
+        throttle_scope="autocomplete",
+    )
+    def autocomplete(self, request):
+        """Airports whose name or city words start like the query"""
+        query = AutocompleteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        return Response(
+            suggest(
+                query.validated_data["q"], query.validated_data["limit"]
+            )
+        )
+
+    # Answered from an in-memory spatial index, under a per-client rate of
+    # its own.
+    @extend_schema(
+        parameters=[NearestAirportQuerySerializer],
+        responses=NearestAirportSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="nearest",
+        throttle_classes=(ScopedRateThrottle,),
+        throttle_scope="nearest",
+    )
+    def nearest(self, request):
+        """Airports nearest to a point, within a radius in km"""
+        query = NearestAirportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        return Response(
+            nearest_airports(
+                params["lat"], params["lon"], params["limit"], params["radius"]
+            )
+        )
 
 
-class RouteViewSet(viewsets.ModelViewSet):
-    queryset = Route.objects.all().select_related("source", "destination")
+class RouteViewSet(
+    SparseFieldsViewMixin, FastListMixin, viewsets.ModelViewSet
+):
+    queryset = Route.objects.all()
+    query_budget = {
+        "list": 1, "retrieve": 1, "load_factor": 2, "load_factors": 1
+    }
     permission_classes = (IsAdminOrReadOnly,)
 
+    def get_queryset(self):
+        queryset = self.queryset
+
+        for airport in ("source", "destination"):
+            if self.wants(airport):
+                queryset = queryset.select_related(airport)
+
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "list":
             return RouteListSerializer
@@ -82,19 +241,78 @@ class RouteViewSet(viewsets.ModelViewSet):
 
         return RouteSerializer
 
+    def get_loads(self):
+        query = LoadFactorQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = query.validated_data
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+        loads = RouteDailyLoad.objects.filter(flights__gt=0)
+        if "since" in filters:
+            loads = loads.filter(day__gte=filters["since"])
+        if "until" in filters:
+            loads = loads.filter(day__lte=filters["until"])
+        if "airplane_type" in filters:
+            loads = loads.filter(airplane_type_id=filters["airplane_type"])
+        return loads
+
+    @extend_schema(
+        operation_id="airport_routes_load_factor_daily",
+        parameters=[LoadFactorQuerySerializer],
+        responses=RouteDailyLoadSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="load-factor",
+        permission_classes=(IsAdminUser,),
+    )
+    def load_factor(self, request, pk=None):
+        """Load factor of the route per day and airplane type"""
+        route = self.get_object()
+        loads = self.get_loads().filter(route=route).order_by(
+            "day", "airplane_type"
+        )
+        return Response(RouteDailyLoadSerializer(loads, many=True).data)
+
+    @extend_schema(
+        parameters=[LoadFactorQuerySerializer],
+        responses=RouteLoadSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="load-factor",
+        permission_classes=(IsAdminUser,),
+    )
+    def load_factors(self, request):
+        """Load factor of every route over the requested days"""
+        loads = (
+            self.get_loads()
+            .values("route")
+            .annotate(
+                flights=Sum("flights"), seats=Sum("seats"), sold=Sum("sold")
+            )
+            .order_by("route")
+        )
+        return Response(RouteLoadSerializer(loads, many=True).data)
+
+
+class AirplaneTypeViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = AirplaneType.objects.all()
+    query_budget = {"list": 1, "retrieve": 1}
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
-    queryset = Airplane.objects.all().select_related("airplane_type")
+class AirplaneViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Airplane.objects.all()
+    query_budget = {"list": 1, "retrieve": 1}
     permission_classes = (IsAdminOrReadOnly,)
 
     def get_queryset(self):
         queryset = self.queryset
+        if self.wants("airplane_type"):
+            queryset = queryset.select_related("airplane_type")
         name = self.request.query_params.get("name")
 
         if name:
@@ -124,27 +342,51 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class FlightViewSet(viewsets.ModelViewSet):
-    queryset = Flight.objects.all()
+class FlightViewSet(
+    SparseFieldsViewMixin, FastListMixin, viewsets.ModelViewSet
+):
+    # Without the tickets_available aggregate rows come in no stable order.
+    queryset = Flight.objects.order_by("id")
+    query_budget = {"list": 2, "retrieve": 4, "create": 11, "calendar": 1}
     permission_classes = (IsAdminOrReadOnly,)
 
     def get_queryset(self):
-        queryset = self.queryset.select_related(
-            "route",
-            "route__source",
-            "route__destination",
-            "airplane"
-        ).prefetch_related(
-            "crews",
-        ).annotate(
-            tickets_available=(
-                    F("airplane__rows") * F("airplane__seats_in_row") - Count("tickets")
+        queryset = self.queryset
+
+        if self.wants("route"):
+            queryset = queryset.select_related(
+                "route__source", "route__destination"
             )
-        )
+        if self.wants("airplane"):
+            queryset = queryset.select_related(
+                "airplane__airplane_type"
+                if self.action == "retrieve" or self.expands("airplane")
+                else "airplane"
+            )
+        if self.wants("crews"):
+            queryset = queryset.prefetch_related(
+                Prefetch("crews", queryset=Crew.objects.order_by("id")),
+            )
+        if self.action == "list" and self.wants("tickets_available"):
+            queryset = queryset.annotate(
+                tickets_available=(
+                    F("airplane__rows") * F("airplane__seats_in_row")
+                    - Count("tickets")
+                )
+            )
+
+        history = self.request.query_params.get("history")
+        if self.action == "list" and history not in ("true", "1"):
+            # Lets PostgreSQL skip the partitions of past months.
+            queryset = queryset.filter(departure_time__gte=timezone.now())
+
+        return self.filter_flights(queryset, self.request.query_params)
 
-        route = self.request.query_params.get("route")
-        source = self.request.query_params.get("source")
-        destination = self.request.query_params.get("destination")
+    @staticmethod
+    def filter_flights(queryset, params):
+        route = params.get("route")
+        source = params.get("source")
+        destination = params.get("destination")
 
         if route:
             route_id = int(route)
@@ -177,26 +419,101 @@ class FlightViewSet(viewsets.ModelViewSet):
             ),
             OpenApiParameter(
                 "source",
-                type={"type": "str"},
+                type={"type": "string"},
                 description="Filter by source  (ex. ?source=London)",
             ),
             OpenApiParameter(
                 "destination",
-                type={"type": "str"},
+                type={"type": "string"},
                 description="Filter by destination id (ex. ?destination=Paris)",
             ),
+            OpenApiParameter(
+                "history",
+                type={"type": "boolean"},
+                description="Include flights that already departed "
+                            "(ex. ?history=true)",
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[FlightCalendarQuerySerializer],
+        responses=FlightCalendarDaySerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="calendar")
+    def calendar(self, request):
+        """Flights and free seats per day of a route or a pair of cities"""
+        query = FlightCalendarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        zone = timezone.get_current_timezone()
+        sold = (
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        free_seats = F("airplane__rows") * F("airplane__seats_in_row") - (
+            Coalesce(Subquery(sold), 0)
+        )
+        days = (
+            self.filter_flights(Flight.objects.all(), params)
+            .filter(
+                departure_time__gte=datetime.combine(
+                    params["since"], time.min, tzinfo=zone
+                ),
+                departure_time__lt=datetime.combine(
+                    params["until"] + timedelta(days=1), time.min, tzinfo=zone
+                ),
+            )
+            .annotate(day=TruncDate("departure_time"))
+            .values("day")
+            .annotate(
+                flights=Count("id"),
+                min_free_seats=Min(free_seats),
+                free_seats=Sum(free_seats),
+                first_departure=Min("departure_time"),
+            )
+            .order_by("day")
+        )
+        return Response(FlightCalendarDaySerializer(days, many=True).data)
+
+
+class FlightScheduleViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = FlightSchedule.objects.all()
+    serializer_class = FlightScheduleSerializer
+    query_budget = {"list": 2, "retrieve": 2, "generate": 14}
+    permission_classes = (IsAdminUser,)
 
-class OrderPagination(PageNumberPagination):
+    def get_queryset(self):
+        if self.action == "generate":
+            return self.queryset
+        return self.queryset.prefetch_related("crews")
+
+    @action(methods=["POST"], detail=True, url_path="generate")
+    def generate(self, request, pk=None):
+        """Endpoint for creating the flights of a schedule in one batch"""
+        result = generate_flights(self.get_object())
+
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED
+            if result["created"]
+            else status.HTTP_200_OK,
+        )
+
+
+class OrderPagination(EstimatedCountPagination):
     page_size = 5
     max_page_size = 100
 
 
 class OrderViewSet(
+    SparseFieldsViewMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -204,6 +521,7 @@ class OrderViewSet(
 ):
     queryset = Order.objects.all()
     pagination_class = OrderPagination
+    query_budget = {"list": 4, "retrieve": 3, "create": 8}
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -215,15 +533,18 @@ class OrderViewSet(
                 queryset=prefetched_class.objects.select_related(*inner_prefetches),
             )
 
-        queryset = self.queryset.filter(user=self.request.user).prefetch_related(
-            get_prefetch_obj(
-                "tickets",
-                Ticket,
-                "flight__route__destination",
-                "flight__airplane",
-                "flight__route__source",
-            ), "tickets__flight__crews"
-        )
+        queryset = self.queryset.filter(user_id=self.request.user.id)
+
+        if self.wants("tickets"):
+            queryset = queryset.prefetch_related(
+                get_prefetch_obj(
+                    "tickets",
+                    Ticket,
+                    "flight__route__destination",
+                    "flight__airplane",
+                    "flight__route__source",
+                ), "tickets__flight__crews"
+            )
 
         return queryset
 
@@ -234,4 +555,4 @@ class OrderViewSet(
         return OrderSerializer
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
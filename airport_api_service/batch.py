@@ -0,0 +1,238 @@
+"""
+``/api/batch/``: several API calls in one round trip.
+
+The batch is authenticated once and every sub-request runs in-process
+against the resolved view as the same user (DRF forced authentication), so
+the JWT is not decoded again. Consecutive reads run concurrently on a pool
+of ``BATCH_MAX_WORKERS`` threads; a write waits for the reads before it and
+runs alone, so later sub-requests see its effect. A batch holds at most
+``BATCH_MAX_REQUESTS`` sub-requests and can't contain another batch.
+
+Sub-requests skip the middleware stack, so only DRF views, which
+authenticate, check permissions and throttle by themselves, can be called;
+a batch with any other path (admin, ``/metrics``) is rejected. Sub-requests
+ask for JSON, and one answered with anything else (the Swagger or ReDoc
+pages, the YAML schema) gets a 400 in place of its response.
+"""
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+from drf_spectacular.utils import extend_schema
+from rest_framework import renderers, serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+# Response headers that describe the batch, not a sub-request.
+SKIPPED_HEADERS = {"content-length", "vary", "allow"}
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"],
+        default="GET",
+    )
+    url = serializers.RegexField(r"^/")
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch."
+            )
+        for item in value:
+            try:
+                match = resolve(urlsplit(item["url"]).path)
+            except Resolver404:
+                continue
+            view_class = getattr(match.func, "cls", None)
+            if view_class is BatchView:
+                raise ValidationError("Batches can't be nested.")
+            if not (
+                isinstance(view_class, type) and issubclass(view_class, APIView)
+            ):
+                raise ValidationError(f"{item['url']} is not an API endpoint.")
+        return value
+
+
+class SubResponseSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = SubResponseSerializer(many=True)
+
+
+class WorkerPool:
+    """Threads running the reads of batches, shared by all requests."""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def map(self, function, items) -> list:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.BATCH_MAX_WORKERS,
+                    thread_name_prefix="batch",
+                )
+        return list(self._executor.map(function, items))
+
+
+pool = WorkerPool()
+
+
+def build_request(request, item) -> WSGIRequest:
+    """Return the sub-request ``item`` of the batch ``request``."""
+    url = urlsplit(item["url"])
+    body = b""
+    if "body" in item:
+        body = json.dumps(item["body"]).encode()
+
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH")
+    }
+    environ.update(
+        HTTP_ACCEPT="application/json",
+        REQUEST_METHOD=item["method"],
+        PATH_INFO=url.path,
+        QUERY_STRING=url.query,
+        CONTENT_LENGTH=str(len(body)),
+        **{"wsgi.input": io.BytesIO(body)},
+    )
+    if body:
+        environ["CONTENT_TYPE"] = "application/json"
+    subrequest = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        # Reuse the authentication of the batch. Anonymous sub-requests go
+        # through the authenticators to keep their 401 responses.
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def is_json(response) -> bool:
+    if isinstance(response, Response):
+        return isinstance(
+            getattr(response, "accepted_renderer", None), renderers.JSONRenderer
+        )
+    media_type = response.get("Content-Type", "").split(";")[0].strip()
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+def run(subrequest) -> dict:
+    try:
+        match = resolve(subrequest.path_info)
+    except Resolver404:
+        return {
+            "status": status.HTTP_404_NOT_FOUND,
+            "body": {"detail": "Not found."},
+        }
+
+    try:
+        response = match.func(subrequest, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception("Sub-request %s failed", subrequest.get_full_path())
+        return {
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "body": {"detail": "Server error."},
+        }
+
+    not_json = {
+        "status": status.HTTP_400_BAD_REQUEST,
+        "body": {"detail": "Not a JSON API endpoint."},
+    }
+    if not is_json(response):
+        return not_json
+    if isinstance(response, Response):
+        # Embedded as data, the batch response renders it once.
+        body = response.data
+    else:
+        content = (
+            b"".join(response.streaming_content)
+            if response.streaming
+            else response.content
+        )
+        try:
+            body = json.loads(content) if content else None
+        except ValueError:
+            return not_json
+    return {
+        "status": response.status_code,
+        "headers": {
+            name: value
+            for name, value in response.items()
+            if name.lower() not in SKIPPED_HEADERS
+        },
+        "body": body,
+    }
+
+
+def run_in_worker(subrequest) -> dict:
+    # What a request of the worker thread would do with its connection.
+    close_old_connections()
+    try:
+        return run(subrequest)
+    finally:
+        close_old_connections()
+
+
+class BatchView(APIView):
+    # Every sub-request is throttled by its own view.
+    throttle_classes = ()
+
+    @extend_schema(
+        request=BatchSerializer, responses=BatchResponseSerializer
+    )
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subrequests = [
+            build_request(request, item)
+            for item in serializer.validated_data["requests"]
+        ]
+
+        responses = []
+        reads = []
+        for subrequest in subrequests:
+            if subrequest.method in SAFE_METHODS:
+                reads.append(subrequest)
+                continue
+            responses += self.run_reads(reads)
+            reads = []
+            responses.append(run(subrequest))
+        responses += self.run_reads(reads)
+
+        return Response({"responses": responses})
+
+    @staticmethod
+    def run_reads(subrequests) -> list:
+        if len(subrequests) < 2 or settings.BATCH_MAX_WORKERS < 2:
+            return [run(subrequest) for subrequest in subrequests]
+        return pool.map(run_in_worker, subrequests)
@@ -0,0 +1,237 @@
+"""
+Negotiated compression of responses.
+
+``CompressionMiddleware`` picks the best encoding the client accepts in
+``Accept-Encoding`` (q-values included) among brotli and zstd, when their
+packages are installed, and gzip. Responses shorter than
+``COMPRESSION_MIN_SIZE`` bytes, already encoded, or other than JSON,
+JavaScript and XML are sent as they are; streaming responses are compressed
+chunk by chunk.
+
+HTML pages (admin, browsable API) carry CSRF tokens next to reflected input,
+which compression would expose to BREACH, so they are never compressed, and
+neither is a response setting the CSRF cookie.
+
+Compressed bodies are kept in a per-process LRU of
+``COMPRESSION_CACHE_SIZE`` bytes keyed by the ETag of the response, or else
+a hash of its content, so an unchanged flight list is compressed once and
+not on every request.
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from airport_api_service.metrics import CACHE_REQUESTS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits 31: a gzip container with a zero mtime, stable bytes.
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL
+        ).compressobj()
+
+    def compress(self, data) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Available encodings, preferred first when the client accepts several.
+ENCODINGS = OrderedDict()
+if brotli is not None:
+    ENCODINGS["br"] = BrotliCompressor
+if zstandard is not None:
+    ENCODINGS["zstd"] = ZstdCompressor
+ENCODINGS["gzip"] = GzipCompressor
+
+
+def negotiate(accept_encoding):
+    """Return the best available encoding ``accept_encoding`` allows."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.endswith(("json", "javascript", "xml"))
+
+
+def compress(encoding, content) -> bytes:
+    compressor = ENCODINGS[encoding]()
+    return compressor.compress(content) + compressor.finish()
+
+
+def compress_stream(encoding, chunks):
+    compressor = ENCODINGS[encoding]()
+    for chunk in chunks:
+        # Flush every chunk so the client isn't kept waiting on a buffer.
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressedCache:
+    """LRU of compressed bodies, bounded by their total size."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+        CACHE_REQUESTS.inc("compression", "miss" if content is None else "hit")
+        return content
+
+    def set(self, key, content) -> None:
+        limit = settings.COMPRESSION_CACHE_SIZE
+        # A single huge body would evict everything else.
+        if len(content) > limit // 8:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = content
+            self._size += len(content)
+            while self._size > limit:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+compressed_cache = CompressedCache()
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            response.has_header("Content-Encoding")
+            or not is_compressible(response.get("Content-Type", ""))
+            or settings.CSRF_COOKIE_NAME in response.cookies
+            or "no-transform" in response.get("Cache-Control", "")
+        ):
+            return response
+        if response.streaming:
+            if response.is_async:
+                return response
+        elif len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                encoding, response.streaming_content
+            )
+            # The compressed size is only known once it is streamed.
+            del response.headers["Content-Length"]
+        else:
+            content = response.content
+            etag = response.get("ETag")
+            key = (
+                (encoding, request.path, etag)
+                if etag
+                else (encoding, hashlib.blake2b(content).digest())
+            )
+            compressed = compressed_cache.get(key)
+            if compressed is None:
+                compressed = compress(encoding, content)
+                compressed_cache.set(key, compressed)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The ETag of the identity body is only weakly valid for this one.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,509 @@
+"""
+Prometheus metrics shared by all worker processes.
+
+Every process appends its samples to its own memory-mapped file in
+``METRICS_DIR`` (one ``<key><float64>`` record per labelled sample) and
+updates them in place, so recording a value is a dict lookup and a
+``struct`` update under a process-local lock. ``/metrics`` sums the files of
+all processes. So that counters never go backwards, the file of an exited
+process is merged into ``archived.metrics`` and removed, when ``/metrics``
+finds the process gone or ``mark_process_dead`` is called (e.g. from the
+``child_exit`` hook of gunicorn); empty the directory when the service is
+(re)deployed.
+
+``/metrics`` requires ``METRICS_TOKEN`` as a bearer token and is denied
+while no token is set.
+
+Nothing is recorded, not even the counters updated outside the middleware,
+unless ``METRICS_MIDDLEWARE`` is on.
+
+``MetricsMiddleware`` must come before ``QueryBudgetMiddleware``: it takes
+the database time of the request from the stats the latter collects, and
+records no phase durations without it.
+"""
+import hmac
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import renderers
+
+try:
+    import fcntl
+except ImportError:
+    # Not POSIX: processes sharing the directory are not locked out.
+    fcntl = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+SUFFIX = ".metrics"
+ARCHIVE = "archived" + SUFFIX
+
+
+def default_metrics_dir() -> str:
+    directory = (
+        "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    )
+    return os.path.join(directory, "airport-metrics")
+
+
+def get_metrics_dir() -> str:
+    return getattr(settings, "METRICS_DIR", None) or default_metrics_dir()
+
+
+class MetricsFile:
+    """Append-only table of float samples of one process."""
+
+    HEADER = struct.Struct("<Q")
+    LENGTH = struct.Struct("<I")
+    VALUE = struct.Struct("=d")
+
+    def __init__(self, directory=None, size=1 << 16):
+        self.directory = directory
+        self.initial_size = size
+        self._lock = threading.Lock()
+        self._map = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._map = None
+
+    def _open(self) -> None:
+        directory = self.directory or get_metrics_dir()
+        # A file under our pid was left by an exited process.
+        mark_process_dead(os.getpid(), directory)
+        self._fd = os.open(
+            os.path.join(directory, f"{os.getpid()}{SUFFIX}"),
+            os.O_RDWR | os.O_CREAT | os.O_TRUNC,
+            0o600,
+        )
+        self._size = self.initial_size
+        os.ftruncate(self._fd, self._size)
+        self._map = mmap.mmap(self._fd, self._size)
+        self._values = memoryview(self._map).cast("d")
+        self._used = self.HEADER.size
+        self.HEADER.pack_into(self._map, 0, self._used)
+        self._indexes = {}
+
+    def _append(self, key) -> int:
+        """Add a record for ``key`` and return the index of its value."""
+        encoded = key.encode()
+        # Keep the value 8-byte aligned.
+        padded = -(-(self.LENGTH.size + len(encoded)) // 8) * 8
+        needed = self._used + padded + self.VALUE.size
+        if needed > self._size:
+            while needed > self._size:
+                self._size *= 2
+            self._values.release()
+            self._map.close()
+            os.ftruncate(self._fd, self._size)
+            self._map = mmap.mmap(self._fd, self._size)
+            self._values = memoryview(self._map).cast("d")
+        self.LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[
+            self._used + self.LENGTH.size:
+            self._used + self.LENGTH.size + len(encoded)
+        ] = encoded
+        index = (self._used + padded) // self.VALUE.size
+        self._values[index] = 0.0
+        # Publish the record only once it is complete.
+        self._used = needed
+        self.HEADER.pack_into(self._map, 0, self._used)
+        self._indexes[key] = index
+        return index
+
+    @staticmethod
+    def enabled() -> bool:
+        return getattr(settings, "METRICS_MIDDLEWARE", True)
+
+    def inc(self, key, amount=1.0) -> None:
+        if not self.enabled():
+            return
+        with self._lock:
+            if self._map is None:
+                self._open()
+            index = self._indexes.get(key) or self._append(key)
+            self._values[index] += amount
+
+    def inc_many(self, pairs) -> None:
+        if not self.enabled():
+            return
+        with self._lock:
+            if self._map is None:
+                self._open()
+            indexes = self._indexes
+            for key, amount in pairs:
+                index = indexes.get(key) or self._append(key)
+                # _append() may have remapped the file.
+                self._values[index] += amount
+
+    @classmethod
+    def read(cls, path) -> dict:
+        with open(path, "rb") as file:
+            data = file.read()
+        samples = {}
+        if len(data) < cls.HEADER.size:
+            return samples
+        (used,) = cls.HEADER.unpack_from(data, 0)
+        position = cls.HEADER.size
+        while position < used:
+            (length,) = cls.LENGTH.unpack_from(data, position)
+            start = position + cls.LENGTH.size
+            key = data[start:start + length].decode()
+            position += -(-(cls.LENGTH.size + length) // 8) * 8
+            (samples[key],) = cls.VALUE.unpack_from(data, position)
+            position += cls.VALUE.size
+        return samples
+
+    @classmethod
+    def write(cls, path, samples) -> None:
+        """Replace the file at ``path`` with one holding ``samples``."""
+        data = bytearray(cls.HEADER.size)
+        for key, value in samples.items():
+            encoded = key.encode()
+            record = cls.LENGTH.pack(len(encoded)) + encoded
+            data += record + bytes(-len(record) % 8) + cls.VALUE.pack(value)
+        cls.HEADER.pack_into(data, 0, len(data))
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+
+store = MetricsFile()
+REGISTRY = {}
+
+
+def escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", r"\\")
+        .replace("\n", r"\n")
+        .replace('"', r"\"")
+    )
+
+
+def format_float(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        REGISTRY[name] = self
+
+    def _labels(self, labelvalues) -> str:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, "
+                f"got {labelvalues}"
+            )
+        return ",".join(
+            f'{name}="{escape(value)}"'
+            for name, value in zip(self.labelnames, labelvalues)
+        )
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def key(self, *labelvalues) -> str:
+        key = self._keys.get(labelvalues)
+        if key is None:
+            key = self._keys[labelvalues] = (
+                f"{self.name}{{{self._labels(labelvalues)}}}"
+            )
+        return key
+
+    def inc(self, *labelvalues, amount=1.0) -> None:
+        store.inc(self.key(*labelvalues), amount)
+
+    def collect(self, samples):
+        prefix = self.name + "{"
+        for key, value in sorted(samples.items()):
+            if key.startswith(prefix):
+                yield key, value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+
+    def _bucket_key(self, labels, bound) -> str:
+        separator = "," if labels else ""
+        return (
+            f"{self.name}_bucket"
+            f'{{{labels}{separator}le="{format_float(bound)}"}}'
+        )
+
+    def samples(self, value, *labelvalues):
+        """Return the ``(key, amount)`` updates observing ``value``."""
+        keys = self._keys.get(labelvalues)
+        if keys is None:
+            labels = self._labels(labelvalues)
+            keys = self._keys[labelvalues] = (
+                [self._bucket_key(labels, bound) for bound in self.buckets],
+                f"{self.name}_sum{{{labels}}}",
+                f"{self.name}_count{{{labels}}}",
+            )
+        buckets, sum_key, count_key = keys
+        return (
+            (buckets[bisect_left(self.buckets, value)], 1),
+            (sum_key, value),
+            (count_key, 1),
+        )
+
+    def observe(self, value, *labelvalues) -> None:
+        store.inc_many(self.samples(value, *labelvalues))
+
+    def collect(self, samples):
+        prefix = self.name + "_count{"
+        for key in sorted(samples):
+            if not key.startswith(prefix):
+                continue
+            labels = key[len(prefix):-1]
+            cumulative = 0
+            for bound in self.buckets:
+                bucket_key = self._bucket_key(labels, bound)
+                cumulative += samples.get(bucket_key, 0)
+                yield bucket_key, cumulative
+            yield f"{self.name}_sum{{{labels}}}", samples.get(
+                f"{self.name}_sum{{{labels}}}", 0
+            )
+            yield key, samples[key]
+
+
+@contextmanager
+def locked(directory):
+    """Hold the lock of ``directory`` across processes."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a") as file:
+        if fcntl is not None:
+            # Released when the file is closed.
+            fcntl.flock(file, fcntl.LOCK_EX)
+        yield
+
+
+def read_samples(path) -> dict:
+    try:
+        return MetricsFile.read(path)
+    except (OSError, struct.error, UnicodeDecodeError):
+        return {}
+
+
+def add_samples(totals, samples) -> None:
+    for key, value in samples.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def process_files(directory) -> dict:
+    """Return ``{pid: file name}`` of the process files in ``directory``."""
+    return {
+        int(name[:-len(SUFFIX)]): name
+        for name in os.listdir(directory)
+        if name.endswith(SUFFIX) and name[:-len(SUFFIX)].isdigit()
+    }
+
+
+def is_running(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def archive(directory, names) -> None:
+    """Merge the process files ``names`` into the archive, under the lock."""
+    if not names:
+        return
+    path = os.path.join(directory, ARCHIVE)
+    totals = read_samples(path)
+    for name in names:
+        add_samples(totals, read_samples(os.path.join(directory, name)))
+    MetricsFile.write(path, totals)
+    for name in names:
+        os.remove(os.path.join(directory, name))
+
+
+def mark_process_dead(pid, directory=None) -> None:
+    """Merge the file of the exited process ``pid`` into the archive."""
+    directory = directory or get_metrics_dir()
+    with locked(directory):
+        name = f"{pid}{SUFFIX}"
+        if os.path.exists(os.path.join(directory, name)):
+            archive(directory, [name])
+
+
+def collect_samples(directory=None) -> dict:
+    """Sum the samples of all process files and of the archive."""
+    directory = directory or get_metrics_dir()
+    totals = {}
+    if not os.path.isdir(directory):
+        return totals
+    with locked(directory):
+        archive(
+            directory,
+            [
+                name
+                for pid, name in process_files(directory).items()
+                if not is_running(pid)
+            ],
+        )
+        for name in os.listdir(directory):
+            if name.endswith(SUFFIX):
+                add_samples(totals, read_samples(os.path.join(directory, name)))
+    return totals
+
+
+def generate_latest(directory=None) -> str:
+    samples = collect_samples(directory)
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for key, value in metric.collect(samples):
+            lines.append(f"{key} {format_float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by view and action.",
+    ("view",),
+)
+REQUEST_PHASE_DURATION = Histogram(
+    "http_request_phase_duration_seconds",
+    "Time spent per request in the database (db), rendering the response "
+    "(render) and in the rest of the view, mostly serializers (serialize).",
+    ("view", "phase"),
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests by view, action and status code.",
+    ("view", "status"),
+)
+THROTTLE_REJECTIONS = Counter(
+    "throttle_rejections_total",
+    "Requests rejected by a rate throttle.",
+    ("scope",),
+)
+BOOKING_CONFLICTS = Counter(
+    "booking_conflicts_total",
+    "Ticket bookings rejected because the seat was taken, found by "
+    "validation (taken) or by the unique constraint (race).",
+    ("reason",),
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "In-process cache lookups by result (hit or miss).",
+    ("cache", "result"),
+)
+
+
+def get_view_label(view_func, method) -> str:
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f"{view_class.__name__}.{action}"
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        request.render_time = 0.0
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        view = getattr(request, "metrics_view", "unmatched")
+        samples = [
+            *REQUEST_DURATION.samples(elapsed, view),
+            (REQUESTS.key(view, response.status_code), 1),
+        ]
+        stats = getattr(response, "query_stats", None)
+        if view != "unmatched" and stats is not None:
+            render_time = request.render_time
+            samples += [
+                *REQUEST_PHASE_DURATION.samples(stats.time, view, "db"),
+                *REQUEST_PHASE_DURATION.samples(render_time, view, "render"),
+                *REQUEST_PHASE_DURATION.samples(
+                    max(elapsed - stats.time - render_time, 0),
+                    view,
+                    "serialize",
+                ),
+            ]
+        # One store update per request.
+        store.inc_many(samples)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = get_view_label(view_func, request.method)
+
+
+class TimedRendererMixin:
+    """Add the time spent rendering to ``request.render_time``."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        request = (renderer_context or {}).get("request")
+        request = getattr(request, "_request", None)
+        # The browsable API renders the JSON inside its own render().
+        if request is None or getattr(request, "rendering", False):
+            return super().render(data, accepted_media_type, renderer_context)
+        request.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            request.rendering = False
+            request.render_time = (
+                getattr(request, "render_time", 0.0)
+                + time.perf_counter() - started
+            )
+
+
+class JSONRenderer(TimedRendererMixin, renderers.JSONRenderer):
+    pass
+
+
+class BrowsableAPIRenderer(TimedRendererMixin, renderers.BrowsableAPIRenderer):
+    pass
+
+
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if not token or not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE)
@@ -0,0 +1,299 @@
+"""
+Opt-in sampling profiler for production requests.
+
+A single background thread periodically reads the stack of every thread
+that is handling a profiled request (``sys._current_frames()``), so the
+request itself runs unmodified. A request is profiled when it is the N-th
+one (``PROFILER_SAMPLE_RATE``) or, if ``PROFILER_SLOW_THRESHOLD`` is set,
+when it turns out slower than that many seconds.
+
+Cost: a request that is not profiled pays a counter increment, and each
+worker stats the control file once a second. A profiled request pays about
+20us of stack walking, under the GIL, per sample (every
+``PROFILER_INTERVAL``, 5ms), i.e. about 0.4% of its duration, and a few
+microseconds per SQL query for the timeline. A slow threshold has every
+request profiled, its stacks dropped unless it was slow, so it is off by
+default; turn it on for short investigations only.
+
+Each profile is written to ``PROFILER_DIR`` as collapsed stacks
+(``<name>.collapsed``, ready for ``flamegraph.pl`` or speedscope) and a JSON
+sidecar with the request and its SQL timeline (``<name>.json``); only the
+newest ``PROFILER_MAX_FILES`` profiles are kept.
+
+The settings can be overridden at runtime, without a restart, through the
+JSON control file written by ``manage.py profiler``.
+"""
+import collections
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CONTROL_KEYS = (
+    "enabled", "sample_rate", "slow_threshold", "interval", "max_files",
+)
+
+
+def get_profiler_dir() -> str:
+    return settings.PROFILER_DIR or os.path.join(
+        tempfile.gettempdir(), "airport-profiles"
+    )
+
+
+def get_control_path() -> str:
+    return os.path.join(get_profiler_dir(), "control.json")
+
+
+def get_config() -> dict:
+    """Return the settings with the overrides of the control file applied."""
+    config = {
+        "enabled": settings.PROFILER_ENABLED,
+        "sample_rate": settings.PROFILER_SAMPLE_RATE,
+        "slow_threshold": settings.PROFILER_SLOW_THRESHOLD,
+        "interval": settings.PROFILER_INTERVAL,
+        "max_files": settings.PROFILER_MAX_FILES,
+    }
+    try:
+        with open(get_control_path()) as control:
+            overrides = json.load(control)
+    except FileNotFoundError:
+        return config
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable profiler control file")
+        return config
+    config.update(
+        (key, value) for key, value in overrides.items() if key in CONTROL_KEYS
+    )
+    return config
+
+
+def write_control(**overrides) -> dict:
+    """Merge ``overrides`` into the control file and return its content."""
+    path = get_control_path()
+    try:
+        with open(path) as control:
+            current = json.load(control)
+    except (OSError, ValueError):
+        current = {}
+    current.update(overrides)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as control:
+        json.dump(current, control)
+    os.replace(temporary, path)
+    return current
+
+
+class Sampler:
+    """Background thread recording the stacks of the registered threads."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._active = {}
+        self._labels = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id) -> list:
+        samples = []
+        with self._lock:
+            self._active[thread_id] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler-sampler", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+        return samples
+
+    def stop(self, thread_id) -> None:
+        with self._lock:
+            self._active.pop(thread_id, None)
+
+    def _run(self) -> None:
+        while True:
+            if not self._active:
+                self._wake.clear()
+                # start() may have run between the check and clear().
+                if not self._active:
+                    self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for thread_id, samples in list(self._active.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples.append(self._stack(frame))
+            del frames
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            )
+        return label
+
+    def _stack(self, frame) -> tuple:
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+
+sampler = Sampler()
+
+
+class SQLTimeline:
+    """``execute_wrapper`` recording when each query ran."""
+
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "start_ms": round((started - self.started) * 1000, 3),
+                    "duration_ms": round(
+                        (time.perf_counter() - started) * 1000, 3
+                    ),
+                    "sql": sql,
+                }
+            )
+
+
+def collapse(samples) -> str:
+    counts = collections.Counter(";".join(stack) for stack in samples)
+    return "".join(
+        f"{stack} {count}\n" for stack, count in counts.most_common()
+    )
+
+
+def write_profile(directory, name, samples, info, max_files) -> None:
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, name)
+    with open(f"{base}.json", "w") as sidecar:
+        json.dump(info, sidecar, indent=1)
+    with open(f"{base}.collapsed", "w") as collapsed:
+        collapsed.write(collapse(samples))
+
+    profiles = sorted(
+        entry for entry in os.listdir(directory) if entry.endswith(".collapsed")
+    )
+    for entry in profiles[:max(len(profiles) - max_files, 0)]:
+        stale = os.path.join(directory, entry[:-len(".collapsed")])
+        for suffix in (".collapsed", ".json"):
+            try:
+                os.remove(stale + suffix)
+            except FileNotFoundError:
+                pass
+
+
+class SamplingProfilerMiddleware:
+    # Seconds between checks of the control file.
+    CONTROL_CHECK_INTERVAL = 1.0
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._counter = itertools.count(1)
+        self._config = None
+        self._checked_at = 0.0
+        self._control_mtime = None
+
+    def get_config(self) -> dict:
+        now = time.monotonic()
+        if self._config is None or (
+            now - self._checked_at > self.CONTROL_CHECK_INTERVAL
+        ):
+            self._checked_at = now
+            try:
+                mtime = os.stat(get_control_path()).st_mtime
+            except OSError:
+                mtime = None
+            if self._config is None or mtime != self._control_mtime:
+                self._control_mtime = mtime
+                self._config = get_config()
+        return self._config
+
+    def __call__(self, request):
+        config = self.get_config()
+        if not config["enabled"]:
+            return self.get_response(request)
+        sample_rate = config["sample_rate"]
+        sampled = bool(sample_rate) and next(self._counter) % sample_rate == 0
+        slow_threshold = config["slow_threshold"]
+        if not sampled and not slow_threshold:
+            return self.get_response(request)
+
+        thread_id = threading.get_ident()
+        sampler.interval = config["interval"]
+        started = time.perf_counter()
+        timeline = SQLTimeline(started)
+        samples = sampler.start(thread_id)
+        try:
+            with connections["default"].execute_wrapper(timeline):
+                response = self.get_response(request)
+        finally:
+            sampler.stop(thread_id)
+        duration = time.perf_counter() - started
+
+        if sampled or duration >= slow_threshold:
+            self.save(
+                request,
+                response,
+                samples,
+                timeline.queries,
+                duration,
+                config,
+                "sampled" if sampled else "slow",
+            )
+        return response
+
+    def save(
+        self, request, response, samples, queries, duration, config, reason
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        view = getattr(request, "metrics_view", "unmatched")
+        name = f"{now:%Y%m%dT%H%M%S%f}-{os.getpid()}-{view}"
+        info = {
+            "created_at": now.isoformat(),
+            "reason": reason,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "view": view,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "interval_ms": config["interval"] * 1000,
+            "samples": len(samples),
+            "sql": queries,
+        }
+        try:
+            write_profile(
+                get_profiler_dir(), name, samples, info, config["max_files"]
+            )
+        except OSError:
+            logger.exception("Could not write the profile of %s", info["path"])
@@ -0,0 +1,118 @@
+"""
+Per-request query accounting.
+
+``QueryBudgetMiddleware`` counts the queries of every request, how many of
+them repeat an SQL statement already run by the same request (the N+1
+signature: same SQL, different params) and the time spent in the database.
+With ``QUERY_BUDGET_HEADERS`` the numbers are sent back as ``X-Query-*``
+response headers.
+
+Views declare the most queries an action may run::
+
+    class FlightViewSet(viewsets.ModelViewSet):
+        query_budget = {"list": 2, "retrieve": 2}
+
+A request over budget is logged as a warning; tests assert budgets with
+``QueryBudgetTestMixin.assertWithinQueryBudget``.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """``execute_wrapper`` collecting the queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duplicates = 0
+        self.time = 0.0
+        self._seen = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            if sql in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(sql)
+
+
+@contextmanager
+def track_queries():
+    """Collect the queries run on any database inside the block."""
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+def get_query_budget(view_func, method):
+    """Return the budget the view declares for ``method``, if any."""
+    view_class = getattr(view_func, "cls", None)
+    budgets = getattr(view_class, "query_budget", None)
+    if not budgets:
+        return None
+    actions = getattr(view_func, "actions", None) or {}
+    return budgets.get(actions.get(method.lower(), method.lower()))
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_queries() as stats:
+            response = self.get_response(request)
+
+        budget = getattr(request, "query_budget", None)
+        response.query_stats = stats
+        response.query_budget = budget
+        if settings.QUERY_BUDGET_HEADERS:
+            response["X-Query-Count"] = stats.count
+            response["X-Query-Duplicates"] = stats.duplicates
+            response["X-Query-Time"] = f"{stats.time * 1000:.2f}"
+            if budget is not None:
+                response["X-Query-Budget"] = budget
+        if budget is not None and stats.count > budget:
+            logger.warning(
+                "%s %s ran %d queries (%d duplicate), over its budget of %d",
+                request.method,
+                request.path,
+                stats.count,
+                stats.duplicates,
+                budget,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
+
+
+class QueryBudgetTestMixin:
+    """``TestCase`` mixin asserting the budgets declared by the views."""
+
+    def assertWithinQueryBudget(self, response) -> None:
+        budget = getattr(response, "query_budget", None)
+        if budget is None:
+            self.fail(
+                f"{response.wsgi_request.method} {response.wsgi_request.path} "
+                "has no query budget"
+            )
+        stats = response.query_stats
+        self.assertLessEqual(
+            stats.count,
+            budget,
+            f"{stats.count} queries ({stats.duplicates} duplicate) "
+            f"over the budget of {budget}",
+        )
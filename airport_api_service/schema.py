@@ -0,0 +1,122 @@
+"""
+OpenAPI schema served as a pre-built static artifact.
+
+``manage.py build_schema`` generates the schema with drf_spectacular once,
+validates it and stores it gzipped at ``OPENAPI_SCHEMA_PATH``.
+``StaticSchemaView`` serves those bytes with an ETag and long cache headers,
+so no request introspects the viewsets. Where
+``OPENAPI_SCHEMA_BUILD_ON_DEMAND`` is set (dev, test) a missing artifact is
+built on first use; in production it has to be built at deploy time.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views import View
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/vnd.oai.openapi+json"
+
+
+def generate_schema() -> bytes:
+    """Generate and validate the schema, return it as JSON."""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+    from drf_spectacular.validation import validate_schema
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    validate_schema(schema)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def compress(content) -> bytes:
+    # A fixed mtime keeps the artifact byte-identical between builds.
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def build_schema(path=None) -> bytes:
+    """Write the gzipped schema to ``path`` and return it uncompressed."""
+    path = str(path or settings.OPENAPI_SCHEMA_PATH)
+    content = generate_schema()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as artifact:
+        artifact.write(compress(content))
+    os.replace(temporary, path)
+    return content
+
+
+class SchemaArtifact:
+    """The stored schema, reloaded when the file changes."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        path = str(self.path or settings.OPENAPI_SCHEMA_PATH)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            if not settings.OPENAPI_SCHEMA_BUILD_ON_DEMAND:
+                return None
+            with self._lock:
+                if not os.path.exists(path):
+                    logger.info("Building the OpenAPI schema on first use")
+                    build_schema(path)
+            mtime = os.stat(path).st_mtime_ns
+        if mtime != self._mtime:
+            with open(path, "rb") as artifact:
+                compressed = artifact.read()
+            content = gzip.decompress(compressed)
+            self.compressed = compressed
+            self.content = content
+            self.etag = (
+                f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+            )
+            self._mtime = mtime
+        return self
+
+
+artifact = SchemaArtifact()
+
+
+def accepts_gzip(request) -> bool:
+    return any(
+        coding.split(";")[0].strip() == "gzip"
+        for coding in request.headers.get("Accept-Encoding", "").split(",")
+    )
+
+
+class StaticSchemaView(View):
+    def get(self, request):
+        schema = artifact.load()
+        if schema is None:
+            logger.error(
+                "OpenAPI schema %s is missing, run manage.py build_schema",
+                settings.OPENAPI_SCHEMA_PATH,
+            )
+            return HttpResponse(
+                "Schema not built", status=503, content_type="text/plain"
+            )
+
+        if schema.etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        elif accepts_gzip(request):
+            response = HttpResponse(schema.compressed, content_type=CONTENT_TYPE)
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(schema.content, content_type=CONTENT_TYPE)
+        response["ETag"] = schema.etag
+        response["Cache-Control"] = (
+            f"public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}"
+        )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
@@ -11,9 +11,10 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import tempfile
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
-import socket
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -22,21 +23,40 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
+# Settings profile: "dev" (default), "test", "prod" or "bench" (prod-like,
+# for load tests and benchmarks)
+PROFILE = os.environ.get("DJANGO_PROFILE", "dev")
+if PROFILE not in ("dev", "test", "prod", "bench"):
+    raise ValueError(f"Unknown DJANGO_PROFILE: {PROFILE!r}")
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ["SECRET_KEY"]
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = PROFILE == "dev"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get("ALLOWED_HOSTS", "").split(",") if host
+]
+if PROFILE == "bench":
+    ALLOWED_HOSTS += ["localhost", "127.0.0.1", "testserver"]
 
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
-# tricks to have debug toolbar when developing with docker
-ip = socket.gethostbyname(socket.gethostname())
-INTERNAL_IPS += [ip[:-1] + '1']
+# Debug toolbar only where it is useful and installed
+DEBUG_TOOLBAR = PROFILE == "dev" and find_spec("debug_toolbar") is not None
+
+if DEBUG_TOOLBAR:
+    import socket
+
+    # tricks to have debug toolbar when developing with docker
+    try:
+        ip = socket.gethostbyname(socket.gethostname())
+        INTERNAL_IPS += [ip[:-1] + '1']
+    except OSError:
+        pass
 
 # Application definition
 
@@ -50,14 +70,29 @@ INSTALLED_APPS = [
     "user",
     "airport",
     "rest_framework",
-    "debug_toolbar",
     "rest_framework_simplejwt",
     "drf_spectacular",
 ]
 
+# Diagnostics middleware, on in dev and test; prod and bench (which measures
+# the endpoints, not the diagnostics) only run the ones turned on explicitly
+DIAGNOSTICS_DEFAULT = "1" if PROFILE in ("dev", "test") else "0"
+PROFILER_MIDDLEWARE = (
+    os.environ.get("PROFILER_MIDDLEWARE", DIAGNOSTICS_DEFAULT) == "1"
+)
+METRICS_MIDDLEWARE = (
+    os.environ.get("METRICS_MIDDLEWARE", DIAGNOSTICS_DEFAULT) == "1"
+)
+QUERY_BUDGET_MIDDLEWARE = (
+    os.environ.get("QUERY_BUDGET_MIDDLEWARE", DIAGNOSTICS_DEFAULT) == "1"
+)
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "airport_api_service.profiling.SamplingProfilerMiddleware",
+    "airport_api_service.metrics.MetricsMiddleware",
+    "airport_api_service.compression.CompressionMiddleware",
+    "airport_api_service.query_budget.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -66,6 +101,22 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS += ["debug_toolbar"]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index(
+            "django.contrib.sessions.middleware.SessionMiddleware"
+        ),
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+for enabled, middleware in (
+    (PROFILER_MIDDLEWARE, "profiling.SamplingProfilerMiddleware"),
+    (METRICS_MIDDLEWARE, "metrics.MetricsMiddleware"),
+    (QUERY_BUDGET_MIDDLEWARE, "query_budget.QueryBudgetMiddleware"),
+):
+    if not enabled:
+        MIDDLEWARE.remove(f"airport_api_service.{middleware}")
+
 ROOT_URLCONF = "airport_api_service.urls"
 
 TEMPLATES = [
@@ -84,6 +135,22 @@ TEMPLATES = [
     },
 ]
 
+if PROFILE in ("prod", "bench"):
+    # Compile templates once per process (admin, browsable API).
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        ),
+    ]
+    TEMPLATES[0]["OPTIONS"]["context_processors"].remove(
+        "django.template.context_processors.debug"
+    )
+
 WSGI_APPLICATION = "airport_api_service.wsgi.application"
 
 
@@ -148,20 +215,127 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "user.User"
 
+if PROFILE == "test":
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "airport_api_service.metrics.JSONRenderer",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "user.throttling.AnonRateThrottle",
+        "user.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "20/day", "user": "60/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "20/day",
+        "user": "60/day",
+        # Per client, for the public endpoints served from memory.
+        "boards": "120/min",
+        "autocomplete": "300/min",
+        "nearest": "120/min",
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.ClaimsJWTAuthentication",
     ),
 }
+if PROFILE in ("dev", "test"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append(
+        "airport_api_service.metrics.BrowsableAPIRenderer"
+    )
+if PROFILE in ("test", "bench"):
+    # Benchmarks measure the endpoints, and buckets would carry over from
+    # test to test (throttling tests set their throttle classes themselves).
+    REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []
+    REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"].update(
+        boards=None, autocomplete=None, nearest=None
+    )
+
+# Where throttle buckets live: "cache", "shm" (single node) or "postgres"
+THROTTLE_STORE = os.environ.get("THROTTLE_STORE", "cache")
+THROTTLE_SHM_PATH = os.environ.get("THROTTLE_SHM_PATH")
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=59),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.CheckedTokenRefreshSerializer",
 }
+
+# Seconds a full User loaded for a token-authenticated request is reused
+AUTH_USER_CACHE_TTL = 30
+
+# Seconds between reloads of the role and deactivation changes of users
+TOKEN_REVOCATION_SYNC_INTERVAL = 10
+
+# Bloom filter of revoked token ids: expected size and resync period (s)
+TOKEN_BLACKLIST_CAPACITY = 100_000
+TOKEN_BLACKLIST_SYNC_INTERVAL = 30
+
+# Cross-worker invalidation of in-process caches through Postgres LISTEN/NOTIFY
+AIRPORT_INVALIDATION_CHANNEL = "airport_invalidation"
+AIRPORT_INVALIDATION_LISTENER = (
+    os.environ.get("AIRPORT_INVALIDATION_LISTENER", "0") == "1"
+)
+
+# X-Query-Count/-Duplicates/-Time/-Budget response headers
+QUERY_BUDGET_HEADERS = DEBUG
+
+# Per-process metrics files, summed by /metrics; a bearer token guards it and
+# /metrics is denied without one
+METRICS_DIR = os.environ.get("METRICS_DIR")
+if PROFILE == "test":
+    # Test runs stay out of the metrics of a service on the same host.
+    METRICS_DIR = os.path.join(tempfile.gettempdir(), "airport-metrics-test")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Opt-in sampling profiler, overridable at runtime with `manage.py profiler`
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+# Profile every N-th request (0: never) and requests slower than (s); a
+# threshold has every request profiled, so none (0) by default
+PROFILER_SAMPLE_RATE = int(os.environ.get("PROFILER_SAMPLE_RATE", 1000))
+PROFILER_SLOW_THRESHOLD = float(os.environ.get("PROFILER_SLOW_THRESHOLD", 0))
+PROFILER_INTERVAL = 0.005
+PROFILER_DIR = os.environ.get("PROFILER_DIR")
+PROFILER_MAX_FILES = 200
+
+# OpenAPI schema built by `manage.py build_schema` and served from disk
+OPENAPI_SCHEMA_PATH = os.environ.get(
+    "OPENAPI_SCHEMA_PATH", str(BASE_DIR / "openapi.json.gz")
+)
+OPENAPI_SCHEMA_BUILD_ON_DEMAND = PROFILE in ("dev", "test")
+OPENAPI_SCHEMA_MAX_AGE = 24 * 60 * 60
+
+# Serialize flight and route lists from values_list() rows
+FAST_LIST_SERIALIZATION = True
+
+# gzip (brotli/zstd when installed) for responses of at least MIN_SIZE bytes;
+# compressed bodies are cached per process up to CACHE_SIZE bytes
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CACHE_SIZE = 32 * 1024 * 1024
+
+# /api/batch/: sub-requests per batch and threads running their reads
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# Paginated tables expected to hold more rows than this aren't counted exactly
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# Monthly flight partitions (PostgreSQL): months created ahead of time and
+# months of past departures kept before `flight_partitions` archives them
+FLIGHT_PARTITIONS_AHEAD = 3
+FLIGHT_PARTITIONS_KEEP = 24
+
+# Seconds an airport's departures/arrivals board is served from memory, and
+# the routes of all boards at most, should an invalidation be missed
+AIRPORT_BOARD_CACHE_TTL = 5
+AIRPORT_BOARD_ROUTES_CACHE_TTL = 10 * 60
+
+# Seconds the autocomplete index is kept at most, should an invalidation be
+# missed
+AIRPORT_AUTOCOMPLETE_CACHE_TTL = 10 * 60
+
+# Seconds the nearest airports' KD-tree is kept at most, should an
+# invalidation be missed
+AIRPORT_NEAREST_CACHE_TTL = 10 * 60
@@ -7,6 +7,10 @@ import sys
 def main():
     """Run administrative tasks."""
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_api_service.settings")
+    if sys.argv[1:2] == ["test"]:
+        # Tests rely on the test profile (no throttling, fast hashing), even
+        # with DJANGO_PROFILE=dev from .env in the environment.
+        os.environ["DJANGO_PROFILE"] = "test"
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
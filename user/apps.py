@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
+
+    def ready(self):
+        # Subscribes the user and revoked token caches to the invalidation
+        # bus, which watches their models.
+        from user import authentication  # noqa: F401
+
+        # Register the OpenAPI extension of the authentication class.
+        from user import schema  # noqa: F401
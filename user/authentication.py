@@ -0,0 +1,212 @@
+"""
+JWT authentication that does not load the user on every request.
+
+Access tokens carry the claims the permission classes need (``is_staff``,
+``is_superuser``), so requests are authenticated from the token alone as a
+``TokenUser``. When a user is deactivated or changes role, tokens issued
+before that moment are rejected through ``revocations``, a compact map of
+user id -> cutoff time kept in every worker, updated through the
+invalidation bus and reloaded every ``TOKEN_REVOCATION_SYNC_INTERVAL``
+seconds for the changes the bus doesn't carry (no listener, bulk updates).
+Views that need the full model use ``get_full_user``, backed by a short-TTL
+in-process cache.
+
+Single tokens (e.g. on logout) are revoked by JTI in ``RevokedToken``.
+``blacklist`` keeps a Bloom filter of those JTIs in every worker, so a
+token that was never revoked is accepted without any I/O; only probable
+hits are confirmed in the database.
+"""
+import copy
+import math
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from airport.invalidation import DELETED, RESET, SAVED, LocalCache, bus
+from user.bloom import BloomFilter
+from user.models import RevokedToken
+
+TOKEN_CLAIMS = ("is_staff", "is_superuser")
+
+
+class UserRevocations:
+    def __init__(self):
+        self._cutoffs = {}
+        self._stale = set()
+        self._loaded_at = None
+        bus.subscribe([get_user_model()], self._on_change)
+
+    def _on_change(self, label, pk, op) -> None:
+        if op == RESET:
+            self._loaded_at = None
+        elif op == DELETED:
+            self._cutoffs[pk] = math.inf
+        else:
+            self._stale.add(pk)
+
+    def load(self) -> None:
+        # Older changes only concern tokens that have expired by now.
+        since = timezone.now() - max(
+            api_settings.ACCESS_TOKEN_LIFETIME,
+            api_settings.REFRESH_TOKEN_LIFETIME,
+        )
+        # Deleted users have no row left to find.
+        deleted = {
+            user_id
+            for user_id, cutoff in self._cutoffs.items()
+            if cutoff == math.inf
+        }
+        self._stale = set()
+        self._cutoffs = {
+            user_id: changed_at.timestamp()
+            for user_id, changed_at in get_user_model().objects.filter(
+                auth_changed_at__gte=since
+            ).values_list("id", "auth_changed_at")
+        }
+        self._cutoffs.update(dict.fromkeys(deleted, math.inf))
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self, user_id) -> None:
+        changed_at = get_user_model().objects.filter(pk=user_id).values_list(
+            "auth_changed_at", flat=True
+        ).first()
+        if changed_at is not None:
+            self._cutoffs[user_id] = changed_at.timestamp()
+
+    def is_revoked(self, user_id, issued_at) -> bool:
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at
+            > settings.TOKEN_REVOCATION_SYNC_INTERVAL
+        ):
+            self.load()
+        if user_id in self._stale:
+            self._stale.discard(user_id)
+            self._refresh(user_id)
+        cutoff = self._cutoffs.get(user_id)
+        # "iat" has a one second resolution, reject the ambiguous second too.
+        return cutoff is not None and issued_at <= cutoff
+
+
+revocations = UserRevocations()
+
+
+class TokenBlacklist:
+    def __init__(self):
+        self._filter = None
+        self._last_id = 0
+        self._synced_at = 0
+        bus.subscribe([RevokedToken], self._on_change)
+
+    def _on_change(self, label, pk, op) -> None:
+        if op == SAVED:
+            self._synced_at = 0
+        else:
+            self._filter = None
+
+    def rebuild(self) -> BloomFilter:
+        rows = list(
+            RevokedToken.objects.filter(
+                expires_at__gt=timezone.now()
+            ).values_list("id", "jti")
+        )
+        bloom = BloomFilter(
+            max(settings.TOKEN_BLACKLIST_CAPACITY, 2 * len(rows))
+        )
+        for row_id, jti in rows:
+            bloom.add(jti)
+        self._last_id = max((row_id for row_id, _ in rows), default=0)
+        self._filter = bloom
+        self._synced_at = time.monotonic()
+        return bloom
+
+    def sync(self, bloom) -> BloomFilter:
+        """Add the tokens revoked since the last sync to ``bloom``."""
+        rows = RevokedToken.objects.filter(id__gt=self._last_id).values_list(
+            "id", "jti"
+        )
+        for row_id, jti in rows:
+            bloom.add(jti)
+            self._last_id = max(self._last_id, row_id)
+        self._synced_at = time.monotonic()
+        if len(bloom) > bloom.capacity:
+            return self.rebuild()
+        return bloom
+
+    def is_revoked(self, jti) -> bool:
+        # Read once: the listener thread may drop the filter at any time.
+        bloom = self._filter
+        if bloom is None:
+            bloom = self.rebuild()
+        elif (
+            time.monotonic() - self._synced_at
+            > settings.TOKEN_BLACKLIST_SYNC_INTERVAL
+        ):
+            bloom = self.sync(bloom)
+        if jti not in bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+blacklist = TokenBlacklist()
+
+user_cache = LocalCache(
+    "users", [get_user_model()], ttl=settings.AUTH_USER_CACHE_TTL
+)
+
+
+def get_full_user(user):
+    """Return the ``User`` behind ``request.user``, cached for a few seconds."""
+    if isinstance(user, get_user_model()):
+        return user
+    cached = user_cache.get_or_set(
+        user.id, lambda: get_user_model().objects.get(pk=user.id)
+    )
+    return copy.copy(cached)
+
+
+def check_not_revoked(token) -> None:
+    if revocations.is_revoked(
+        token[api_settings.USER_ID_CLAIM], token.get("iat", 0)
+    ) or blacklist.is_revoked(token[api_settings.JTI_CLAIM]):
+        raise InvalidToken(_("Token has been revoked"))
+
+
+def revoke(token, user_id=None) -> None:
+    """Revoke a single token until it expires."""
+    RevokedToken.objects.get_or_create(
+        jti=token[api_settings.JTI_CLAIM],
+        defaults={
+            "user_id": user_id,
+            "expires_at": datetime.fromtimestamp(
+                token["exp"], tz=dt_timezone.utc
+            ),
+        },
+    )
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Authenticate with the token claims instead of a user query."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+        check_not_revoked(validated_token)
+        return TokenUser(validated_token)
+
+
+def with_claims(token, user):
+    """Embed the claims ``TokenUser`` reads into ``token``."""
+    for claim in TOKEN_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
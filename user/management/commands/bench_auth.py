@@ -0,0 +1,85 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.authentication import ClaimsJWTAuthentication, blacklist, with_claims
+from user.models import RevokedToken
+
+
+class Command(BaseCommand):
+    """Measure the per-request cost of JWT authentication."""
+
+    help = (
+        "Compare the stock JWTAuthentication (user query per request) with "
+        "ClaimsJWTAuthentication and its Bloom filter blacklist. Runs in a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--revoked", type=int, default=10000,
+            help="Revoked tokens in the blacklist during the run.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["requests"], options["revoked"])
+            transaction.set_rollback(True)
+
+    def run(self, total, revoked):
+        user = get_user_model().objects.create_user(
+            f"bench-{uuid.uuid4().hex}@example.com", uuid.uuid4().hex
+        )
+        access = str(with_claims(RefreshToken.for_user(user), user).access_token)
+        request = Request(
+            RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        )
+
+        self.stdout.write(f"{'authentication':<32}{'mean':>12}{'p99':>12}")
+        self.report(
+            "jwt (user query)",
+            self.time(JWTAuthentication(), request, total),
+        )
+
+        blacklist.rebuild()
+        self.report(
+            "claims, empty blacklist",
+            self.time(ClaimsJWTAuthentication(), request, total),
+        )
+
+        expires_at = timezone.now() + timedelta(hours=1)
+        RevokedToken.objects.bulk_create(
+            RevokedToken(jti=uuid.uuid4().hex, expires_at=expires_at)
+            for _ in range(revoked)
+        )
+        blacklist.rebuild()
+        self.report(
+            f"claims, {revoked} revoked",
+            self.time(ClaimsJWTAuthentication(), request, total),
+        )
+        blacklist._filter = None
+
+    def time(self, authentication, request, total):
+        timings = []
+        for _ in range(total):
+            started = time.perf_counter_ns()
+            authentication.authenticate(request)
+            timings.append(time.perf_counter_ns() - started)
+        return sorted(timings)
+
+    def report(self, name, timings):
+        self.stdout.write(
+            f"{name:<32}"
+            f"{sum(timings) / len(timings) / 1000:>10.1f}us"
+            f"{timings[int(len(timings) * 0.99)] / 1000:>10.1f}us"
+        )
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from rest_framework import throttling as drf_throttling
+
+from user import throttling
+from user.models import RateLimitBucket
+
+
+class Command(BaseCommand):
+    """Measure the per-request cost of the throttle implementations."""
+
+    help = (
+        "Compare DRF's UserRateThrottle with the token-bucket throttle "
+        "for every available store at a given quota."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=5000,
+            help="Requests per run; also used as the per-day quota.",
+        )
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        rate = f"{total}/day"
+
+        self.stdout.write(f"{total} requests against a {rate} quota")
+        self.stdout.write(
+            f"{'implementation':<24}{'mean':>12}{'last 10%':>12}"
+        )
+        self.report(
+            "drf-simple", self.run(drf_throttling.UserRateThrottle, rate, total)
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            stores = {
+                "bucket-cache": throttling.CacheBucketStore(),
+                "bucket-shm": throttling.SharedMemoryBucketStore(
+                    os.path.join(directory, "throttle")
+                ),
+            }
+            if connection.vendor == "postgresql":
+                stores["bucket-postgres"] = throttling.PostgresBucketStore()
+
+            for name, store in stores.items():
+                throttling._stores["bench"] = store
+                try:
+                    with override_settings(THROTTLE_STORE="bench"):
+                        timings = self.run(
+                            throttling.UserRateThrottle, rate, total
+                        )
+                finally:
+                    del throttling._stores["bench"]
+                self.report(name, timings)
+
+        if connection.vendor == "postgresql":
+            RateLimitBucket.objects.filter(
+                key__startswith="throttle_bench_"
+            ).delete()
+
+    def run(self, throttle_class, rate, total):
+        throttle_class = type(
+            "BenchThrottle",
+            (throttle_class,),
+            {"scope": "bench", "rate": rate, "THROTTLE_RATES": {}},
+        )
+        request = SimpleNamespace(
+            user=SimpleNamespace(is_authenticated=True, pk=os.getpid()),
+            META={},
+        )
+        cache.delete(f"throttle_bench_{os.getpid()}")
+
+        timings = []
+        for _ in range(total):
+            throttle = throttle_class()
+            started = time.perf_counter_ns()
+            throttle.allow_request(request, None)
+            timings.append(time.perf_counter_ns() - started)
+        return timings
+
+    def report(self, name, timings):
+        tail = timings[-max(len(timings) // 10, 1):]
+        self.stdout.write(
+            f"{name:<24}"
+            f"{sum(timings) / len(timings) / 1000:>10.1f}us"
+            f"{sum(tail) / len(tail) / 1000:>10.1f}us"
+        )
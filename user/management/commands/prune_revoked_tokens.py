@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user.models import RevokedToken
+
+
+class Command(BaseCommand):
+    """Delete revoked tokens that have expired anyway."""
+
+    def handle(self, *args, **options):
+        # The delete events drop the blacklist filter of every worker.
+        deleted, _ = RevokedToken.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired revoked tokens")
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+def set_unlogged(apps, schema_editor):
+    # Throttle state is disposable, skip the WAL for it.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE user_ratelimitbucket SET UNLOGGED")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('allowed', models.BooleanField(default=True)),
+                ('updated_at', models.FloatField()),
+            ],
+        ),
+        migrations.RunPython(set_unlogged, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_ratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='auth_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
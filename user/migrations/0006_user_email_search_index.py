@@ -0,0 +1,36 @@
+"""
+Index user emails for the admin's prefix searches (PostgreSQL only).
+
+``^`` search fields run ``UPPER(email::text) LIKE UPPER('x%')``, which the
+unique index on ``email`` can't serve; this expression index can. Orders and
+tickets are searched by their user's email through it.
+"""
+from django.db import migrations
+
+INDEX = "user_user_email_search_idx"
+
+
+def add_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX {INDEX} ON user_user "
+        "(UPPER(email::text) text_pattern_ops)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX {INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0005_user_auth_changed_at_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, drop_index, elidable=False),
+    ]
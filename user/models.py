@@ -5,10 +5,29 @@ from django.contrib.auth.models import (
     Permission,
 )
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    """Record role and deactivation changes made in bulk, like ``save()``."""
+
+    def update(self, **kwargs):
+        if not kwargs.keys().isdisjoint(self.model.AUTH_FIELDS):
+            kwargs.setdefault("auth_changed_at", timezone.now())
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if not set(fields).isdisjoint(self.model.AUTH_FIELDS):
+            objs = list(objs)
+            now = timezone.now()
+            for obj in objs:
+                obj.auth_changed_at = now
+            fields = {*fields, "auth_changed_at"}
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Define a model manager for User model with no username field."""
 
     use_in_migrations = True
@@ -57,7 +76,59 @@ class User(AbstractUser):
         blank=True,
     )
 
+    # Tokens issued before this moment no longer carry valid claims
+    auth_changed_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
+    AUTH_FIELDS = ("is_active", "is_staff", "is_superuser")
 
     objects = UserManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._auth_state = instance.get_auth_state()
+        return instance
+
+    def get_auth_state(self) -> tuple:
+        return tuple(self.__dict__.get(field) for field in self.AUTH_FIELDS)
+
+    def save(self, *args, **kwargs):
+        """Record deactivation and role changes to revoke issued tokens."""
+        auth_state = self.get_auth_state()
+        if getattr(self, "_auth_state", auth_state) != auth_state:
+            self.auth_changed_at = timezone.now()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "auth_changed_at"}
+        super().save(*args, **kwargs)
+        self._auth_state = auth_state
+
+
+class RateLimitBucket(models.Model):
+    """Token bucket of ``user.throttling.PostgresBucketStore``."""
+
+    key = models.CharField(max_length=255, primary_key=True)
+    tokens = models.FloatField()
+    allowed = models.BooleanField(default=True)
+    updated_at = models.FloatField()
+
+
+class RevokedToken(models.Model):
+    """JWT revoked before its expiry, e.g. on logout."""
+
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        "User",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="revoked_tokens",
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.jti
@@ -1,5 +1,15 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.authentication import check_not_revoked, revoke, with_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,3 +32,38 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return with_claims(super().get_token(user), user)
+
+
+class CheckedTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        check_not_revoked(self.token_class(attrs["refresh"]))
+        return super().validate(attrs)
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error))
+        user = self.context["request"].user
+        if token[api_settings.USER_ID_CLAIM] != user.id:
+            raise serializers.ValidationError(
+                _("Token belongs to another user")
+            )
+        return token
+
+    def save(self, **kwargs):
+        """Revoke the refresh token and the access token of the request."""
+        request = self.context["request"]
+        revoke(self.validated_data["refresh"], request.user.id)
+        if request.auth is not None:
+            revoke(request.auth, request.user.id)
@@ -1,16 +1,40 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.invalidation import RESET
+from user import throttling
+from user.authentication import blacklist, revocations
+from user.bloom import BloomFilter
+from user.models import RevokedToken
 from user.models import User
+from user.views import ManageUserView
 
 
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token_obtain_pair")
 ME_URL = reverse("user:manage")
+REFRESH_URL = reverse("user:token_refresh")
+LOGOUT_URL = reverse("user:logout")
+ORDERS_URL = reverse("airport:order-list")
 
 
 def create_user(**params) -> User:
@@ -139,3 +163,266 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.email, payload["email"])
         self.assertTrue(self.user.check_password(payload["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class BucketStoreTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache.clear()
+        self.stores = {
+            "cache": throttling.CacheBucketStore(),
+            "shm": throttling.SharedMemoryBucketStore(
+                os.path.join(directory.name, "throttle"), slots=64
+            ),
+        }
+
+    def test_bucket_allows_capacity_then_rejects(self) -> None:
+        for name, store in self.stores.items():
+            with self.subTest(store=name), mock.patch(
+                "time.time", return_value=1000.0
+            ):
+                results = [store.consume("key", 3, 0.1)[0] for _ in range(4)]
+
+                self.assertEqual(results, [True, True, True, False])
+
+    def test_bucket_refills_over_time(self) -> None:
+        for name, store in self.stores.items():
+            with self.subTest(store=name), mock.patch("time.time") as now:
+                now.return_value = 1000.0
+                for _ in range(3):
+                    store.consume("key", 3, 0.1)
+                self.assertFalse(store.consume("key", 3, 0.1)[0])
+
+                now.return_value = 1010.0
+                self.assertTrue(store.consume("key", 3, 0.1)[0])
+                self.assertFalse(store.consume("key", 3, 0.1)[0])
+
+    def test_keys_are_independent(self) -> None:
+        for name, store in self.stores.items():
+            with self.subTest(store=name):
+                store.consume("first", 1, 0.001)
+
+                self.assertFalse(store.consume("first", 1, 0.001)[0])
+                self.assertTrue(store.consume("second", 1, 0.001)[0])
+
+    def test_concurrent_requests_spend_each_token_once(self) -> None:
+        refill = throttling.refill
+
+        def slow_refill(*args):
+            # Let the other threads run in the middle of the update.
+            time.sleep(0.001)
+            return refill(*args)
+
+        for name, store in self.stores.items():
+            with self.subTest(store=name), mock.patch(
+                "user.throttling.refill", slow_refill
+            ), ThreadPoolExecutor(8) as pool:
+                results = list(
+                    pool.map(
+                        lambda _: store.consume("shared", 5, 0.001)[0],
+                        range(40),
+                    )
+                )
+
+                self.assertEqual(results.count(True), 5)
+
+
+@override_settings(THROTTLE_STORE="cache")
+class UserRateThrottleTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user(email="test@test.com", password="Testpass123@")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_requests_over_quota_are_throttled(self) -> None:
+        # Throttling is off in the test profile.
+        with mock.patch.object(
+            ManageUserView, "throttle_classes", (throttling.UserRateThrottle,)
+        ), mock.patch.object(
+            throttling.UserRateThrottle,
+            "THROTTLE_RATES",
+            {"user": "2/min", "anon": "2/min"},
+        ):
+            statuses = [self.client.get(ME_URL).status_code for _ in range(3)]
+
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user(email="test@test.com", password="Testpass123@")
+        revocations.load()
+        res = APIClient().post(
+            TOKEN_URL, {"email": "test@test.com", "password": "Testpass123@"}
+        )
+        self.access = res.data["access"]
+        self.refresh = res.data["refresh"]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def test_access_token_carries_role_claims(self) -> None:
+        token = AccessToken(self.access)
+
+        self.assertIs(token["is_staff"], False)
+        self.assertIs(token["is_superuser"], False)
+
+    def test_authentication_does_not_query_user(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDERS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any("user_user" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_role_change_revokes_issued_tokens(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_revokes_refresh_token(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        res = APIClient().post(REFRESH_URL, {"refresh": self.refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unrelated_change_keeps_tokens_valid(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Test"
+            self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(self.user.auth_changed_at)
+
+    def test_changes_missed_by_the_bus_are_reloaded(self) -> None:
+        # Committed elsewhere: no invalidation event reaches this worker.
+        with self.captureOnCommitCallbacks(execute=False):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_200_OK
+        )
+
+        with override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_deactivation_revokes_issued_tokens(self) -> None:
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+
+        with override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BloomFilterTests(TestCase):
+    def test_added_items_are_always_found(self) -> None:
+        bloom = BloomFilter(1000)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate_stays_low(self) -> None:
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+
+        self.assertLess(false_positives, 300)
+
+
+class LogoutTests(TestCase):
+    def setUp(self) -> None:
+        create_user(email="test@test.com", password="Testpass123@")
+        revocations.load()
+        blacklist.rebuild()
+        res = APIClient().post(
+            TOKEN_URL, {"email": "test@test.com", "password": "Testpass123@"}
+        )
+        self.refresh = res.data["refresh"]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+    def test_logout_revokes_access_and_refresh_tokens(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(LOGOUT_URL, {"refresh": self.refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+        self.assertEqual(
+            self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(
+            APIClient().post(REFRESH_URL, {"refresh": self.refresh}).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_unrevoked_token_is_checked_without_queries(self) -> None:
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist.is_revoked("never-revoked"))
+
+    def test_filter_dropped_during_a_check(self) -> None:
+        sync = blacklist.sync
+
+        def sync_then_drop(bloom):
+            bloom = sync(bloom)
+            blacklist._on_change("user.revokedtoken", None, RESET)
+            return bloom
+
+        with mock.patch.object(
+            blacklist, "sync", side_effect=sync_then_drop
+        ), override_settings(TOKEN_BLACKLIST_SYNC_INTERVAL=-1):
+            self.assertFalse(blacklist.is_revoked("never-revoked"))
+
+    def test_logout_with_invalid_refresh_token(self) -> None:
+        res = self.client.post(LOGOUT_URL, {"refresh": "invalid"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PruneRevokedTokensTests(TestCase):
+    def test_expired_tokens_are_deleted(self) -> None:
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [
+                RevokedToken(jti=f"expired-{i}", expires_at=now - timedelta(1))
+                for i in range(20)
+            ]
+            + [RevokedToken(jti="valid", expires_at=now + timedelta(1))]
+        )
+        blacklist.rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("prune_revoked_tokens", stdout=StringIO())
+
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)), ["valid"]
+        )
+        self.assertIsNone(blacklist._filter)
@@ -0,0 +1,248 @@
+"""
+Drop-in replacements for DRF's rate throttles.
+
+DRF's ``SimpleRateThrottle`` keeps the full list of request timestamps in
+the cache and rewrites it on every request. These throttles keep a
+fixed-size token bucket per key instead (capacity = the number of requests
+of the rate, refilled continuously over its duration), stored in one of:
+
+* ``"cache"``: the default Django cache (one small tuple per key, updated
+  under a short lock taken with ``cache.add``);
+* ``"shm"``: a memory-mapped file shared by all workers of a node;
+* ``"postgres"``: an unlogged table, updated atomically in one statement.
+
+The store is chosen with the ``THROTTLE_STORE`` setting.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.db import connection
+from rest_framework import throttling
+
+from airport_api_service.metrics import THROTTLE_REJECTIONS
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+def refill(tokens, updated_at, now, capacity, rate):
+    return min(capacity, tokens + (now - updated_at) * rate)
+
+
+class CacheBucketStore:
+    # Seconds a lock is held at most (by a process that died holding it),
+    # and how long to wait for one.
+    LOCK_TIMEOUT = 1
+    LOCK_WAIT = 0.05
+    LOCK_POLL = 0.002
+
+    def __init__(self, cache=default_cache):
+        self.cache = cache
+
+    def _lock(self, lock_key) -> bool:
+        deadline = time.monotonic() + self.LOCK_WAIT
+        # add() is atomic: only one request can take the lock.
+        while not self.cache.add(lock_key, 1, self.LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(self.LOCK_POLL)
+        return True
+
+    def consume(self, key, capacity, rate):
+        lock_key = f"{key}:lock"
+        if not self._lock(lock_key):
+            # Too many concurrent requests for the same key.
+            return False, 0
+        try:
+            now = time.time()
+            tokens, updated_at = self.cache.get(key, (capacity, now))
+            tokens = refill(tokens, updated_at, now, capacity, rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.cache.set(key, (tokens, now), int(capacity / rate) + 1)
+        finally:
+            self.cache.delete(lock_key)
+        return allowed, tokens
+
+
+class SharedMemoryBucketStore:
+    """
+    Set-associative table of buckets in a memory-mapped file. A key hashes
+    to a set of ``WAYS`` slots that is locked with ``lockf`` (against other
+    processes) and a thread lock (against other threads, which ``lockf``
+    doesn't exclude) while it is updated; when a set is full the least
+    recently used bucket is evicted.
+    """
+
+    WAYS = 8
+    SLOT = struct.Struct("<Qdd")
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.sets = max(slots // self.WAYS, 1)
+        self.set_size = self.SLOT.size * self.WAYS
+        self.set_format = struct.Struct("<" + "Qdd" * self.WAYS)
+        self._open_lock = threading.Lock()
+        self._pid = None
+
+    def _open(self):
+        size = self.sets * self.set_size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        # Locks held by other threads at fork time would never be released.
+        self._locks = [threading.Lock() for _ in range(self.sets)]
+        self._pid = os.getpid()
+
+    def consume(self, key, capacity, rate):
+        if self._pid != os.getpid():
+            with self._open_lock:
+                if self._pid != os.getpid():
+                    self._open()
+        key_hash = int.from_bytes(
+            hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+        ) | 1
+        index = key_hash % self.sets
+        offset = index * self.set_size
+        now = time.time()
+
+        with self._locks[index]:
+            return self._consume(key_hash, offset, now, capacity, rate)
+
+    def _consume(self, key_hash, offset, now, capacity, rate):
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self.set_size, offset)
+        try:
+            values = self.set_format.unpack_from(self._map, offset)
+            way, tokens = None, capacity
+            lru_way, lru_time = 0, now
+            for index in range(self.WAYS):
+                slot_hash, slot_tokens, slot_time = values[index * 3:index * 3 + 3]
+                if slot_hash == key_hash:
+                    way = index
+                    tokens = refill(slot_tokens, slot_time, now, capacity, rate)
+                    break
+                if slot_time < lru_time:
+                    lru_way, lru_time = index, slot_time
+            if way is None:
+                way = lru_way
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.SLOT.pack_into(
+                self._map, offset + way * self.SLOT.size, key_hash, tokens, now
+            )
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self.set_size, offset)
+        return allowed, tokens
+
+
+class PostgresBucketStore:
+    SQL = """
+        INSERT INTO user_ratelimitbucket AS bucket
+            (key, tokens, allowed, updated_at)
+        VALUES (%(key)s, %(capacity)s - 1, TRUE, %(now)s)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = LEAST(
+                %(capacity)s,
+                bucket.tokens + (%(now)s - bucket.updated_at) * %(rate)s
+            ) - CASE WHEN LEAST(
+                %(capacity)s,
+                bucket.tokens + (%(now)s - bucket.updated_at) * %(rate)s
+            ) >= 1 THEN 1 ELSE 0 END,
+            allowed = LEAST(
+                %(capacity)s,
+                bucket.tokens + (%(now)s - bucket.updated_at) * %(rate)s
+            ) >= 1,
+            updated_at = %(now)s
+        RETURNING allowed, tokens
+    """
+
+    def consume(self, key, capacity, rate):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.SQL,
+                {
+                    "key": key,
+                    "capacity": capacity,
+                    "rate": rate,
+                    "now": time.time(),
+                },
+            )
+            return cursor.fetchone()
+
+
+def default_shm_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "airport-throttle")
+
+
+_stores = {}
+
+
+def get_store():
+    name = settings.THROTTLE_STORE
+    if name not in _stores:
+        if name == "cache":
+            _stores[name] = CacheBucketStore()
+        elif name == "shm":
+            _stores[name] = SharedMemoryBucketStore(
+                getattr(settings, "THROTTLE_SHM_PATH", None)
+                or default_shm_path()
+            )
+        elif name == "postgres":
+            _stores[name] = PostgresBucketStore()
+        else:
+            raise ValueError(f"Unknown THROTTLE_STORE: {name!r}")
+    return _stores[name]
+
+
+class BucketRateThrottle(throttling.SimpleRateThrottle):
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.allowed, self.tokens = get_store().consume(
+            self.key, self.num_requests, self.num_requests / self.duration
+        )
+        if not self.allowed:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def throttle_failure(self):
+        THROTTLE_REJECTIONS.inc(self.scope)
+        return False
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, BucketRateThrottle):
+    pass
+
+
+class UserRateThrottle(throttling.UserRateThrottle, BucketRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, BucketRateThrottle):
+    pass
@@ -1,8 +1,10 @@
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.contrib.auth import get_user_model
+from rest_framework import generics, status
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.response import Response
 
-from user.serializers import UserSerializer
+from user.authentication import ClaimsJWTAuthentication, get_full_user
+from user.serializers import LogoutSerializer, UserSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -11,8 +13,24 @@ class CreateUserView(generics.CreateAPIView):
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (ClaimsJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in SAFE_METHODS:
+            return get_full_user(self.request.user)
+        if isinstance(self.request.user, get_user_model()):
+            return self.request.user
+        return get_user_model().objects.get(pk=self.request.user.id)
+
+
+class LogoutView(generics.GenericAPIView):
+    serializer_class = LogoutSerializer
+    authentication_classes = (ClaimsJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)